@@ -0,0 +1,398 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import config_cli
+import config_core
+import config_export
+import config_schema
+import deeplink_router
+import io_worker
+import permission_catalog
+
+DEFAULT_RESULTS_PATH = os.path.join(".appforge", "bench-results.json")
+# Tracked in git (unlike .appforge/) so every checkout compares against the same numbers
+DEFAULT_BASELINE_PATH = os.path.join("bench", "baseline.json")
+
+PATH_SIZES = [10, 100, 1000, 10000]
+PERMISSION_SIZES = [17, 100, 500]
+QUICK_PATH_SIZES = [10, 1000]
+QUICK_PERMISSION_SIZES = [17, 500]
+STALL_MB = 50
+QUICK_STALL_MB = 5
+
+MIN_SAMPLE_MS = 50.0
+MAX_LOOPS = 1 << 12
+
+SEARCH_QUERIES = ["c", "ca", "cam", "came", "camera", "", "loc", "location", "bluetooth", ""]
+
+
+def measure(fn, repeat, setup=None, warmup=1):
+    # Warm-up runs fill caches (schema rules, catalog index) so the median reflects steady state.
+    # Calls without a setup are looped until one sample lasts MIN_SAMPLE_MS, so sub-ms
+    # benchmarks are timed well above timer noise; 'ms' is still per call. GC is paused
+    # while timing (like timeit) so collections triggered by earlier runs do not land here
+    loops = 1
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if setup is None:
+            for _ in range(warmup):
+                fn()
+            warmup = 0
+            while loops < MAX_LOOPS:
+                started = time.perf_counter()
+                for _ in range(loops):
+                    fn()
+                if (time.perf_counter() - started) * 1000 >= MIN_SAMPLE_MS:
+                    break
+                loops *= 2
+        for run in range(warmup + repeat):
+            if setup:
+                setup()
+            gc.collect()
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            if run >= warmup:
+                times.append((time.perf_counter() - started) * 1000 / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {'ms': round(statistics.median(times), 4), 'min_ms': round(min(times), 4), 'runs': repeat,
+            'loops': loops}
+
+
+def sized_config(base, paths, permissions, catalog):
+    config = config_core.normalize_config(base)
+    config['deepLinks']['paths'] = [f"/seccion{i}/:id" for i in range(paths)]
+    names = [perm.name for perm in catalog.entries[:permissions]]
+    names += [f"com.ejemplo.permission.CUSTOM_{i}" for i in range(permissions - len(names))]
+    config['android']['permissions'] = names
+    return config
+
+
+def write_config(path, config):
+    config_core.atomic_write(path, config_core.dump_config(config).encode('utf-8'))
+
+
+class Suite:
+    def __init__(self, base, workdir, repeat, path_sizes, permission_sizes, stall_mb=STALL_MB):
+        self.base = config_core.normalize_config(base)
+        self.workdir = workdir
+        self.repeat = repeat
+        self.path_sizes = path_sizes
+        self.permission_sizes = permission_sizes
+        self.stall_mb = stall_mb
+        self.catalog = permission_catalog.PermissionCatalog.load()
+        self.results = {}
+
+    def record(self, name, result):
+        self.results[name] = result
+        print(f"{name:<44} {result['ms']:10.3f} ms  "
+              f"(min {result['min_ms']:.3f}, n={result['runs']}x{result.get('loops', 1)})")
+
+    def config(self, paths=10, permissions=17):
+        return sized_config(self.base, paths, permissions, self.catalog)
+
+    def run_core(self):
+        for size in self.path_sizes:
+            config = self.config(paths=size)
+            path = os.path.join(self.workdir, f"core-{size}.json")
+            write_config(path, config)
+            self.record(f"core.load[paths={size}]", measure(lambda: config_core.load_config(path), self.repeat))
+            self.record(f"core.dump[paths={size}]", measure(lambda: config_core.dump_config(config), self.repeat))
+            self.record(f"core.field_values[paths={size}]",
+                        measure(lambda: config_core.field_values(config), self.repeat))
+            self.record(f"core.save_unchanged[paths={size}]",
+                        measure(lambda: config_core.save_config(path, config), self.repeat))
+            self.record(f"schema.validate[paths={size}]",
+                        measure(lambda: config_schema.validate(config), self.repeat))
+            paths = config['deepLinks']['paths']
+            self.record(f"router.build[paths={size}]",
+                        measure(lambda: deeplink_router.Router(paths), self.repeat))
+
+        self.record("catalog.search[typing]",
+                    measure(lambda: [self.catalog.search(q) for q in SEARCH_QUERIES], self.repeat))
+
+        files = []
+        for i, config in enumerate(config_schema.synthetic_configs(self.base, 200)):
+            path = os.path.join(self.workdir, f"fleet-{i}.json")
+            write_config(path, config)
+            files.append(path)
+        self.record("cli.set[files=200]", measure(
+            lambda: config_cli.run(files, 'set', ('build.emulator', 'true', False), jobs=1, dry_run=True), self.repeat))
+
+        for name in (config_export.CAPACITOR_CONFIG, config_export.PACKAGE_JSON):
+            shutil.copy(name, os.path.join(self.workdir, name))
+        self.record("export.derived_and_sync", measure(
+            lambda: config_export.sync_project(self.base, self.workdir), self.repeat))
+
+    def run_editor(self, root):
+        import tkinter as tk
+        import config_editor
+
+        # Dialogs would block the run; record them instead
+        dialogs = []
+
+        class SilentMessagebox:
+            showinfo = showwarning = showerror = staticmethod(lambda *args, **kwargs: dialogs.append(args))
+
+        config_editor.messagebox = SilentMessagebox
+
+        class TimedEditor(config_editor.AppConfigEditor):
+            phases = {}
+
+            def style_widgets(self):
+                started = time.perf_counter()
+                super().style_widgets()
+                TimedEditor.phases['style_widgets'] = (time.perf_counter() - started) * 1000
+
+            def create_widgets(self):
+                started = time.perf_counter()
+                super().create_widgets()
+                TimedEditor.phases['create_widgets'] = (time.perf_counter() - started) * 1000
+
+        previous_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            write_config(config_core.DEFAULT_CONFIG_PATH, self.config())
+            phases = {'style_widgets': [], 'create_widgets': [], 'startup': [], 'startup_loaded': []}
+            for _ in range(self.repeat):
+                window = tk.Toplevel(root)
+                started = time.perf_counter()
+                editor = TimedEditor(window)
+                window.update_idletasks()
+                phases['startup'].append((time.perf_counter() - started) * 1000)
+                editor.worker.wait()
+                window.update_idletasks()
+                phases['startup_loaded'].append((time.perf_counter() - started) * 1000)
+                for phase in ('style_widgets', 'create_widgets'):
+                    phases[phase].append(TimedEditor.phases[phase])
+                editor.worker.close()
+                window.destroy()
+            for phase, times in phases.items():
+                self.record(f"editor.{phase}", {'ms': round(statistics.median(times), 4),
+                                                'min_ms': round(min(times), 4), 'runs': self.repeat})
+
+            window = tk.Toplevel(root)
+            editor = config_editor.AppConfigEditor(window)
+            editor.worker.wait()
+            sizes = [(paths, self.permission_sizes[0]) for paths in self.path_sizes]
+            sizes += [(self.path_sizes[0], perms) for perms in self.permission_sizes[1:]]
+            for paths, perms in sizes:
+                self._bench_load_save(editor, window, paths, perms)
+            for size in self.path_sizes:
+                items = [f"/seccion{i}/:id" for i in range(size)]
+                self.record(f"editor.paths_render[paths={size}]", measure(
+                    lambda: (editor.deep_link_paths.replace(items), window.update_idletasks()), self.repeat,
+                    setup=lambda: editor.deep_link_paths.replace([])))
+            for size in self.permission_sizes:
+                perms = self.config(permissions=size)['android']['permissions']
+                self.record(f"editor.permissions_render[perms={size}]", measure(
+                    lambda: (editor.write_field("android.permissions", perms), window.update_idletasks()),
+                    self.repeat, setup=lambda: editor.write_field("android.permissions", [])))
+            self.record("editor.filter_permissions[typing]", measure(
+                lambda: [(editor.perm_search_var.set(q), window.update_idletasks()) for q in SEARCH_QUERIES],
+                self.repeat))
+            self._bench_load_stall(editor, root)
+            editor.worker.close()
+            window.destroy()
+        finally:
+            os.chdir(previous_cwd)
+        return dialogs
+
+    def _bench_load_save(self, editor, window, paths, perms):
+        # Alternate two configs so every load really rewrites the widgets
+        label = f"paths={paths},perms={perms}"
+        files = []
+        for variant in range(2):
+            config = self.config(paths, perms)
+            config['appName'] = f"Bench {variant}"
+            config['deepLinks']['paths'] = [f"/v{variant}{p}" for p in config['deepLinks']['paths']]
+            path = os.path.join(self.workdir, f"editor-{paths}-{perms}-{variant}.json")
+            write_config(path, config)
+            files.append(path)
+        turn = [0]
+
+        def next_file():
+            editor.config_path = files[turn[0] % 2]
+            turn[0] += 1
+
+        self.record(f"editor.load[{label}]", measure(
+            lambda: (editor.load_config(), editor.worker.wait(), window.update_idletasks()), self.repeat,
+            setup=next_file))
+
+        versions = iter(range(10 ** 6))
+        self.record(f"editor.save[{label}]", measure(
+            lambda: (editor.save_config(), editor.worker.wait(), window.update_idletasks()), self.repeat,
+            setup=lambda: editor.write_field("version", f"1.0.{next(versions)}")))
+
+    def _bench_load_stall(self, editor, root):
+        # Pads the config with unrelated data up to the target size, then keeps
+        # the main loop running during the load and records its worst stall
+        config = self.config()
+        entry = len(json.dumps({'name': "asset000000.png", 'size': 0, 'tags': ["icon", "hdpi"]}, indent=2))
+        count = self.stall_mb * 1000 * 1000 // (entry + 8)
+        config['metadata'] = {'assets': [{'name': f"asset{i:06d}.png", 'size': i, 'tags': ["icon", "hdpi"]}
+                                         for i in range(count)]}
+        path = os.path.join(self.workdir, "editor-stall.json")
+        write_config(path, config)
+        size_mb = os.path.getsize(path) / 1e6
+        label = f"{self.stall_mb}MB"
+
+        loads, stalls = [], []
+        for _ in range(self.repeat):
+            editor.config_path = path
+            editor.file_signature = None
+            meter = io_worker.StallMeter(root)
+            meter.start()
+            started = time.perf_counter()
+            editor.load_config()
+            while editor.worker.busy('load'):
+                root.update()
+                time.sleep(0.001)
+            root.update()
+            loads.append((time.perf_counter() - started) * 1000)
+            stalls.append(meter.stop())
+        for name, times in ((f"editor.load[{label}]", loads), (f"editor.load_max_stall[{label}]", stalls)):
+            self.record(name, {'ms': round(statistics.median(times), 4), 'min_ms': round(min(times), 4),
+                               'runs': self.repeat, 'file_mb': round(size_mb, 1)})
+
+
+def start_xvfb(display=":99"):
+    xvfb = shutil.which('Xvfb')
+    if not xvfb:
+        return None
+    process = subprocess.Popen([xvfb, display, '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    time.sleep(0.5)
+    return process
+
+
+def open_tk():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return None, str(e)
+    root.withdraw()
+    return root, None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    # min_delta_ms applies to a whole timed sample, so a looped sub-ms benchmark
+    # is judged on the same scale as a single slow call
+    regressions, missing = [], []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            missing.append(name)
+            continue
+        delta = (result['ms'] - before['ms']) * before.get('loops', 1)
+        if delta > min_delta_ms and result['ms'] > before['ms'] * threshold:
+            regressions.append((name, before['ms'], result['ms']))
+    return regressions, missing
+
+
+def load_results(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('results', {})
+    except (OSError, ValueError):
+        return None
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    config_core.atomic_write(path, json.dumps(data, indent=2).encode('utf-8'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bench_suite.py",
+        description="Mide el editor de config y las herramientas de config/build, y marca regresiones "
+                    "respecto a una linea base."
+    )
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH,
+                        help="Config base para los tamanos sinteticos")
+    parser.add_argument('--repeat', type=int, default=7, help="Muestras por benchmark (por defecto: 7)")
+    parser.add_argument('--quick', action='store_true', help="Menos tamanos, para una revision rapida")
+    parser.add_argument('--no-gui', action='store_true', help="Omite los benchmarks del editor Tk")
+    parser.add_argument('--out', default=DEFAULT_RESULTS_PATH, help=f"Resultados (por defecto: {DEFAULT_RESULTS_PATH})")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH,
+                        help=f"Linea base (por defecto: {DEFAULT_BASELINE_PATH})")
+    parser.add_argument('--update-baseline', action='store_true', help="Guarda esta ejecucion como nueva linea base")
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help="Marca los resultados mas lentos que linea base x THRESHOLD (por defecto: 1.5)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help="Ignora diferencias menores que esto por muestra (las llamadas se repiten "
+                             f"hasta durar {MIN_SAMPLE_MS:g} ms), para dejar fuera el ruido del reloj")
+    opts = parser.parse_args(argv)
+
+    path_sizes = QUICK_PATH_SIZES if opts.quick else PATH_SIZES
+    permission_sizes = QUICK_PERMISSION_SIZES if opts.quick else PERMISSION_SIZES
+
+    with tempfile.TemporaryDirectory(prefix="appforge-bench-") as workdir:
+        suite = Suite(config_core.load_config(opts.config), workdir, opts.repeat, path_sizes, permission_sizes,
+                      QUICK_STALL_MB if opts.quick else STALL_MB)
+        suite.run_core()
+
+        if not opts.no_gui:
+            xvfb = start_xvfb() if not os.environ.get('DISPLAY') and sys.platform.startswith('linux') else None
+            root, error = open_tk()
+            try:
+                if root is None:
+                    print(f"Se omiten los benchmarks del editor: Tk no disponible ({error}); "
+                          "instala Xvfb o usa una pantalla", file=sys.stderr)
+                else:
+                    suite.run_editor(root)
+                    root.destroy()
+            finally:
+                if xvfb:
+                    xvfb.terminate()
+
+    save_results(opts.out, suite.results)
+    print(f"Resultados: {opts.out}")
+
+    if opts.update_baseline:
+        save_results(opts.baseline, suite.results)
+        print(f"Linea base actualizada: {opts.baseline}")
+        return 0
+
+    baseline = load_results(opts.baseline)
+    if baseline is None:
+        print(f"No hay linea base en {opts.baseline}; ejecuta con --update-baseline para crearla")
+        return 0
+    regressions, missing = compare(suite.results, baseline, opts.threshold, opts.min_delta_ms)
+    for name, before, after in regressions:
+        print(f"REGRESION {name}: {before:.3f} ms -> {after:.3f} ms ({after / before:.1f}x)", file=sys.stderr)
+    for name in missing:
+        print(f"FALTA {name}: no esta en {opts.baseline}; ejecuta con --update-baseline para agregarlo",
+              file=sys.stderr)
+    if regressions or missing:
+        return 1
+    print(f"Sin regresiones sobre {opts.threshold}x la linea base ({len(baseline)} benchmarks)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import config_core
+import tracing
+
+CACHE_VERSION = 3
+DEFAULT_CACHE_PATH = os.path.join(".appforge", "build-cache.json")
+PLATFORM_DIR = "android"
+
+# package.json also carries the synced name/version; only the dependencies
+# decide whether the platform and plugins have to be reinstalled
+DEPENDENCY_KEYS = ['dependencies', 'devDependencies']
+
+STAGE_ORDER = ['platform', 'icons', 'manifest', 'web', 'version']
+
+# files: paths (files or directories) relative to the project root
+# json: {path: keys} JSON files where only those top-level keys count
+# config: app.config.json keys the stage depends on
+# after: stages that invalidate this one when they rerun
+STAGES = {
+    'platform': {
+        'files': [],
+        'json': {'package.json': DEPENDENCY_KEYS},
+        'config': ['appId'],
+        'after': [],
+    },
+    'icons': {
+        # The generator's colours and splash scale are its argparse defaults, so hashing the
+        # script reruns the stage when they change (build.yml passes no options)
+        'files': ['assets', 'icon_generator.py'],
+        'config': [],
+        'after': ['platform'],
+    },
+    'manifest': {
+        'files': ['manifest_patcher.py'],
+        'config': ['appId', 'android.permissions', 'deepLinks'],
+        'after': ['platform'],
+    },
+    'web': {
+        'files': ['www', 'capacitor.config.json'],
+        'json': {'package.json': DEPENDENCY_KEYS},
+        'config': [],
+        'after': ['platform'],
+    },
+    'version': {
+        'files': [],
+        'config': ['version', 'versionCode', 'android.minSdkVersion', 'android.targetSdkVersion'],
+        'after': ['platform'],
+    },
+}
+
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileHasher:
+    def __init__(self, root, entries=None):
+        self.root = root
+        self.entries = dict(entries or {})
+        self.seen = set()
+        self.hashed = 0
+
+    def file_digest(self, rel):
+        st = os.stat(os.path.join(self.root, rel))
+        self.seen.add(rel)
+        cached = self.entries.get(rel)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hash_file(os.path.join(self.root, rel))
+        self.entries[rel] = [st.st_size, st.st_mtime_ns, digest]
+        self.hashed += 1
+        return digest
+
+    def tree_digest(self, rel):
+        full = os.path.join(self.root, rel)
+        if os.path.isfile(full):
+            return self.file_digest(rel)
+        if not os.path.isdir(full):
+            return "missing"
+        files = []
+        for dirpath, dirnames, filenames in os.walk(full):
+            dirnames.sort()
+            for name in filenames:
+                files.append(os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, '/'))
+        h = hashlib.sha256()
+        for path in sorted(files):
+            h.update(path.encode('utf-8'))
+            h.update(b'\0')
+            h.update(self.file_digest(path).encode('ascii'))
+            h.update(b'\n')
+        return h.hexdigest()
+
+    def pruned_entries(self):
+        return {rel: entry for rel, entry in self.entries.items() if rel in self.seen}
+
+
+def json_digest(path, keys):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return "missing"
+    except (OSError, ValueError):
+        return hash_file(path)
+    if not isinstance(data, dict):
+        return hash_file(path)
+    payload = json.dumps({key: data.get(key) for key in keys}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def dependency_key(root):
+    return json_digest(os.path.join(root, 'package.json'), DEPENDENCY_KEYS)
+
+
+def config_subset(config, keys):
+    subset = {}
+    for key in keys:
+        try:
+            subset[key] = config_core.get_value(config, key)
+        except (KeyError, IndexError):
+            subset[key] = None
+    return subset
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "files": {}, "stages": {}}
+    if manifest.get('version') != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "files": {}, "stages": {}}
+    manifest.setdefault('files', {})
+    manifest.setdefault('stages', {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def stage_keys(root, hasher):
+    config_path = os.path.join(root, config_core.DEFAULT_CONFIG_PATH)
+    config = config_core.load_config(config_path) if os.path.isfile(config_path) else {}
+    digests = {}
+    keys = {}
+    for stage in STAGE_ORDER:
+        spec = STAGES[stage]
+        inputs = {}
+        for rel in spec['files']:
+            if rel not in digests:
+                digests[rel] = hasher.tree_digest(rel)
+            inputs[rel] = digests[rel]
+        for rel, subset in spec.get('json', {}).items():
+            inputs[f"{rel}:{','.join(subset)}"] = json_digest(os.path.join(root, rel), subset)
+        inputs['config'] = config_subset(config, spec['config'])
+        payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        keys[stage] = hashlib.sha256(payload).hexdigest()
+    return keys
+
+
+@tracing.traced('planner.plan')
+def plan(root, manifest):
+    hasher = FileHasher(root, manifest.get('files'))
+    keys = stage_keys(root, hasher)
+    done = manifest.get('stages', {})
+
+    result = {}
+    for stage in STAGE_ORDER:
+        if stage not in done:
+            result[stage] = "sin cache"
+        elif done[stage] != keys[stage]:
+            result[stage] = "entradas cambiadas"
+        else:
+            result[stage] = None
+
+    if not os.path.isdir(os.path.join(root, PLATFORM_DIR)):
+        result['platform'] = "falta la plataforma"
+
+    for stage in STAGE_ORDER:
+        if result[stage] is None:
+            for dep in STAGES[stage]['after']:
+                if result[dep]:
+                    result[stage] = f"se repite {dep}"
+                    break
+
+    manifest['files'] = hasher.pruned_entries()
+    return result, keys, hasher.hashed
+
+
+@tracing.traced('planner.commit')
+def commit(root, manifest, stages=None):
+    hasher = FileHasher(root, manifest.get('files'))
+    keys = stage_keys(root, hasher)
+    for stage in stages or STAGE_ORDER:
+        manifest['stages'][stage] = keys[stage]
+    manifest['files'] = hasher.pruned_entries()
+    return keys
+
+
+def write_github_output(result, path):
+    with open(path, 'a', encoding='utf-8') as f:
+        for stage in STAGE_ORDER:
+            f.write(f"{stage}={'true' if result[stage] else 'false'}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="build_planner.py",
+        description="Decide que etapas del build Android hay que repetir segun hashes de contenido."
+    )
+    parser.add_argument('--root', default='.', help="Raiz del proyecto (por defecto: directorio actual)")
+    parser.add_argument('--cache', default=None, help=f"Manifiesto de cache (por defecto: <root>/{DEFAULT_CACHE_PATH})")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('plan', help="Muestra las etapas pendientes")
+    p.add_argument('--json', action='store_true', help="Muestra el plan como JSON")
+    p.add_argument('--github-output', action='store_true', help="Agrega lineas etapa=true|false a $GITHUB_OUTPUT")
+
+    p = sub.add_parser('commit', help="Registra las etapas como construidas con las entradas actuales")
+    p.add_argument('stages', nargs='*', help=f"Etapas a registrar: {', '.join(STAGE_ORDER)} (por defecto: todas)")
+
+    p = sub.add_parser('key', help="Muestra el hash de dependencias de package.json (para la clave de cache del CI)")
+    p.add_argument('--github-output', action='store_true', help="Agrega key=<hash> a $GITHUB_OUTPUT")
+
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+    root = opts.root
+
+    if opts.command == 'key':
+        key = dependency_key(root)
+        print(key)
+        if opts.github_output:
+            output = os.environ.get('GITHUB_OUTPUT')
+            if not output:
+                print("ERROR GITHUB_OUTPUT no esta definido", file=sys.stderr)
+                return 1
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(f"key={key}\n")
+        return 0
+
+    cache_path = opts.cache or os.path.join(root, DEFAULT_CACHE_PATH)
+    manifest = load_manifest(cache_path)
+
+    if opts.command == 'commit':
+        unknown = [stage for stage in opts.stages if stage not in STAGES]
+        if unknown:
+            parser.error(f"etapa(s) desconocida(s): {', '.join(unknown)}")
+        commit(root, manifest, opts.stages)
+        save_manifest(cache_path, manifest)
+        print(f"Etapas registradas: {', '.join(opts.stages or STAGE_ORDER)}")
+        return 0
+
+    result, keys, hashed = plan(root, manifest)
+    save_manifest(cache_path, manifest)
+
+    if opts.json:
+        print(json.dumps({stage: {"stale": bool(result[stage]), "reason": result[stage], "key": keys[stage]}
+                          for stage in STAGE_ORDER}, indent=2))
+    else:
+        for stage in STAGE_ORDER:
+            status = f"pendiente ({result[stage]})" if result[stage] else "al dia"
+            print(f"{stage:<10} {status}")
+        print(f"{hashed} archivo(s) con hash calculado")
+
+    if opts.github_output:
+        output = os.environ.get('GITHUB_OUTPUT')
+        if not output:
+            print("ERROR GITHUB_OUTPUT no esta definido", file=sys.stderr)
+            return 1
+        write_github_output(result, output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import time
+
+# Taken before the other imports so "arranque" includes loading them
+_START = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+import config_core
+from config_core import expand_files, SERIAL_THRESHOLD
+
+
+def apply_operation(config, op, args):
+    if op == 'get':
+        return False, config_core.get_value(config, args[0])
+    if op == 'set':
+        key, raw, as_json = args
+        if as_json:
+            value = json.loads(raw)
+        else:
+            try:
+                current = config_core.get_value(config, key)
+            except (KeyError, IndexError):
+                current = None
+            value = config_core.coerce_value(current, raw)
+        return config_core.set_value(config, key, value), value
+    if op == 'bump-version':
+        config_core.bump_config_version(config)
+        return True, f"{config['version']} ({config['versionCode']})"
+    if op == 'add-permission':
+        perm = args[0]
+        if '.' not in perm:
+            perm = config_core.PERMISSION_PREFIX + perm
+        return config_core.add_permission(config, perm), perm
+    if op == 'add-path':
+        return config_core.add_path(config, args[0]), args[0]
+    raise ValueError(f"Operacion desconocida: {op}")
+
+
+def process_file(path, op, args, dry_run=False):
+    try:
+        config = config_core.load_config(path)
+        changed, result = apply_operation(config, op, args)
+        if changed and not dry_run:
+            config_core.save_config(path, config)
+        return path, changed, result, None
+    except Exception as e:
+        return path, False, None, f"{type(e).__name__}: {e}"
+
+
+def _process_star(job):
+    return process_file(*job)
+
+
+def run(files, op, args, jobs=None, dry_run=False):
+    work = [(path, op, args, dry_run) for path in files]
+    workers = jobs or os.cpu_count() or 1
+    # Spinning up the pool costs ~100 ms; small batches are faster serially
+    if workers == 1 or len(work) < SERIAL_THRESHOLD:
+        return [_process_star(job) for job in work]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(work) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_process_star, work, chunksize=chunksize))
+
+
+def format_result(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="config_cli.py",
+        description="Edita app.config.json sin interfaz grafica (acepta globs y muchos archivos)."
+    )
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="No escribe cambios")
+    parser.add_argument('--time', action='store_true', help="Muestra tiempos en stderr")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('get', help="Lee un valor (ej: android.minSdkVersion)")
+    p.add_argument('key')
+    p.add_argument('files', nargs='*')
+
+    p = sub.add_parser('set', help="Escribe un valor")
+    p.add_argument('key')
+    p.add_argument('value')
+    p.add_argument('files', nargs='*')
+    p.add_argument('--json', action='store_true', help="Interpreta el valor como JSON")
+
+    p = sub.add_parser('bump-version', help="Incrementa version (x.x.x+1) y versionCode")
+    p.add_argument('files', nargs='*')
+
+    p = sub.add_parser('add-permission', help="Agrega un permiso de Android")
+    p.add_argument('permission')
+    p.add_argument('files', nargs='*')
+
+    p = sub.add_parser('add-path', help="Agrega una ruta de deep link")
+    p.add_argument('path')
+    p.add_argument('files', nargs='*')
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    opts = parser.parse_args(argv)
+
+    if opts.command == 'get':
+        args = (opts.key,)
+    elif opts.command == 'set':
+        args = (opts.key, opts.value, opts.json)
+    elif opts.command == 'add-permission':
+        args = (opts.permission,)
+    elif opts.command == 'add-path':
+        args = (opts.path,)
+    else:
+        args = ()
+
+    files = expand_files(opts.files)
+    if not files:
+        print("No se encontraron archivos", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    results = run(files, opts.command, args, jobs=opts.jobs, dry_run=opts.dry_run)
+    elapsed = time.perf_counter() - started
+
+    errors = 0
+    changed = 0
+    for path, was_changed, result, error in results:
+        if error:
+            errors += 1
+            print(f"{path}: ERROR {error}", file=sys.stderr)
+            continue
+        changed += was_changed
+        prefix = f"{path}: " if len(files) > 1 else ""
+        if opts.command == 'get':
+            print(prefix + format_result(result))
+        else:
+            print(prefix + ("" if was_changed else "sin cambios ") + format_result(result))
+
+    if opts.time:
+        print(
+            f"{len(files)} archivos, {changed} modificados, {errors} errores | "
+            f"arranque {(started - _START) * 1000:.1f} ms, proceso {elapsed * 1000:.1f} ms",
+            file=sys.stderr
+        )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
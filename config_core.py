@@ -0,0 +1,384 @@
+import glob
+import hashlib
+import itertools
+import json
+import os
+
+DEFAULT_CONFIG_PATH = "app.config.json"
+
+COMMON_PERMISSIONS = [
+    "android.permission.INTERNET",
+    "android.permission.ACCESS_NETWORK_STATE",
+    "android.permission.CAMERA",
+]
+
+PERMISSION_PREFIX = "android.permission."
+
+# Below this many files the CLIs stay serial; a process pool costs more than it saves
+SERIAL_THRESHOLD = 256
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def dump_config(config):
+    return json.dumps(config, indent=2, ensure_ascii=False)
+
+
+def atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def save_config(path, config):
+    data = dump_config(config).encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if content_hash(f.read()) == content_hash(data):
+                return False
+    except OSError:
+        pass
+    atomic_write(path, data)
+    return True
+
+
+def normalize_config(config):
+    android = config.get('android', {})
+    deeplinks = config.get('deepLinks', {})
+    build = config.get('build', {})
+    target_sdk = int(android.get('targetSdkVersion', 34))
+    normalized = {
+        "appId": config.get('appId', ''),
+        "appName": config.get('appName', ''),
+        "version": config.get('version', '1.0.0'),
+        "versionCode": int(config.get('versionCode', 1)),
+        "description": config.get('description', ''),
+        "author": config.get('author', {"name": "", "email": "", "url": ""}),
+        "android": {
+            "minSdkVersion": int(android.get('minSdkVersion', 24)),
+            "targetSdkVersion": target_sdk,
+            "compileSdkVersion": int(android.get('compileSdkVersion', target_sdk)),
+            "permissions": list(android.get('permissions', []))
+        },
+        "deepLinks": {
+            "enabled": bool(deeplinks.get('enabled', False)),
+            "scheme": deeplinks.get('scheme', 'miapp'),
+            "host": deeplinks.get('host', ''),
+            "paths": list(deeplinks.get('paths', []))
+        },
+        "build": {
+            "compile": bool(build.get('compile', True)),
+            "emulator": bool(build.get('emulator', False))
+        }
+    }
+    variants = normalize_variants(config.get('variants'))
+    if variants:
+        normalized['variants'] = variants
+    return normalized
+
+
+# Fields a variant can override; everything else is shared by all variants
+VARIANT_FIELDS = [
+    "appId",
+    "appName",
+    "android.permissions",
+    "deepLinks.host",
+    "build.compile",
+    "build.emulator",
+]
+
+
+def normalize_variant(entry):
+    entry = entry if isinstance(entry, dict) else {}
+    variant = {}
+    for key in ('appIdSuffix', 'appName', 'host'):
+        if key in entry:
+            if not isinstance(entry[key], str):
+                raise ValueError(f"variants: {key} debe ser un texto")
+            variant[key] = entry[key]
+    permissions = entry.get('permissions')
+    if isinstance(permissions, dict):
+        changes = {}
+        for key in ('add', 'remove'):
+            value = permissions.get(key)
+            if not value:
+                continue
+            if not isinstance(value, list) or not all(isinstance(perm, str) for perm in value):
+                raise ValueError(f"variants: permissions.{key} debe ser una lista de permisos")
+            changes[key] = list(value)
+        if changes:
+            variant['permissions'] = changes
+    build = entry.get('build')
+    if isinstance(build, dict):
+        flags = {}
+        for key in ('compile', 'emulator'):
+            if key in build:
+                if not isinstance(build[key], bool):
+                    raise ValueError(f"variants: build.{key} debe ser true o false")
+                flags[key] = build[key]
+        if flags:
+            variant['build'] = flags
+    return variant
+
+
+def normalize_variants(variants):
+    # {dimension: {name: overrides}}; dimensions with no values are dropped
+    if not isinstance(variants, dict):
+        return {}
+    return {dimension: {name: normalize_variant(entry) for name, entry in values.items()}
+            for dimension, values in variants.items() if isinstance(values, dict) and values}
+
+
+def variant_combinations(config):
+    # Every combination across dimensions, in dimension order: [(name, [overrides, ...])]
+    dimensions = [list(values.items()) for values in normalize_variants(config.get('variants')).values()]
+    if not dimensions:
+        return []
+    return [('-'.join(name for name, _ in combo), [overrides for _, overrides in combo])
+            for combo in itertools.product(*dimensions)]
+
+
+def apply_variant(config, overrides):
+    # Concrete config for one variant: the base with each override applied in order
+    resolved = normalize_config({key: value for key, value in config.items() if key != 'variants'})
+    for variant in overrides:
+        resolved['appId'] += variant.get('appIdSuffix', '')
+        if 'appName' in variant:
+            resolved['appName'] = variant['appName']
+        if 'host' in variant:
+            resolved['deepLinks']['host'] = variant['host']
+        changes = variant.get('permissions', {})
+        removed = set(changes.get('remove', []))
+        permissions = [p for p in resolved['android']['permissions'] if p not in removed]
+        permissions += [p for p in dict.fromkeys(changes.get('add', [])) if p not in permissions]
+        resolved['android']['permissions'] = permissions
+        resolved['build'].update(variant.get('build', {}))
+    return resolved
+
+
+def resolve_variants(config):
+    return [(name, apply_variant(config, overrides)) for name, overrides in variant_combinations(config)]
+
+
+def resolve_variant(config, name):
+    for combo, overrides in variant_combinations(config):
+        if combo == name:
+            return apply_variant(config, overrides)
+    raise KeyError(name)
+
+
+def variant_overrides(base, resolved):
+    # Inverse of apply_variant for a single variant: the overrides that turn base into resolved
+    base = normalize_config(base)
+    resolved = normalize_config(resolved)
+    if not resolved['appId'].startswith(base['appId']):
+        raise ValueError(f"El App ID de la variante debe empezar por {base['appId']}")
+    variant = {}
+    if resolved['appId'] != base['appId']:
+        variant['appIdSuffix'] = resolved['appId'][len(base['appId']):]
+    if resolved['appName'] != base['appName']:
+        variant['appName'] = resolved['appName']
+    if resolved['deepLinks']['host'] != base['deepLinks']['host']:
+        variant['host'] = resolved['deepLinks']['host']
+    added = [p for p in resolved['android']['permissions'] if p not in base['android']['permissions']]
+    removed = [p for p in base['android']['permissions'] if p not in resolved['android']['permissions']]
+    if added or removed:
+        variant['permissions'] = {key: value for key, value in (('add', added), ('remove', removed)) if value}
+    flags = {key: value for key, value in resolved['build'].items() if value != base['build'][key]}
+    if flags:
+        variant['build'] = flags
+    return variant
+
+
+def bump_version(version, version_code):
+    parts = version.strip().split('.')
+    if len(parts) < 3:
+        raise ValueError("La version debe ser x.x.x")
+    parts[2] = str(int(parts[2]) + 1)
+    return '.'.join(parts), int(version_code) + 1
+
+
+EDITOR_FIELDS = [
+    "appId",
+    "appName",
+    "version",
+    "versionCode",
+    "android.minSdkVersion",
+    "android.targetSdkVersion",
+    "android.permissions",
+    "deepLinks.enabled",
+    "deepLinks.scheme",
+    "deepLinks.host",
+    "deepLinks.paths",
+    "build.compile",
+    "build.emulator",
+]
+
+
+FIELD_DEFAULTS = {
+    "appId": '',
+    "appName": '',
+    "version": '1.0.0',
+    "versionCode": 1,
+    "android.minSdkVersion": 24,
+    "android.targetSdkVersion": 34,
+    "android.permissions": [],
+    "deepLinks.enabled": False,
+    "deepLinks.scheme": 'miapp',
+    "deepLinks.host": '',
+    "deepLinks.paths": [],
+    "build.compile": True,
+    "build.emulator": False,
+}
+
+
+def _field_value(value, default):
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return bool(value)
+    if isinstance(default, int):
+        # Same parsing as an editor entry: a bad value stays as text for config_schema to report
+        text = str(value).strip()
+        try:
+            return int(text or default)
+        except ValueError:
+            return text
+    if isinstance(default, list):
+        return list(value) if isinstance(value, list) else default
+    return value if isinstance(value, str) else str(value)
+
+
+def field_values(config, fields=EDITOR_FIELDS):
+    # Lenient on purpose (unlike normalize_config): the editor must open any config it can parse
+    values = {}
+    for key in fields:
+        try:
+            value = get_value(config, key)
+        except (KeyError, IndexError):
+            value = None
+        values[key] = _field_value(value, FIELD_DEFAULTS[key])
+    return values
+
+
+def _split_key(key):
+    return [int(p) if p.isdigit() else p for p in key.split('.') if p]
+
+
+def get_value(config, key):
+    value = config
+    for part in _split_key(key):
+        if isinstance(value, list) and isinstance(part, int):
+            value = value[part]
+        elif isinstance(value, dict):
+            value = value[part]
+        else:
+            raise KeyError(key)
+    return value
+
+
+def coerce_value(current, raw):
+    if isinstance(current, bool):
+        lowered = raw.strip().lower()
+        if lowered in ('true', '1', 'yes', 'si'):
+            return True
+        if lowered in ('false', '0', 'no'):
+            return False
+        raise ValueError(f"Valor booleano invalido: {raw}")
+    if isinstance(current, int):
+        return int(raw)
+    if isinstance(current, float):
+        return float(raw)
+    if isinstance(current, (list, dict)):
+        value = json.loads(raw)
+        if not isinstance(value, type(current)):
+            raise ValueError(f"Se esperaba {type(current).__name__}: {raw}")
+        return value
+    return raw
+
+
+def set_value(config, key, value):
+    parts = _split_key(key)
+    if not parts:
+        raise KeyError(key)
+    target = config
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[part]
+        else:
+            target = target.setdefault(part, {})
+    last = parts[-1]
+    if isinstance(target, list):
+        changed = target[last] != value
+        target[last] = value
+    else:
+        changed = last not in target or target[last] != value
+        target[last] = value
+    return changed
+
+
+def add_permission(config, perm):
+    perms = config.setdefault('android', {}).setdefault('permissions', [])
+    if perm in perms:
+        return False
+    perms.append(perm)
+    return True
+
+
+def remove_permission(config, perm):
+    perms = config.get('android', {}).get('permissions', [])
+    if perm not in perms:
+        return False
+    perms.remove(perm)
+    return True
+
+
+def add_path(config, path):
+    paths = config.setdefault('deepLinks', {}).setdefault('paths', [])
+    if path in paths:
+        return False
+    paths.append(path)
+    return True
+
+
+def bump_config_version(config):
+    version, code = bump_version(config.get('version', '1.0.0'), config.get('versionCode', 1))
+    config['version'] = version
+    config['versionCode'] = code
+    return True
+
+
+def expand_files(patterns):
+    files = []
+    seen = set()
+    for pattern in patterns or [DEFAULT_CONFIG_PATH]:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
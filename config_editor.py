@@ -1,7 +1,79 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import json
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import argparse
 import os
+import time
+
+import config_core
+import config_export
+import config_schema
+import deeplink_router
+import io_worker
+import permission_catalog
+import tracing
+from list_model import ListModel, parse_bulk
+from list_view import VirtualList
+
+WATCH_INTERVAL_MS = 1000
+BASE_VARIANT = "Base"
+NEW_VARIANT = "+ Nueva..."
+
+
+def _variant_config(config, variant):
+    # The base config, or the base with one dimension value applied while a variant is edited
+    if variant is None:
+        return config
+    dimension, name = variant
+    return config_core.apply_variant(config, [config_core.normalize_variants(config.get('variants'))[dimension][name]])
+
+
+def _field_values(config, variant=None):
+    try:
+        return config_core.field_values(_variant_config(config, variant))
+    except (KeyError, TypeError, ValueError):
+        # The variant is gone from the file or malformed; the editor falls back to the base
+        return config_core.field_values(config)
+
+
+def _read_config(path, known_signature=None, variant=None):
+    # Runs on the I/O thread. The signature is taken first so a write racing
+    # the read shows up as a new signature on the next watch tick
+    signature = config_core.file_signature(path)
+    if signature is None or signature == known_signature:
+        return None
+    with tracing.span('editor.read', path=path):
+        config = config_core.load_config(path)
+        return config, signature, _field_values(config, variant)
+
+
+def _read_if_changed(path, known_signature, variant=None):
+    try:
+        return _read_config(path, known_signature, variant)
+    except (OSError, TypeError, ValueError):
+        # Half-written or invalid file: keep the old signature and retry on the next tick
+        return None
+
+
+def _sync_project(path, config, dry_run=False):
+    root = os.path.dirname(os.path.abspath(path))
+    return [os.path.basename(p) for p in config_export.sync_project(config, root, dry_run)]
+
+
+def _write_config(path, config, expected_signature, variant=None):
+    with tracing.span('editor.write', path=path):
+        current = config_core.file_signature(path)
+        if current is not None and current != expected_signature:
+            return 'changed', _read_if_changed(path, expected_signature, variant)
+        written = config_core.save_config(path, config)
+        synced = _sync_project(path, config)
+        return 'saved', (written, config_core.file_signature(path), _field_values(config, variant), synced)
+
+
+INT_FIELD_DEFAULTS = {
+    "versionCode": "1",
+    "android.minSdkVersion": "24",
+    "android.targetSdkVersion": "34",
+}
 
 class AppConfigEditor:
     def __init__(self, root):
@@ -11,32 +83,24 @@ class AppConfigEditor:
         self.root.minsize(560, 580)
         self.root.resizable(False, False)
         
-        self.config_path = "app.config.json"
+        self.config_path = config_core.DEFAULT_CONFIG_PATH
         self.config = {}
         
-        self.default_permissions = [
-            "android.permission.INTERNET",
-            "android.permission.ACCESS_NETWORK_STATE",
-            "android.permission.CAMERA",
-            "android.permission.READ_EXTERNAL_STORAGE",
-            "android.permission.WRITE_EXTERNAL_STORAGE",
-            "android.permission.ACCESS_FINE_LOCATION",
-            "android.permission.ACCESS_COARSE_LOCATION",
-            "android.permission.RECORD_AUDIO",
-            "android.permission.READ_CONTACTS",
-            "android.permission.WRITE_CONTACTS",
-            "android.permission.VIBRATE",
-            "android.permission.FOREGROUND_SERVICE",
-            "android.permission.RECEIVE_BOOT_COMPLETED",
-            "android.permission.SCHEDULE_EXACT_ALARM",
-            "android.permission.READ_PHONE_STATE",
-            "android.permission.BLUETOOTH",
-            "android.permission.NFC",
-        ]
+        self.catalog = permission_catalog.PermissionCatalog.load()
+        
+        self.selected_permissions = {}
+        self.perm_results = ListModel()
+        self.custom_permissions = ListModel()
+        self.deep_link_paths = ListModel()
+        self.path_router = None
         
-        self.permission_vars = {}
-        self.custom_permissions = []
-        self.deep_link_paths = []
+        self.baseline = {}
+        self.file_signature = None
+        self.variant = None
+        self.variants_dirty = False
+        self.worker = io_worker.IOWorker(root)
+        self.validation_pending = False
+        self.issues = []
         
         self.compile_var = tk.BooleanVar(value=True)
         self.emulator_var = tk.BooleanVar(value=False)
@@ -44,7 +108,29 @@ class AppConfigEditor:
         
         self.style_widgets()
         self.create_widgets()
+        self.field_widgets = {
+            "appId": self.app_id,
+            "appName": self.app_name,
+            "version": self.version,
+            "versionCode": self.version_code,
+            "android.minSdkVersion": self.min_sdk,
+            "android.targetSdkVersion": self.target_sdk,
+            "deepLinks.enabled": self.deeplinks_enabled_var,
+            "deepLinks.scheme": self.dl_scheme,
+            "deepLinks.host": self.dl_host,
+            "build.compile": self.compile_var,
+            "build.emulator": self.emulator_var,
+        }
+        for widget in self.field_widgets.values():
+            if isinstance(widget, tk.Variable):
+                widget.trace_add('write', lambda *args: self.schedule_validation())
+            else:
+                widget.bind('<KeyRelease>', lambda e: self.schedule_validation(), add='+')
+        for model in (self.custom_permissions, self.deep_link_paths):
+            model.subscribe(lambda *args: self.schedule_validation())
+        
         self.load_config()
+        self.root.after(WATCH_INTERVAL_MS, self.watch_config_file)
     
     def style_widgets(self):
         style = ttk.Style()
@@ -69,6 +155,7 @@ class AppConfigEditor:
         style.configure('Path.TLabel', foreground='#1976D2', font=('Segoe UI', 8))
         
         style.configure('Small.TButton', font=('Segoe UI', 8), padding=[5, 2])
+        style.configure('Invalid.TEntry', fieldbackground='#ffebee')
     
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding="10")
@@ -79,6 +166,14 @@ class AppConfigEditor:
         ttk.Label(header, text="AppForge", style='Header.TLabel').pack(side=tk.LEFT)
         ttk.Label(header, text="Config Editor", style='Info.TLabel').pack(side=tk.LEFT, padx=(8, 0), pady=(6, 0))
         
+        self.variant_var = tk.StringVar(value=BASE_VARIANT)
+        ttk.Button(header, text="x", command=self.remove_variant, style='Small.TButton', width=3).pack(side=tk.RIGHT, pady=(4, 0))
+        self.variant_box = ttk.Combobox(header, textvariable=self.variant_var, state='readonly', width=18,
+                                        values=[BASE_VARIANT, NEW_VARIANT])
+        self.variant_box.pack(side=tk.RIGHT, padx=(5, 2), pady=(4, 0))
+        self.variant_box.bind('<<ComboboxSelected>>', lambda e: self.select_variant(self.variant_var.get()))
+        ttk.Label(header, text="Variante:", style='Info.TLabel').pack(side=tk.RIGHT, pady=(4, 0))
+        
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
@@ -139,29 +234,17 @@ class AppConfigEditor:
         ttk.Button(btn_row, text="Ninguno", command=self.deselect_all_perms, style='Small.TButton').pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_row, text="Comunes", command=self.select_common_perms, style='Small.TButton').pack(side=tk.LEFT, padx=2)
         
-        perms_container = ttk.Frame(frame)
-        perms_container.pack(fill=tk.BOTH, expand=True)
+        self.perm_search_var = tk.StringVar()
+        self.perm_search_var.trace_add('write', lambda *args: self.filter_permissions())
+        self.perm_count_var = tk.StringVar()
         
-        canvas = tk.Canvas(perms_container, bg='#f5f5f5', highlightthickness=0, height=140)
-        scrollbar = ttk.Scrollbar(perms_container, orient="vertical", command=canvas.yview)
-        scrollable = ttk.Frame(canvas)
+        ttk.Label(btn_row, textvariable=self.perm_count_var, style='Info.TLabel').pack(side=tk.RIGHT, padx=2)
+        ttk.Entry(btn_row, textvariable=self.perm_search_var, width=18).pack(side=tk.RIGHT, padx=2)
+        ttk.Label(btn_row, text="Buscar:").pack(side=tk.RIGHT, padx=(10, 2))
         
-        scrollable.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scrollable, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        for perm in self.default_permissions:
-            name = perm.replace("android.permission.", "")
-            var = tk.BooleanVar(value=False)
-            self.permission_vars[perm] = var
-            
-            row = ttk.Frame(scrollable)
-            row.pack(fill=tk.X, pady=1)
-            ttk.Checkbutton(row, variable=var).pack(side=tk.LEFT)
-            ttk.Label(row, text=name, width=22, anchor=tk.W).pack(side=tk.LEFT, padx=(5, 0))
-        
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.perm_list = VirtualList(frame, self.perm_results, self.make_permission_row, self.fill_permission_row)
+        self.perm_list.pack(fill=tk.BOTH, expand=True)
+        self.filter_permissions()
         
         ttk.Separator(frame, orient='horizontal').pack(fill=tk.X, pady=6)
         
@@ -177,8 +260,55 @@ class AppConfigEditor:
         self.custom_perm_entry.insert(0, "android.permission.")
         ttk.Button(custom_input, text="+", command=self.add_custom_permission, style='Small.TButton').pack(side=tk.LEFT, padx=5)
         
-        self.custom_perms_list = ttk.Frame(custom_frame)
-        self.custom_perms_list.pack(fill=tk.X, pady=(5, 0))
+        self.custom_count_var = tk.StringVar(value="Agregados: 0")
+        ttk.Label(custom_frame, textvariable=self.custom_count_var, style='Info.TLabel').pack(anchor=tk.W, pady=(5, 0))
+        self.custom_permissions.subscribe(
+            lambda *args: self.custom_count_var.set(f"Agregados: {len(self.custom_permissions)}"))
+        VirtualList(custom_frame, self.custom_permissions,
+                    lambda parent: self.make_removable_row(parent, 'Success.TLabel', self.remove_custom_permission),
+                    self.fill_removable_row, height=66).pack(fill=tk.X)
+    
+    def make_permission_row(self, parent):
+        var = tk.BooleanVar(value=False)
+        row = {'var': var, 'frame': ttk.Frame(parent)}
+        ttk.Checkbutton(row['frame'], variable=var, command=lambda: self.toggle_permission(row)).pack(side=tk.LEFT)
+        row['name'] = ttk.Label(row['frame'], width=34, anchor=tk.W)
+        row['name'].pack(side=tk.LEFT, padx=(5, 0))
+        row['info'] = ttk.Label(row['frame'], style='Info.TLabel')
+        row['info'].pack(side=tk.LEFT)
+        return row
+    
+    def fill_permission_row(self, row, index):
+        perm = self.catalog.entries[index]
+        row['perm'] = perm.name
+        row['var'].set(perm.name in self.selected_permissions)
+        row['name'].configure(text=perm.short)
+        row['info'].configure(text=permission_catalog.describe(perm),
+                              style='Warning.TLabel' if perm.protection == 'dangerous' else 'Info.TLabel')
+    
+    def make_removable_row(self, parent, style, on_remove):
+        row = {'frame': ttk.Frame(parent)}
+        row['label'] = ttk.Label(row['frame'], style=style)
+        row['label'].pack(side=tk.LEFT)
+        ttk.Button(row['frame'], text="x", command=lambda: on_remove(row['value']), style='Small.TButton', width=3).pack(side=tk.RIGHT, padx=(0, 4))
+        return row
+    
+    def fill_removable_row(self, row, value):
+        row['label'].configure(text=value)
+    
+    @tracing.traced('editor.filter_permissions')
+    def filter_permissions(self):
+        self.perm_results.replace(self.catalog.search(self.perm_search_var.get()))
+        self.perm_count_var.set(f"{len(self.perm_results)}/{len(self.catalog)}")
+    
+    def toggle_permission(self, row):
+        if row['value'] is None:
+            return
+        if row['var'].get():
+            self.selected_permissions[row['perm']] = True
+        else:
+            self.selected_permissions.pop(row['perm'], None)
+        self.schedule_validation()
     
     def create_build_tab(self):
         frame = ttk.Frame(self.notebook, padding="8")
@@ -231,9 +361,15 @@ class AppConfigEditor:
         self.path_entry.insert(0, "/producto/:id")
         ttk.Button(path_input, text="+", command=self.add_path, style='Small.TButton').pack(side=tk.LEFT, padx=3)
         ttk.Button(path_input, text="Ejs", command=self.show_path_examples, style='Small.TButton').pack(side=tk.LEFT, padx=2)
+        ttk.Button(path_input, text="Pegar", command=self.show_bulk_paths, style='Small.TButton').pack(side=tk.LEFT, padx=2)
         
-        self.paths_list_frame = ttk.Frame(paths_card)
-        self.paths_list_frame.pack(fill=tk.X, pady=(5, 0))
+        self.paths_count_var = tk.StringVar(value="Rutas configuradas: 0")
+        ttk.Label(paths_card, textvariable=self.paths_count_var, style='Info.TLabel').pack(anchor=tk.W, pady=(5, 0))
+        self.deep_link_paths.subscribe(
+            lambda *args: self.paths_count_var.set(f"Rutas configuradas: {len(self.deep_link_paths)}"))
+        VirtualList(paths_card, self.deep_link_paths,
+                    lambda parent: self.make_removable_row(parent, 'Path.TLabel', self.remove_path),
+                    self.fill_removable_row, height=88).pack(fill=tk.X)
         
         ttk.Separator(frame, orient='horizontal').pack(fill=tk.X, pady=6)
         
@@ -254,51 +390,84 @@ class AppConfigEditor:
     
     def add_custom_permission(self):
         perm = self.custom_perm_entry.get().strip()
-        if perm and perm not in self.custom_permissions and perm != "android.permission.":
+        if perm in self.catalog:
+            self.selected_permissions[perm] = True
+            self.perm_list.render(force=True)
+            self.status_var.set(f"{permission_catalog.short_name(perm)} marcado en la lista")
+        elif perm and perm != "android.permission." and perm not in self.custom_permissions:
             self.custom_permissions.append(perm)
-            self.refresh_custom_perms_list()
-            self.custom_perm_entry.delete(0, tk.END)
-            self.custom_perm_entry.insert(0, "android.permission.")
+        else:
+            return
+        self.custom_perm_entry.delete(0, tk.END)
+        self.custom_perm_entry.insert(0, "android.permission.")
     
     def remove_custom_permission(self, perm):
-        if perm in self.custom_permissions:
-            self.custom_permissions.remove(perm)
-            self.refresh_custom_perms_list()
-    
-    def refresh_custom_perms_list(self):
-        for widget in self.custom_perms_list.winfo_children():
-            widget.destroy()
-        
-        if self.custom_permissions:
-            ttk.Label(self.custom_perms_list, text="Agregados:", style='Info.TLabel').pack(anchor=tk.W)
-            for perm in self.custom_permissions:
-                row = ttk.Frame(self.custom_perms_list)
-                row.pack(fill=tk.X, pady=2)
-                ttk.Label(row, text=perm, style='Success.TLabel').pack(side=tk.LEFT)
-                ttk.Button(row, text="x", command=lambda p=perm: self.remove_custom_permission(p), style='Small.TButton', width=3).pack(side=tk.RIGHT)
+        self.custom_permissions.remove(perm)
+    
+    def get_path_router(self):
+        # Built lazily; removals invalidate it since the trie only grows
+        if self.path_router is None:
+            self.path_router = deeplink_router.Router(list(self.deep_link_paths), check_overlaps=False)
+        return self.path_router
     
+    @tracing.traced('editor.add_path')
     def add_path(self):
         path = self.path_entry.get().strip()
         if path and path not in self.deep_link_paths:
+            router = self.get_path_router()
+            index = router.add(path)
+            if index is None:
+                messagebox.showwarning("Ruta invalida", router.errors[-1])
+                return
             self.deep_link_paths.append(path)
-            self.refresh_paths_list()
+            overlaps = router.overlaps(index)
+            self.status_var.set(router.overlap_warning(index, overlaps[0]) if overlaps else "Listo")
     
+    @tracing.traced('editor.remove_path')
     def remove_path(self, path):
-        if path in self.deep_link_paths:
-            self.deep_link_paths.remove(path)
-            self.refresh_paths_list()
-    
-    def refresh_paths_list(self):
-        for widget in self.paths_list_frame.winfo_children():
-            widget.destroy()
-        
-        if self.deep_link_paths:
-            ttk.Label(self.paths_list_frame, text="Rutas configuradas:", style='Info.TLabel').pack(anchor=tk.W)
-            for path in self.deep_link_paths:
-                row = ttk.Frame(self.paths_list_frame)
-                row.pack(fill=tk.X, pady=2)
-                ttk.Label(row, text=path, style='Path.TLabel').pack(side=tk.LEFT)
-                ttk.Button(row, text="x", command=lambda p=path: self.remove_path(p), style='Small.TButton', width=3).pack(side=tk.RIGHT)
+        if self.deep_link_paths.remove(path):
+            self.path_router = None
+    
+    def import_paths(self, text):
+        with tracing.span('editor.import_paths') as span:
+            router = self.get_path_router()
+            accepted, rejected = [], []
+            seen = set(self.deep_link_paths)
+            for path in parse_bulk(text):
+                if path in seen:
+                    continue
+                seen.add(path)
+                if router.add(path) is None:
+                    rejected.append(router.errors[-1])
+                else:
+                    accepted.append(path)
+            self.deep_link_paths.extend(accepted)
+        self.status_var.set(f"{len(accepted)} rutas importadas, {len(rejected)} rechazadas en {span.ms:.0f} ms")
+        if rejected:
+            extra = f"\n... y {len(rejected) - 10} mas" if len(rejected) > 10 else ""
+            messagebox.showwarning("Rutas rechazadas", "\n".join(rejected[:10]) + extra)
+    
+    def show_bulk_paths(self):
+        win = tk.Toplevel(self.root)
+        win.title("Importar Paths")
+        win.geometry("360x300")
+        win.transient(self.root)
+        
+        ttk.Label(win, text="Un path por linea (o separados por comas):", style='Info.TLabel').pack(anchor=tk.W, padx=10, pady=(10, 4))
+        text = tk.Text(win, height=12, width=40, font=('Consolas', 9))
+        text.pack(fill=tk.BOTH, expand=True, padx=10)
+        try:
+            clipboard = self.root.clipboard_get()
+            if '/' in clipboard:
+                text.insert('1.0', clipboard)
+        except tk.TclError:
+            pass
+        
+        def do_import():
+            self.import_paths(text.get('1.0', tk.END))
+            win.destroy()
+        
+        ttk.Button(win, text="Importar", command=do_import).pack(pady=8)
     
     def show_path_examples(self):
         examples = [
@@ -329,25 +498,26 @@ class AppConfigEditor:
         self.path_entry.insert(0, path)
         win.destroy()
     
+    @tracing.traced('editor.select_all_perms')
     def select_all_perms(self):
-        for var in self.permission_vars.values():
-            var.set(True)
+        for index in self.perm_results:
+            self.selected_permissions[self.catalog.entries[index].name] = True
+        self.perm_list.render(force=True)
+        self.schedule_validation()
     
+    @tracing.traced('editor.deselect_all_perms')
     def deselect_all_perms(self):
-        for var in self.permission_vars.values():
-            var.set(False)
+        for index in self.perm_results:
+            self.selected_permissions.pop(self.catalog.entries[index].name, None)
+        self.perm_list.render(force=True)
+        self.schedule_validation()
     
     def select_common_perms(self):
-        self.deselect_all_perms()
-        common = [
-            "android.permission.INTERNET",
-            "android.permission.ACCESS_NETWORK_STATE",
-            "android.permission.CAMERA",
-        ]
-        for perm in common:
-            if perm in self.permission_vars:
-                self.permission_vars[perm].set(True)
+        self.selected_permissions = {perm: True for perm in config_core.COMMON_PERMISSIONS}
+        self.perm_list.render(force=True)
+        self.schedule_validation()
     
+    @tracing.traced('editor.open_file')
     def open_file(self):
         file_path = filedialog.askopenfilename(
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
@@ -357,125 +527,359 @@ class AppConfigEditor:
             self.config_path = file_path
             self.load_config()
     
+    def read_field(self, key):
+        if key == "android.permissions":
+            return list(self.selected_permissions) + list(self.custom_permissions)
+        if key == "deepLinks.paths":
+            return list(self.deep_link_paths)
+        widget = self.field_widgets[key]
+        if isinstance(widget, tk.Variable):
+            return widget.get()
+        text = widget.get().strip()
+        if key in INT_FIELD_DEFAULTS:
+            try:
+                return int(text or INT_FIELD_DEFAULTS[key])
+            except ValueError:
+                return text
+        return text
+    
+    def write_field(self, key, value):
+        if key == "android.permissions":
+            self.selected_permissions = {p: True for p in value if p in self.catalog}
+            self.perm_list.render(force=True)
+            self.schedule_validation()
+            self.custom_permissions.replace(p for p in value if p not in self.catalog)
+        elif key == "deepLinks.paths":
+            self.deep_link_paths.replace(value)
+            self.path_router = None
+        else:
+            widget = self.field_widgets[key]
+            if isinstance(widget, tk.Variable):
+                widget.set(value)
+            else:
+                # Shared fields are disabled while a variant is shown but still follow the file
+                disabled = widget.instate(['disabled'])
+                widget.state(['!disabled'])
+                widget.delete(0, tk.END)
+                widget.insert(0, str(value))
+                if disabled:
+                    widget.state(['disabled'])
+    
+    def field_dirty(self, key):
+        value = self.read_field(key)
+        if key == "android.permissions":
+            # Order is not meaningful; an unchanged set keeps the file's order on save
+            return sorted(value) != sorted(self.baseline.get(key, []))
+        return value != self.baseline.get(key)
+    
+    def dirty_fields(self):
+        return [key for key in config_core.EDITOR_FIELDS if self.field_dirty(key)]
+    
+    def variant_label(self, variant=None):
+        return "/".join(variant) if variant else BASE_VARIANT
+    
+    def refresh_variants(self):
+        # Raw keys, not normalize_variants: a malformed variant must not break the
+        # selector, config_schema reports it
+        variants = self.config.get('variants')
+        variants = variants if isinstance(variants, dict) else {}
+        labels = [f"{dimension}/{name}" for dimension, values in variants.items()
+                  if isinstance(values, dict) for name in values]
+        self.variant_box.configure(values=[BASE_VARIANT] + labels + [NEW_VARIANT])
+        if self.variant:
+            try:
+                _variant_config(self.config, self.variant)
+            except (KeyError, TypeError, ValueError):
+                self.show_variant(None)
+        self.variant_var.set(self.variant_label(self.variant))
+    
+    def select_variant(self, label):
+        variant = None if label in (BASE_VARIANT, NEW_VARIANT) else tuple(label.split('/', 1))
+        self.variant_var.set(self.variant_label(self.variant))
+        if label != NEW_VARIANT and variant == self.variant:
+            return
+        if self.dirty_fields():
+            messagebox.showwarning("Cambios sin guardar", "Guarda los cambios antes de cambiar de variante")
+            return
+        if label == NEW_VARIANT:
+            self.create_variant()
+        else:
+            self.show_variant(variant)
+    
+    @tracing.traced('editor.show_variant')
+    def show_variant(self, variant):
+        # The tabs show the resolved variant; on save the edits are stored as
+        # overrides relative to the base. Fields shared by all variants are read-only
+        self.variant = variant
+        self.worker.cancel('watch')
+        self.baseline = _field_values(self.config, variant) if self.config else {}
+        for key, value in self.baseline.items():
+            if self.field_dirty(key):
+                self.write_field(key, value)
+        for key, widget in self.field_widgets.items():
+            if isinstance(widget, ttk.Entry) and key not in config_core.VARIANT_FIELDS:
+                widget.state(['disabled'] if variant else ['!disabled'])
+        self.variant_var.set(self.variant_label(variant))
+        self.schedule_validation()
+    
+    def create_variant(self):
+        text = simpledialog.askstring("Nueva variante", "Dimension/nombre (ej: entorno/dev):", parent=self.root)
+        if not text:
+            return
+        parts = [part.strip() for part in text.split('/')]
+        if len(parts) != 2 or not all(parts):
+            messagebox.showwarning("Variante", "Usa dimension/nombre, ej: entorno/dev o edicion/pro")
+            return
+        dimension, name = parts
+        variants = dict(self.config.get('variants', {}))
+        if name in variants.get(dimension, {}):
+            messagebox.showwarning("Variante", f"{dimension}/{name} ya existe")
+            return
+        variants[dimension] = {**variants.get(dimension, {}), name: {}}
+        self.config = {**self.config, 'variants': variants}
+        self.variants_dirty = True
+        self.refresh_variants()
+        self.show_variant((dimension, name))
+    
+    def remove_variant(self):
+        if self.variant is None:
+            self.status_var.set("Selecciona una variante para quitarla")
+            return
+        dimension, name = self.variant
+        if not messagebox.askyesno("Quitar variante", f"Quitar {dimension}/{name}? Se aplica al guardar."):
+            return
+        variants = dict(self.config.get('variants', {}))
+        values = {key: value for key, value in variants.get(dimension, {}).items() if key != name}
+        if values:
+            variants[dimension] = values
+        else:
+            variants.pop(dimension, None)
+        self.config = {**self.config, 'variants': variants}
+        self.variants_dirty = True
+        self.show_variant(None)
+        self.refresh_variants()
+    
     def load_config(self):
+        # Reading and parsing run on the I/O thread; a newer load or a file
+        # switch drops any save or watch result still in flight for the old one
+        path, variant = self.config_path, self.variant
+        started = time.perf_counter()
+        self.worker.cancel('save')
+        self.worker.cancel('watch')
+        self.status_var.set(f"Cargando {os.path.basename(path)}...")
+        self.worker.submit('load', lambda: _read_config(path, None, variant),
+                           lambda result: self.apply_loaded(path, result, started),
+                           lambda e: self.report_error("Error al cargar", e))
+    
+    @tracing.traced('editor.apply_load')
+    def apply_loaded(self, path, result, started):
+        if result is None:
+            self.status_var.set(f"No existe {path}")
+            return
+        self.config, self.file_signature, self.baseline = result
+        self.variants_dirty = False
+        for key, value in self.baseline.items():
+            if self.field_dirty(key):
+                self.write_field(key, value)
+        self.refresh_variants()
+        self.schedule_validation()
+        self.status_var.set(f"Cargado en {(time.perf_counter() - started) * 1000:.0f} ms")
+    
+    def report_error(self, title, error):
+        self.status_var.set(f"{title}: {error}")
+        messagebox.showerror("Error", f"{title}: {error}")
+    
+    def watch_config_file(self):
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                
-                self.app_id.delete(0, tk.END)
-                self.app_id.insert(0, self.config.get('appId', ''))
-                
-                self.app_name.delete(0, tk.END)
-                self.app_name.insert(0, self.config.get('appName', ''))
-                
-                self.version.delete(0, tk.END)
-                self.version.insert(0, self.config.get('version', ''))
-                
-                self.version_code.delete(0, tk.END)
-                self.version_code.insert(0, str(self.config.get('versionCode', 1)))
-                
-                android = self.config.get('android', {})
-                self.min_sdk.delete(0, tk.END)
-                self.min_sdk.insert(0, str(android.get('minSdkVersion', 24)))
-                
-                self.target_sdk.delete(0, tk.END)
-                self.target_sdk.insert(0, str(android.get('targetSdkVersion', 34)))
-                
-                permissions = android.get('permissions', [])
-                for perm in self.permission_vars:
-                    self.permission_vars[perm].set(perm in permissions)
-                
-                self.custom_permissions = [p for p in permissions if p not in self.permission_vars]
-                self.refresh_custom_perms_list()
-                
-                build = self.config.get('build', {})
-                self.compile_var.set(build.get('compile', True))
-                self.emulator_var.set(build.get('emulator', False))
-                
-                deeplinks = self.config.get('deepLinks', {})
-                self.deeplinks_enabled_var.set(deeplinks.get('enabled', False))
-                
-                self.dl_scheme.delete(0, tk.END)
-                self.dl_scheme.insert(0, deeplinks.get('scheme', 'miapp'))
-                
-                self.dl_host.delete(0, tk.END)
-                self.dl_host.insert(0, deeplinks.get('host', ''))
-                
-                self.deep_link_paths = deeplinks.get('paths', [])
-                self.refresh_paths_list()
-                
-                self.status_var.set(f"Cargado")
-            else:
-                messagebox.showwarning("Aviso", f"No existe {self.config_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar: {str(e)}")
+            if not self.worker.busy('load', 'save', 'watch'):
+                path, known, variant = self.config_path, self.file_signature, self.variant
+                self.worker.submit('watch', lambda: _read_if_changed(path, known, variant), self.apply_external_changes,
+                                   lambda e: self.status_var.set(f"No se pudo leer {os.path.basename(path)}: {e}"))
+        finally:
+            self.root.after(WATCH_INTERVAL_MS, self.watch_config_file)
+    
+    @tracing.traced('editor.apply_external_changes')
+    def apply_external_changes(self, result):
+        if result is None:
+            return []
+        config, signature, disk = result
+        
+        applied, conflicts = [], []
+        for key, value in disk.items():
+            if value == self.baseline.get(key):
+                continue
+            if not self.field_dirty(key):
+                self.write_field(key, value)
+                applied.append(key)
+            elif self.read_field(key) != value:
+                conflicts.append(key)
+        
+        if self.variants_dirty:
+            # Unsaved variant additions/removals win over the file, like edited fields do
+            config = {**config, 'variants': self.config.get('variants', {})}
+        self.config = config
+        self.baseline = disk
+        self.file_signature = signature
+        self.refresh_variants()
+        self.schedule_validation()
+        
+        if conflicts:
+            self.status_var.set(f"Cambiado fuera del editor, se mantiene tu valor: {', '.join(conflicts)}")
+        elif applied:
+            self.status_var.set(f"Actualizado desde disco: {', '.join(applied)}")
+        return conflicts
+    
+    def shown_config(self):
+        return _variant_config(self.config, self.variant) if self.variant else self.config
+    
+    def build_config(self, dirty):
+        # Sections are copied so overlaying the edited fields never touches self.config;
+        # with a variant selected this is the resolved variant, not the file
+        shown = self.shown_config()
+        config = dict(shown)
+        for section in ('android', 'deepLinks', 'build'):
+            config[section] = dict(shown.get(section, {}))
+        for key in dirty:
+            config_core.set_value(config, key, self.read_field(key))
+        if "android.targetSdkVersion" in dirty:
+            config['android']['compileSdkVersion'] = config['android']['targetSdkVersion']
+        return config
+    
+    def schedule_validation(self):
+        if not self.validation_pending:
+            self.validation_pending = True
+            self.root.after_idle(self.run_validation)
+    
+    @tracing.traced('editor.validate')
+    def run_validation(self):
+        self.validation_pending = False
+        issues = config_schema.validate(self.build_config(self.dirty_fields()))
+        if issues == self.issues:
+            return
+        self.issues = issues
+        
+        invalid = {issue.path.split('[')[0] for issue in config_schema.errors_only(issues)}
+        for key, widget in self.field_widgets.items():
+            if isinstance(widget, ttk.Entry):
+                widget.configure(style='Invalid.TEntry' if key in invalid else 'TEntry')
+        
+        errors = config_schema.errors_only(issues)
+        if errors:
+            extra = f" (+{len(errors) - 1})" if len(errors) > 1 else ""
+            self.status_var.set(f"{config_schema.format_issue(errors[0])}{extra}")
+        elif issues:
+            self.status_var.set(f"Aviso: {config_schema.format_issue(issues[0])}")
+        else:
+            self.status_var.set("Configuracion valida")
     
     def save_config(self):
         try:
-            permissions = [perm for perm, var in self.permission_vars.items() if var.get()]
-            permissions.extend(self.custom_permissions)
+            dirty = self.dirty_fields()
+            path = self.config_path
+            if not dirty and not self.variants_dirty and self.file_signature is not None:
+                config = self.config
+                self.worker.submit('save', lambda: _sync_project(path, config), self.apply_synced,
+                                   lambda e: self.report_error("Error al guardar", e))
+                return
             
-            config = {
-                "appId": self.app_id.get().strip(),
-                "appName": self.app_name.get().strip(),
-                "version": self.version.get().strip(),
-                "versionCode": int(self.version_code.get().strip() or "1"),
-                "description": self.config.get('description', ''),
-                "author": self.config.get('author', {"name": "", "email": "", "url": ""}),
-                "android": {
-                    "minSdkVersion": int(self.min_sdk.get().strip() or "24"),
-                    "targetSdkVersion": int(self.target_sdk.get().strip() or "34"),
-                    "compileSdkVersion": int(self.target_sdk.get().strip() or "34"),
-                    "permissions": permissions
-                },
-                "deepLinks": {
-                    "enabled": self.deeplinks_enabled_var.get(),
-                    "scheme": self.dl_scheme.get().strip(),
-                    "host": self.dl_host.get().strip(),
-                    "paths": self.deep_link_paths
-                },
-                "build": {
-                    "compile": self.compile_var.get(),
-                    "emulator": self.emulator_var.get()
-                }
-            }
-            
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            
-            self.status_var.set("Guardado")
-            messagebox.showinfo("OK", "Configuracion guardada")
+            config = self.build_config(dirty)
+            if self.variant:
+                shared = [key for key in dirty if key not in config_core.VARIANT_FIELDS]
+                if shared:
+                    messagebox.showerror("Variante", "Estos campos son comunes a todas las variantes; "
+                                                     f"editalos en Base: {', '.join(shared)}")
+                    return
+                try:
+                    overrides = config_core.variant_overrides(self.config, config)
+                except ValueError as e:
+                    messagebox.showerror("Variante", str(e))
+                    return
+                dimension, name = self.variant
+                variants = dict(self.config.get('variants', {}))
+                variants[dimension] = {**variants.get(dimension, {}), name: overrides}
+                config = {**self.config, 'variants': variants}
+            errors = config_schema.errors_only(config_schema.validate(config))
+            if errors:
+                details = "\n".join(config_schema.format_issue(issue) for issue in errors[:10])
+                messagebox.showerror("Configuracion invalida", details)
+                return
+            config = config_core.normalize_config(config)
         except ValueError:
             messagebox.showerror("Error", "Version Code y SDK deben ser numeros")
+            return
         except Exception as e:
-            messagebox.showerror("Error", f"Error al guardar: {str(e)}")
+            self.report_error("Error al guardar", e)
+            return
+        
+        expected, variant = self.file_signature, self.variant
+        if self.variants_dirty:
+            dirty = dirty + ['variants']
+        started = time.perf_counter()
+        self.worker.cancel('watch')
+        self.status_var.set("Guardando...")
+        self.worker.submit('save', lambda: _write_config(path, config, expected, variant),
+                           lambda result: self.apply_saved(config, dirty, result, started),
+                           lambda e: self.report_error("Error al guardar", e))
+    
+    def apply_synced(self, synced):
+        self.status_var.set(f"Sincronizado: {', '.join(synced)}" if synced else "Sin cambios")
     
+    @tracing.traced('editor.apply_save')
+    def apply_saved(self, config, dirty, result, started):
+        status, payload = result
+        if status == 'changed':
+            # Someone else wrote the file since we loaded it: merge instead of overwriting
+            self.apply_external_changes(payload)
+            self.status_var.set("El archivo cambio en disco; revisa los cambios y guarda de nuevo")
+            return
+        written, self.file_signature, self.baseline, synced = payload
+        self.config = config
+        self.variants_dirty = False
+        self.refresh_variants()
+        if written or synced:
+            self.status_var.set(f"Guardado en {(time.perf_counter() - started) * 1000:.0f} ms: "
+                                f"{', '.join(dirty + synced)}")
+        else:
+            self.status_var.set("Sin cambios")
+    
+    @tracing.traced('editor.increment_version')
     def increment_version(self):
+        if self.variant:
+            self.status_var.set("La version es comun a todas las variantes; cambiala en Base")
+            return
         try:
             version = self.version.get().strip()
             parts = version.split('.')
             
             if len(parts) >= 3:
-                parts[2] = str(int(parts[2]) + 1)
-                new_version = '.'.join(parts)
+                new_version, new_code = config_core.bump_version(version, self.version_code.get().strip() or "1")
                 
                 self.version.delete(0, tk.END)
                 self.version.insert(0, new_version)
                 
-                current_code = int(self.version_code.get().strip() or "1")
                 self.version_code.delete(0, tk.END)
-                self.version_code.insert(0, str(current_code + 1))
+                self.version_code.insert(0, str(new_code))
                 
                 self.status_var.set(f"v{new_version}")
+                path, config = self.config_path, {**self.config, 'version': new_version}
+                self.worker.submit('bump', lambda: _sync_project(path, config, dry_run=True),
+                                   lambda pending: self.status_var.set(
+                                       f"v{new_version} (al guardar se actualiza {', '.join(pending)})"
+                                       if pending else f"v{new_version}"),
+                                   lambda e: None)
             else:
                 messagebox.showwarning("Formato", "La version debe ser x.x.x")
         except ValueError:
             messagebox.showerror("Error", "No se pudo incrementar")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="config_editor.py", description="Editor visual de app.config.json")
+    tracing.add_argument(parser)
+    tracing.configure(parser.parse_args(argv))
+    
     root = tk.Tk()
-    AppConfigEditor(root)
+    with tracing.span('editor.startup'):
+        AppConfigEditor(root)
     root.mainloop()
 
 if __name__ == "__main__":
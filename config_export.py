@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import re
+import shlex
+import sys
+
+import config_core
+import tracing
+
+CAPACITOR_CONFIG = "capacitor.config.json"
+PACKAGE_JSON = "package.json"
+
+FORMATS = ('github', 'env', 'json')
+
+_SLUG = re.compile(r'[^a-z0-9]+')
+
+
+def package_name(config):
+    name = _SLUG.sub('-', config['appName'].lower()).strip('-')
+    if not name:
+        name = config['appId'].rsplit('.', 1)[-1].lower() or 'app'
+    return name[:214]
+
+
+def derived_values(config):
+    config = config_core.normalize_config(config)
+    android = config['android']
+    deeplinks = config['deepLinks']
+    return {
+        'appId': config['appId'],
+        'appName': config['appName'],
+        'version': config['version'],
+        'versionCode': config['versionCode'],
+        'minSdk': android['minSdkVersion'],
+        'targetSdk': android['targetSdkVersion'],
+        'compileSdk': android['compileSdkVersion'],
+        'permissionCount': len(android['permissions']),
+        'deepLinks': deeplinks['enabled'],
+        'deepLinkScheme': deeplinks['scheme'],
+        'deepLinkHost': deeplinks['host'],
+        'compile': config['build']['compile'],
+        'runEmulator': config['build']['emulator'],
+        'packageName': package_name(config),
+        'apkName': f"{config['appName']}-v{config['version']}".replace(' ', '-'),
+    }
+
+
+def _text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def env_name(key):
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', key).upper()
+
+
+def format_values(values, fmt):
+    if fmt == 'json':
+        return json.dumps(values, indent=2, ensure_ascii=False) + "\n"
+    lines = []
+    for key, value in values.items():
+        text = _text(value)
+        if fmt == 'env':
+            lines.append(f"{env_name(key)}={shlex.quote(text)}")
+        elif "\n" in text:
+            lines.append(f"{key}<<APPFORGE_EOF\n{text}\nAPPFORGE_EOF")
+        else:
+            lines.append(f"{key}={text}")
+    return "\n".join(lines) + "\n"
+
+
+def _updated_json(path, updates):
+    try:
+        with open(path, 'rb') as f:
+            current = f.read()
+    except FileNotFoundError:
+        return None, None
+    data = json.loads(current.decode('utf-8'))
+    for key, value in updates.items():
+        data[key] = value
+    # Keep the file's own trailing-newline convention so untouched files stay byte-identical
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if current.endswith(b"\n"):
+        text += "\n"
+    return current, text.encode('utf-8')
+
+
+def project_updates(config):
+    values = derived_values(config)
+    return {
+        CAPACITOR_CONFIG: {'appId': values['appId'], 'appName': values['appName']},
+        PACKAGE_JSON: {'name': values['packageName'], 'version': values['version'],
+                       'displayName': values['appName']},
+    }
+
+
+def project_files(config, root='.'):
+    # {name: (current bytes, synced bytes)} for the project files present under root
+    files = {}
+    for name, updates in project_updates(config).items():
+        current, data = _updated_json(os.path.join(root, name), updates)
+        if data is not None:
+            files[name] = (current, data)
+    return files
+
+
+@tracing.traced('export.sync')
+def sync_project(config, root='.', dry_run=False):
+    # Every file is computed before anything is written; if a write fails the
+    # ones already replaced are restored, so the project never ends up half synced
+    pending = [(os.path.join(root, name), current, data)
+               for name, (current, data) in project_files(config, root).items() if data != current]
+    if dry_run:
+        return [path for path, _, _ in pending]
+
+    written = []
+    try:
+        for path, current, data in pending:
+            config_core.atomic_write(path, data)
+            written.append((path, current))
+    except BaseException:
+        for path, current in written:
+            config_core.atomic_write(path, current)
+        raise
+    return [path for path, _ in written]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="config_export.py",
+        description="Lee app.config.json una sola vez, exporta los valores derivados del build y sincroniza "
+                    "capacitor.config.json y package.json."
+    )
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH, help="Config de la app")
+    parser.add_argument('--format', choices=FORMATS, default='json', help="Formato de salida (por defecto: json)")
+    parser.add_argument('--out', help="Escribe los valores en este archivo en vez de stdout")
+    parser.add_argument('--github-output', action='store_true',
+                        help="Agrega lineas clave=valor a $GITHUB_OUTPUT")
+    parser.add_argument('--sync', action='store_true',
+                        help="Actualiza capacitor.config.json y package.json desde la config")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit 1 si capacitor.config.json o package.json no estan sincronizados")
+    parser.add_argument('--root', default=None, help="Raiz del proyecto (por defecto: el directorio de la config)")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    try:
+        config = config_core.load_config(opts.config)
+    except (OSError, ValueError) as e:
+        print(f"{opts.config}: ERROR {e}", file=sys.stderr)
+        return 1
+    root = opts.root or os.path.dirname(os.path.abspath(opts.config))
+    values = derived_values(config)
+
+    if opts.check:
+        stale = sync_project(config, root, dry_run=True)
+        for path in stale:
+            print(f"sin sincronizar: {os.path.relpath(path)}", file=sys.stderr)
+        if stale:
+            return 1
+    if opts.sync:
+        changed = sync_project(config, root)
+        print(f"Sincronizado: {', '.join(os.path.relpath(p) for p in changed)}" if changed else "Archivos del proyecto al dia",
+              file=sys.stderr)
+
+    if opts.github_output:
+        output = os.environ.get('GITHUB_OUTPUT')
+        if not output:
+            print("ERROR GITHUB_OUTPUT no esta definido", file=sys.stderr)
+            return 1
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(format_values(values, 'github'))
+
+    text = format_values(values, opts.format)
+    if opts.out:
+        with open(opts.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,493 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import config_core
+from config_core import expand_files, SERIAL_THRESHOLD
+from deeplink_router import RouteError, parse_pattern, shape
+import tracing
+
+Issue = namedtuple('Issue', 'path level message')
+
+ERROR = 'error'
+WARNING = 'aviso'
+
+JAVA_KEYWORDS = {
+    'abstract', 'assert', 'boolean', 'break', 'byte', 'case', 'catch', 'char', 'class', 'const',
+    'continue', 'default', 'do', 'double', 'else', 'enum', 'extends', 'false', 'final', 'finally',
+    'float', 'for', 'goto', 'if', 'implements', 'import', 'instanceof', 'int', 'interface', 'long',
+    'native', 'new', 'null', 'package', 'private', 'protected', 'public', 'return', 'short', 'static',
+    'strictfp', 'super', 'switch', 'synchronized', 'this', 'throw', 'throws', 'transient', 'true',
+    'try', 'void', 'volatile', 'while',
+}
+
+_APP_ID = re.compile(r'^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z][A-Za-z0-9_]*)+$')
+_SEMVER = re.compile(r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(-[0-9A-Za-z.-]+)?$')
+_PERMISSION = re.compile(r'^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)+$')
+_SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*$')
+_HOST = re.compile(r'^(?=.{1,253}$)([a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)(\.[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)+$')
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_APP_ID_SUFFIX = re.compile(r'^(\.[A-Za-z][A-Za-z0-9_]*)+$')
+_VARIANT_NAME = re.compile(r'^[A-Za-z0-9_]+$')
+
+
+def _app_id(value):
+    if not _APP_ID.match(value):
+        return "debe tener al menos dos partes (com.empresa.app) con letras, numeros o _"
+    keywords = [part for part in value.split('.') if part in JAVA_KEYWORDS]
+    if keywords:
+        return f"'{keywords[0]}' es una palabra reservada de Java"
+    return None
+
+
+def _regex_rule(regex, message):
+    def check(value):
+        return None if regex.match(value) else message
+    return check
+
+
+def _host(value):
+    if value and not _HOST.match(value):
+        return "no es un nombre de host valido (ej: miapp.com)"
+    return None
+
+
+def _email(value):
+    if value and not _EMAIL.match(value):
+        return "no es un email valido"
+    return None
+
+
+_PERMISSION_LIST = {
+    'type': 'array',
+    'unique': True,
+    'items': {'type': 'string',
+              'check': _regex_rule(_PERMISSION, "nombre de permiso invalido (ej: android.permission.CAMERA)")},
+}
+
+_BUILD_FLAGS = {
+    'type': 'object',
+    'properties': {
+        'compile': {'type': 'boolean'},
+        'emulator': {'type': 'boolean'},
+    },
+}
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'appId': {'type': 'string', 'required': True, 'check': _app_id},
+        'appName': {'type': 'string', 'required': True, 'min_length': 1, 'max_length': 50},
+        'version': {'type': 'string', 'required': True,
+                    'check': _regex_rule(_SEMVER, "debe ser x.y.z (ej: 1.2.0)")},
+        'versionCode': {'type': 'integer', 'required': True, 'minimum': 1, 'maximum': 2100000000},
+        'description': {'type': 'string'},
+        'author': {
+            'type': 'object',
+            'properties': {
+                'name': {'type': 'string'},
+                'email': {'type': 'string', 'check': _email},
+                'url': {'type': 'string'},
+            },
+        },
+        'android': {
+            'type': 'object',
+            'required': True,
+            'properties': {
+                'minSdkVersion': {'type': 'integer', 'required': True, 'minimum': 1, 'maximum': 99},
+                'targetSdkVersion': {'type': 'integer', 'required': True, 'minimum': 1, 'maximum': 99},
+                'compileSdkVersion': {'type': 'integer', 'minimum': 1, 'maximum': 99},
+                'permissions': _PERMISSION_LIST,
+            },
+        },
+        'deepLinks': {
+            'type': 'object',
+            'properties': {
+                'enabled': {'type': 'boolean'},
+                'scheme': {'type': 'string',
+                           'check': _regex_rule(_SCHEME, "solo minusculas, numeros, '+', '.' o '-' y empezar por letra")},
+                'host': {'type': 'string', 'check': _host},
+                'paths': {'type': 'array', 'unique': True, 'items': {'type': 'string'}},
+            },
+        },
+        'build': _BUILD_FLAGS,
+        # variants: {dimension: {name: overrides}}; 'values' checks every entry of a free-form object
+        'variants': {
+            'type': 'object',
+            'values': {
+                'type': 'object',
+                'values': {
+                    'type': 'object',
+                    'properties': {
+                        'appIdSuffix': {'type': 'string',
+                                        'check': _regex_rule(_APP_ID_SUFFIX, "debe empezar por '.' (ej: .dev)")},
+                        'appName': {'type': 'string', 'min_length': 1, 'max_length': 50},
+                        'host': {'type': 'string', 'check': _host},
+                        'permissions': {
+                            'type': 'object',
+                            'properties': {'add': _PERMISSION_LIST, 'remove': _PERMISSION_LIST},
+                        },
+                        'build': _BUILD_FLAGS,
+                    },
+                },
+            },
+        },
+    },
+}
+
+_TYPE_NAMES = {
+    'string': "un texto",
+    'integer': "un numero entero",
+    'boolean': "true o false",
+    'array': "una lista",
+    'object': "un objeto",
+}
+
+
+def _type_test(kind):
+    if kind == 'string':
+        return lambda v: isinstance(v, str)
+    if kind == 'integer':
+        return lambda v: isinstance(v, int) and not isinstance(v, bool)
+    if kind == 'boolean':
+        return lambda v: isinstance(v, bool)
+    if kind == 'array':
+        return lambda v: isinstance(v, list)
+    if kind == 'object':
+        return lambda v: isinstance(v, dict)
+    raise ValueError(f"Tipo de esquema desconocido: {kind}")
+
+
+def _compile_leaf(node):
+    is_type = _type_test(node['type'])
+    type_message = f"debe ser {_TYPE_NAMES[node['type']]}"
+    rules = []
+
+    if 'min_length' in node or 'max_length' in node:
+        low, high = node.get('min_length', 0), node.get('max_length')
+
+        def lengths(value):
+            if len(value.strip()) < low:
+                return "no puede estar vacio"
+            if high is not None and len(value) > high:
+                return f"maximo {high} caracteres"
+            return None
+        rules.append(lengths)
+
+    if 'minimum' in node or 'maximum' in node:
+        low, high = node.get('minimum'), node.get('maximum')
+
+        def bounds(value):
+            if low is not None and value < low:
+                return f"debe ser >= {low}"
+            if high is not None and value > high:
+                return f"debe ser <= {high}"
+            return None
+        rules.append(bounds)
+
+    if 'check' in node:
+        rules.append(node['check'])
+
+    # Rules are pure and fleets repeat the same values (permission names, SDK
+    # levels), so results are memoized; only values of the right type get here
+    @lru_cache(maxsize=4096)
+    def apply_rules(value):
+        for rule in rules:
+            text = rule(value)
+            if text:
+                return text
+        return None
+
+    def message(value):
+        if not is_type(value):
+            return type_message
+        return apply_rules(value) if rules else None
+    return message
+
+
+def _compile(node):
+    # Each schema node becomes a closure check(value, path, issues); nothing
+    # in the schema dict is looked at again after this.
+    if node['type'] not in ('object', 'array'):
+        leaf = _compile_leaf(node)
+
+        def check_leaf(value, path, issues):
+            text = leaf(value)
+            if text:
+                issues.append(Issue(path, ERROR, text))
+        check_leaf.leaf = leaf
+        return check_leaf
+
+    if node['type'] == 'object':
+        fields = [(name, child.get('required', False), _compile(child))
+                  for name, child in node.get('properties', {}).items()]
+        values = _compile(node['values']) if 'values' in node else None
+
+        def check_object(value, path, issues):
+            if not isinstance(value, dict):
+                issues.append(Issue(path, ERROR, f"debe ser {_TYPE_NAMES['object']}"))
+                return
+            prefix = f"{path}." if path else ''
+            for name, required, check in fields:
+                if name in value:
+                    check(value[name], prefix + name, issues)
+                elif required:
+                    issues.append(Issue(prefix + name, ERROR, "es obligatorio"))
+            if values:
+                for name, item in value.items():
+                    values(item, prefix + name, issues)
+        return check_object
+
+    item_check = _compile(node['items']) if 'items' in node else None
+    leaf = getattr(item_check, 'leaf', None)
+    unique = node.get('unique', False)
+
+    def check_array(value, path, issues):
+        if not isinstance(value, list):
+            issues.append(Issue(path, ERROR, f"debe ser {_TYPE_NAMES['array']}"))
+            return
+        seen = {}
+        for index, item in enumerate(value):
+            if leaf is not None:
+                # Hot path for string lists: only format the item path on failure
+                text = leaf(item)
+                if text:
+                    issues.append(Issue(f"{path}[{index}]", ERROR, text))
+            elif item_check:
+                item_check(item, f"{path}[{index}]", issues)
+            if unique and isinstance(item, str):
+                first = seen.setdefault(item, index)
+                if first != index:
+                    issues.append(Issue(f"{path}[{index}]", ERROR, f"repetido (ya esta en [{first}])"))
+    return check_array
+
+
+@lru_cache(maxsize=4096)
+def _path_shape(path):
+    try:
+        return shape(parse_pattern(path)), None
+    except RouteError as e:
+        return None, str(e)
+
+
+def _cross_field_checks(catalog):
+    def sdk_levels(config, issues):
+        android = config.get('android')
+        if not isinstance(android, dict):
+            return
+        min_sdk, target = android.get('minSdkVersion'), android.get('targetSdkVersion')
+        compile_sdk = android.get('compileSdkVersion')
+        if _is_int(min_sdk) and _is_int(target) and min_sdk > target:
+            issues.append(Issue('android.targetSdkVersion', ERROR, f"debe ser >= minSdkVersion ({min_sdk})"))
+        if _is_int(target) and _is_int(compile_sdk) and compile_sdk < target:
+            issues.append(Issue('android.compileSdkVersion', ERROR, f"debe ser >= targetSdkVersion ({target})"))
+        permissions = android.get('permissions')
+        if not catalog or not isinstance(permissions, list):
+            return
+        for index, perm in enumerate(permissions):
+            if not isinstance(perm, str) or not perm.startswith(config_core.PERMISSION_PREFIX):
+                continue
+            entry = catalog.get(perm)
+            if entry is None:
+                issues.append(Issue(f'android.permissions[{index}]', WARNING, "no es un permiso conocido de Android"))
+            elif entry.max_sdk and _is_int(min_sdk) and entry.max_sdk < min_sdk:
+                issues.append(Issue(f'android.permissions[{index}]', WARNING,
+                                    f"no tiene efecto desde API {entry.max_sdk + 1} (minSdk {min_sdk})"))
+
+    def deep_links(config, issues):
+        deeplinks = config.get('deepLinks')
+        if not isinstance(deeplinks, dict):
+            return
+        if deeplinks.get('enabled') and deeplinks.get('scheme') in ('http', 'https'):
+            issues.append(Issue('deepLinks.scheme', ERROR, "usa un scheme propio; http/https se configuran con host"))
+        paths = deeplinks.get('paths')
+        if not isinstance(paths, list):
+            return
+        shapes = {}
+        for index, path in enumerate(paths):
+            if not isinstance(path, str):
+                continue
+            key, error = _path_shape(path)
+            if error:
+                issues.append(Issue(f'deepLinks.paths[{index}]', ERROR, error))
+                continue
+            if key in shapes and paths[shapes[key]] != path:
+                issues.append(Issue(f'deepLinks.paths[{index}]', ERROR,
+                                    f"conflicto con [{shapes[key]}] '{paths[shapes[key]]}'"))
+            shapes.setdefault(key, index)
+
+    def variants(config, issues):
+        dimensions = config.get('variants')
+        if not isinstance(dimensions, dict) or not isinstance(config.get('appId'), str):
+            return
+        # Combinations are only expanded once every override has the right shape
+        malformed = any(issue.level == ERROR and issue.path.startswith('variants') for issue in issues)
+        for dimension, values in dimensions.items():
+            if not isinstance(values, dict):
+                continue
+            for name in [dimension] + list(values):
+                if not _VARIANT_NAME.match(name):
+                    issues.append(Issue(f'variants.{dimension}', ERROR,
+                                        f"'{name}': solo letras, numeros o _ (se usa en carpetas y artifacts)"))
+        if malformed:
+            return
+        app_ids = {}
+        for name, overrides in config_core.variant_combinations(config):
+            app_id = config['appId'] + ''.join(o.get('appIdSuffix', '') for o in overrides
+                                               if isinstance(o.get('appIdSuffix'), str))
+            text = _app_id(app_id) if _APP_ID.match(config['appId']) else None
+            if text:
+                issues.append(Issue(f'variants[{name}]', ERROR, f"appId '{app_id}' {text}"))
+            elif app_id in app_ids:
+                issues.append(Issue(f'variants[{name}]', WARNING,
+                                    f"mismo appId que '{app_ids[app_id]}'; no se pueden instalar juntas"))
+            app_ids.setdefault(app_id, name)
+
+    return [sdk_levels, deep_links, variants]
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def compile_schema(schema=SCHEMA, catalog=None):
+    root = _compile(schema)
+    cross = _cross_field_checks(catalog)
+
+    def validate(config):
+        issues = []
+        root(config, '', issues)
+        if isinstance(config, dict):
+            for check in cross:
+                check(config, issues)
+        return issues
+    return validate
+
+
+_VALIDATOR = None
+
+
+def validate(config):
+    global _VALIDATOR
+    if _VALIDATOR is None:
+        try:
+            from permission_catalog import PermissionCatalog
+            catalog = PermissionCatalog.load()
+        except (OSError, ValueError):
+            catalog = None
+        _VALIDATOR = compile_schema(catalog=catalog)
+    return _VALIDATOR(config)
+
+
+def errors_only(issues):
+    return [issue for issue in issues if issue.level == ERROR]
+
+
+def format_issue(issue):
+    return f"{issue.path or '(raiz)'}: {issue.message}"
+
+
+def validate_file(path):
+    try:
+        config = config_core.load_config(path)
+    except ValueError as e:
+        return path, [Issue('', ERROR, f"JSON invalido: {e}")]
+    except OSError as e:
+        return path, [Issue('', ERROR, f"no se puede leer: {e.strerror}")]
+    return path, validate(config)
+
+
+@tracing.traced('schema.validate_files')
+def validate_files(files, jobs=None):
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(files) < SERIAL_THRESHOLD:
+        return [validate_file(path) for path in files]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_file, files, chunksize=chunksize))
+
+
+def synthetic_configs(base, count):
+    configs = []
+    for i in range(count):
+        config = json.loads(json.dumps(base))
+        config['appId'] = f"com.flota.cliente{i}"
+        config['versionCode'] = i + 1
+        config['deepLinks']['paths'] = config['deepLinks'].get('paths', []) + [f"/campania/{i}/:id"]
+        if i % 10 == 0:
+            config['android']['targetSdkVersion'] = config['android']['minSdkVersion'] - 1
+            config['version'] = "1.0"
+        configs.append(config)
+    return configs
+
+
+def benchmark(count, base_path):
+    base = config_core.normalize_config(config_core.load_config(base_path))
+    configs = synthetic_configs(base, count)
+
+    started = time.perf_counter()
+    compile_schema()
+    compile_ms = (time.perf_counter() - started) * 1000
+    validate(base)
+
+    started = time.perf_counter()
+    invalid = sum(1 for config in configs if errors_only(validate(config)))
+    elapsed = time.perf_counter() - started
+    print(f"compile: {compile_ms:.2f} ms")
+    print(f"{count} configs in {elapsed * 1000:.1f} ms: {count / elapsed:,.0f} configs/s "
+          f"({elapsed / count * 1e6:.1f} us/config, {invalid} invalid)")
+    return count / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="config_schema.py",
+        description="Valida app.config.json (acepta globs y miles de archivos)."
+    )
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Solo muestra errores, no avisos")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="Mide configs/s con N configs sinteticas")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    if opts.benchmark:
+        benchmark(opts.benchmark, (opts.files or [config_core.DEFAULT_CONFIG_PATH])[0])
+        return 0
+
+    started = time.perf_counter()
+    files = expand_files(opts.files)
+    results = validate_files(files, opts.jobs)
+    failed = 0
+    report = {}
+    for path, issues in results:
+        if opts.quiet:
+            issues = errors_only(issues)
+        if errors_only(issues):
+            failed += 1
+        if opts.json:
+            report[path] = [issue._asdict() for issue in issues]
+            continue
+        for issue in issues:
+            print(f"{path}: {issue.level}: {format_issue(issue)}")
+
+    if opts.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        elapsed = time.perf_counter() - started
+        print(f"{len(files)} archivos, {failed} con errores ({elapsed * 1000:.0f} ms)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
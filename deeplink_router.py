@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import unquote, urlsplit, parse_qsl
+
+import config_core
+import tracing
+
+DEFAULT_ROUTES_JS = os.path.join("www", "js", "routes.js")
+
+WEB_SCHEMES = ('http', 'https')
+
+_PARAM_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_STATIC_SEGMENT = re.compile(r"^[A-Za-z0-9\-._~%!$&'()+,;=@]+$")
+
+
+class RouteError(ValueError):
+    pass
+
+
+class RouteNode:
+    __slots__ = ('static', 'param', 'wildcard', 'route')
+
+    def __init__(self):
+        self.static = {}
+        self.param = None
+        self.wildcard = None
+        self.route = None
+
+    def to_json(self):
+        node = {}
+        if self.static:
+            node['s'] = {seg: child.to_json() for seg, child in self.static.items()}
+        if self.param:
+            node['p'] = self.param.to_json()
+        if self.wildcard is not None:
+            node['w'] = self.wildcard
+        if self.route is not None:
+            node['r'] = self.route
+        return node
+
+
+def parse_pattern(pattern):
+    if not pattern.startswith('/'):
+        raise RouteError("debe empezar con '/'")
+    segments = []
+    names = set()
+    parts = [p for p in pattern.split('/') if p]
+    for index, part in enumerate(parts):
+        if part[0] in ':*':
+            kind = 'param' if part[0] == ':' else 'wildcard'
+            name = part[1:] or ('rest' if kind == 'wildcard' else '')
+            if not _PARAM_NAME.match(name):
+                raise RouteError(f"nombre de parametro invalido '{part}'")
+            if name in names:
+                raise RouteError(f"parametro repetido '{name}'")
+            if kind == 'wildcard' and index != len(parts) - 1:
+                raise RouteError("'*' solo puede ir al final")
+            names.add(name)
+            segments.append((kind, name))
+        elif _STATIC_SEGMENT.match(part):
+            segments.append(('static', part))
+        else:
+            raise RouteError(f"segmento invalido '{part}'")
+    return segments
+
+
+def shape(segments):
+    return '/' + '/'.join(value if kind == 'static' else (':' if kind == 'param' else '*')
+                          for kind, value in segments)
+
+
+class Router:
+    def __init__(self, patterns, check_overlaps=True):
+        self.routes = []
+        self.root = RouteNode()
+        self.errors = []
+        self.warnings = []
+        for pattern in patterns:
+            self.add(pattern)
+        if check_overlaps:
+            self._find_overlaps()
+
+    def add(self, pattern):
+        try:
+            segments = parse_pattern(pattern)
+        except RouteError as e:
+            self.errors.append(f"{pattern}: {e}")
+            return None
+        node = self.root
+        for kind, value in segments:
+            if kind == 'static':
+                node = node.static.setdefault(value, RouteNode())
+            elif kind == 'param':
+                if node.param is None:
+                    node.param = RouteNode()
+                node = node.param
+            else:
+                break
+        index = len(self.routes)
+        slot = 'wildcard' if segments and segments[-1][0] == 'wildcard' else 'route'
+        existing = getattr(node, slot)
+        if existing is not None:
+            other = self.routes[existing]['path']
+            if other == pattern:
+                self.errors.append(f"{pattern}: ruta duplicada")
+            else:
+                self.errors.append(f"{pattern}: conflicto con '{other}' (misma forma {shape(segments)})")
+            return None
+        setattr(node, slot, index)
+        self.routes.append({
+            'path': pattern,
+            'params': [[i, value] for i, (kind, value) in enumerate(segments) if kind == 'param'],
+            'splat': [len(segments) - 1, segments[-1][1]] if slot == 'wildcard' else None,
+            'segments': segments,
+        })
+        return index
+
+    def overlaps(self, index):
+        shadowed = set()
+        self._collect_overlaps(self.root, self.routes[index]['segments'], 0, False, shadowed)
+        shadowed.discard(index)
+        return sorted(shadowed)
+
+    def overlap_warning(self, index, other):
+        return f"{self.routes[index]['path']}: tiene prioridad sobre '{self.routes[other]['path']}'"
+
+    def _find_overlaps(self):
+        for index in range(len(self.routes)):
+            for other in self.overlaps(index):
+                self.warnings.append(self.overlap_warning(index, other))
+
+    def _collect_overlaps(self, node, segments, i, substituted, out):
+        # Any catch-all passed on the way loses to the more specific route
+        if node.wildcard is not None:
+            out.add(node.wildcard)
+        if i == len(segments):
+            if substituted and node.route is not None:
+                out.add(node.route)
+            return
+        kind, value = segments[i]
+        if kind == 'static':
+            child = node.static.get(value)
+            if child:
+                self._collect_overlaps(child, segments, i + 1, substituted, out)
+            if node.param:
+                self._collect_overlaps(node.param, segments, i + 1, True, out)
+        elif kind == 'param' and node.param:
+            self._collect_overlaps(node.param, segments, i + 1, substituted, out)
+
+    def _walk(self, node, segments, i):
+        if i == len(segments):
+            if node.route is not None:
+                return node.route
+            return node.wildcard
+        child = node.static.get(segments[i])
+        if child is not None:
+            found = self._walk(child, segments, i + 1)
+            if found is not None:
+                return found
+        if node.param is not None:
+            found = self._walk(node.param, segments, i + 1)
+            if found is not None:
+                return found
+        return node.wildcard
+
+    def match_path(self, path):
+        segments = [unquote(s) for s in path.split('/') if s]
+        index = self._walk(self.root, segments, 0)
+        if index is None:
+            return None
+        route = self.routes[index]
+        params = {name: segments[i] for i, name in route['params']}
+        if route['splat']:
+            start, name = route['splat']
+            params[name] = '/'.join(segments[start:])
+        return route['path'], params
+
+    def to_table(self, scheme, host):
+        return {
+            'scheme': scheme,
+            'host': host,
+            'routes': [{'path': r['path'], 'params': r['params'], 'splat': r['splat']} for r in self.routes],
+            'trie': self.root.to_json(),
+        }
+
+
+def url_path(url, scheme, host):
+    parts = urlsplit(url)
+    if parts.scheme in WEB_SCHEMES:
+        if host and parts.hostname != host:
+            return None
+        return parts.path
+    if parts.scheme != scheme:
+        return None
+    # miapp://producto/123 parses "producto" as the host
+    return '/' + parts.netloc + parts.path
+
+
+def match_url(router, url, scheme, host):
+    path = url_path(url, scheme, host)
+    if path is None:
+        return None
+    parts = urlsplit(url)
+    matched = router.match_path(path)
+    query = dict(parse_qsl(parts.query))
+    if matched is None:
+        return {'route': None, 'path': path, 'params': {}, 'query': query}
+    return {'route': matched[0], 'path': path, 'params': matched[1], 'query': query}
+
+
+def router_from_config(config):
+    deeplinks = config.get('deepLinks', {})
+    return Router(deeplinks.get('paths', [])), deeplinks.get('scheme') or 'miapp', deeplinks.get('host') or ''
+
+
+def render_routes_js(table):
+    return (
+        "// Generado por deeplink_router.py desde app.config.json. No editar a mano.\n"
+        f"window.DEEP_LINK_ROUTES = {json.dumps(table, ensure_ascii=False, separators=(',', ':'))};\n"
+    )
+
+
+@tracing.traced('routes.compile')
+def compile_routes(config_path, out_path):
+    router, scheme, host = router_from_config(config_core.load_config(config_path))
+    if router.errors:
+        return router, False
+    data = render_routes_js(router.to_table(scheme, host)).encode('utf-8')
+    try:
+        with open(out_path, 'rb') as f:
+            if f.read() == data:
+                return router, False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    config_core.atomic_write(out_path, data)
+    return router, True
+
+
+def generate_corpus(route_count, url_count, seed=1):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(max(20, route_count // 8))]
+    patterns = []
+    shapes = set()
+    while len(patterns) < route_count:
+        segments = []
+        for position in range(rng.randint(1, 4)):
+            if position and rng.random() < 0.35:
+                segments.append(f":p{position}")
+            else:
+                segments.append(rng.choice(words))
+        pattern = '/' + '/'.join(segments)
+        key = shape(parse_pattern(pattern))
+        if key not in shapes:
+            shapes.add(key)
+            patterns.append(pattern)
+    urls = []
+    for _ in range(url_count):
+        if rng.random() < 0.9:
+            pattern = rng.choice(patterns)
+            path = '/'.join(str(rng.randint(1, 99999)) if s.startswith(':') else s for s in pattern.split('/'))
+        else:
+            path = '/' + '/'.join(rng.choice(words) + 'x' for _ in range(rng.randint(1, 4)))
+        urls.append(f"miapp:/{path}?ref=bench")
+    return patterns, urls
+
+
+def _linear_matcher(patterns):
+    compiled = []
+    for pattern in patterns:
+        regex = '^' + ''.join('/([^/]+)' if s.startswith(':') else '/' + re.escape(s)
+                              for s in pattern.split('/') if s) + '/?$'
+        compiled.append((pattern, re.compile(regex)))
+
+    def match(path):
+        for pattern, regex in compiled:
+            if regex.match(path):
+                return pattern
+        return None
+    return match
+
+
+def benchmark(route_count, url_count):
+    patterns, urls = generate_corpus(route_count, url_count)
+    started = time.perf_counter()
+    router = Router(patterns)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    paths = [url_path(u, 'miapp', '') for u in urls]
+    started = time.perf_counter()
+    hits = sum(1 for p in paths if router.match_path(p) is not None)
+    trie_s = time.perf_counter() - started
+
+    linear = _linear_matcher(patterns)
+    started = time.perf_counter()
+    linear_hits = sum(1 for p in paths if linear(p) is not None)
+    linear_s = time.perf_counter() - started
+
+    print(f"{route_count} rutas, {url_count} URLs (construccion + revision {build_ms:.1f} ms, "
+          f"{len(router.errors)} errores, {len(router.warnings)} avisos)")
+    print(f"trie:   {trie_s * 1000:9.1f} ms  {url_count / trie_s:12.0f} URLs/s  {hits} encontradas")
+    print(f"lineal: {linear_s * 1000:9.1f} ms  {url_count / linear_s:12.0f} URLs/s  {linear_hits} encontradas")
+    return {'routes': route_count, 'urls': url_count, 'build_ms': build_ms,
+            'trie_s': trie_s, 'linear_s': linear_s}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="deeplink_router.py",
+        description="Compila deepLinks.paths en un trie de rutas, revisa conflictos y genera la tabla de rutas JS."
+    )
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH, help="Config de la app")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('check', help="Informa de rutas en conflicto o que se solapan")
+    p = sub.add_parser('compile', help="Escribe la tabla de rutas JS precompilada")
+    p.add_argument('--out', default=DEFAULT_ROUTES_JS, help=f"Archivo JS (por defecto: {DEFAULT_ROUTES_JS})")
+    p = sub.add_parser('match', help="Prueba URLs con el matcher de referencia")
+    p.add_argument('urls', nargs='+', help="URLs a probar (ej: miapp://producto/5)")
+    p = sub.add_parser('bench', help="Compara el trie con la busqueda lineal sobre un corpus generado")
+    p.add_argument('--routes', type=int, default=1000, help="Rutas generadas (por defecto: 1000)")
+    p.add_argument('--urls', type=int, default=100000, help="URLs generadas (por defecto: 100000)")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    if opts.command == 'bench':
+        benchmark(opts.routes, opts.urls)
+        return 0
+
+    if opts.command == 'compile':
+        router, written = compile_routes(opts.config, opts.out)
+    else:
+        router, scheme, host = router_from_config(config_core.load_config(opts.config))
+
+    for message in router.errors:
+        print(f"ERROR {message}", file=sys.stderr)
+    for message in router.warnings:
+        print(f"aviso {message}", file=sys.stderr)
+    if router.errors:
+        return 1
+
+    if opts.command == 'compile':
+        print(f"{opts.out}: {len(router.routes)} rutas ({'actualizado' if written else 'sin cambios'})")
+    elif opts.command == 'match':
+        for url in opts.urls:
+            print(json.dumps({'url': url, **(match_url(router, url, scheme, host) or {'route': None})},
+                             ensure_ascii=False))
+    else:
+        print(f"{len(router.routes)} rutas OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import config_core
+import tracing
+
+DEFAULT_SHOTS = ('initial', 'after', 'final')
+REPORT_NAME = "timings.json"
+
+
+class DriverError(RuntimeError):
+    pass
+
+
+class Backoff:
+    def __init__(self, initial=0.25, factor=1.6, maximum=5.0):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def delays(self):
+        delay = self.initial
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
+
+
+class Adb:
+    def __init__(self, adb='adb', serial=None, timeout=60):
+        self.base = [adb] + (['-s', serial] if serial else [])
+        self.timeout = timeout
+
+    def run(self, *args, timeout=None, check=True):
+        try:
+            result = subprocess.run(self.base + list(args), capture_output=True,
+                                    timeout=timeout or self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise DriverError(f"adb {' '.join(args)}: {e}") from e
+        if check and result.returncode != 0:
+            raise DriverError(f"adb {' '.join(args)}: {result.stderr.decode('utf-8', 'replace').strip()}")
+        return result.stdout
+
+    def shell(self, command):
+        return self.run('shell', command, check=False).decode('utf-8', 'replace').replace('\r', '').strip()
+
+    def wait_for_device(self, timeout):
+        self.run('wait-for-device', timeout=timeout)
+
+    def getprop(self, name):
+        return self.shell(f"getprop {name}")
+
+    def install(self, apk):
+        output = self.run('install', '-r', apk, timeout=300)
+        if b'Success' not in output:
+            raise DriverError(f"adb install {apk}: {output.decode('utf-8', 'replace').strip()}")
+
+    def launch(self, app_id):
+        lines = self.shell(f"cmd package resolve-activity --brief {app_id}").splitlines()
+        component = lines[-1].strip() if lines else ''
+        if '/' in component:
+            self.shell(f"am start -n {component}")
+        else:
+            self.shell(f"monkey -p {app_id} -c android.intent.category.LAUNCHER 1")
+        return component
+
+    def app_pid(self, app_id):
+        return self.shell(f"pidof {app_id}")
+
+    def focused_window(self):
+        return self.shell("dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'")
+
+    def screencap(self):
+        return self.run('exec-out', 'screencap', '-p')
+
+
+class FakeAdb:
+    # Stands in for a device on a virtual clock: boots and starts the app after
+    # a few polls and serves canned screenshots, each repeated `repeat` times so
+    # the driver has a settled frame to find
+    def __init__(self, frames, boot_polls=4, start_polls=2, repeat=3, command_cost=0.2):
+        if not frames:
+            raise DriverError("el adb simulado necesita al menos una captura")
+        self.frames = list(frames)
+        self.boot_polls = boot_polls
+        self.start_polls = start_polls
+        self.repeat = repeat
+        self.command_cost = command_cost
+        self.now = 0.0
+        self.captures = 0
+        self.installed = None
+        self.launched = None
+        self.calls = []
+
+    @classmethod
+    def from_dir(cls, path, **kwargs):
+        frames = []
+        for name in sorted(glob.glob(os.path.join(path, '*.png'))):
+            with open(name, 'rb') as f:
+                frames.append(f.read())
+        if not frames:
+            raise DriverError(f"{path}: no hay capturas .png")
+        return cls(frames, **kwargs)
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def _tick(self, call):
+        self.calls.append(call)
+        self.now += self.command_cost
+
+    def wait_for_device(self, timeout):
+        self._tick('wait-for-device')
+
+    def getprop(self, name):
+        self._tick(f"getprop {name}")
+        if name != 'sys.boot_completed':
+            return ''
+        self.boot_polls -= 1
+        return '1' if self.boot_polls <= 0 else ''
+
+    def install(self, apk):
+        self._tick(f"install {apk}")
+        self.installed = apk
+
+    def launch(self, app_id):
+        self._tick(f"launch {app_id}")
+        if self.installed is None:
+            raise DriverError(f"{app_id} no esta instalada")
+        self.launched = app_id
+        return f"{app_id}/.MainActivity"
+
+    def app_pid(self, app_id):
+        self._tick(f"pidof {app_id}")
+        if self.launched != app_id:
+            return ''
+        self.start_polls -= 1
+        return '4242' if self.start_polls <= 0 else ''
+
+    def focused_window(self):
+        self._tick('dumpsys window')
+        if self.launched is None or self.start_polls > 0:
+            return 'mCurrentFocus=Window{1 u0 com.android.launcher3/.Launcher}'
+        return f"mCurrentFocus=Window{{1 u0 {self.launched}/.MainActivity}}"
+
+    def screencap(self):
+        self._tick('screencap')
+        frame = self.frames[min(self.captures // self.repeat, len(self.frames) - 1)]
+        self.captures += 1
+        return frame
+
+
+class EmulatorDriver:
+    def __init__(self, adb, clock=time.monotonic, sleep=time.sleep, backoff=None, frame_backoff=None):
+        self.adb = adb
+        self.clock = clock
+        self.sleep = sleep
+        self.backoff = backoff or Backoff()
+        self.frame_backoff = frame_backoff or Backoff(0.2, 1.5, 2.0)
+        self.timings = {}
+        self.shots = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = self.clock()
+        try:
+            with tracing.span(f"emulator.{name}", 'emulator'):
+                yield
+        finally:
+            self.timings[name] = round(self.clock() - started, 3)
+
+    def wait_until(self, what, predicate, timeout):
+        started = self.clock()
+        for delay in self.backoff.delays():
+            try:
+                if predicate():
+                    return
+            except DriverError:
+                pass
+            elapsed = self.clock() - started
+            if elapsed >= timeout:
+                raise DriverError(f"{what} no esta listo tras {elapsed:.0f}s")
+            self.sleep(min(delay, timeout - elapsed))
+
+    def wait_for_boot(self, timeout):
+        with self.phase('boot'):
+            self.adb.wait_for_device(timeout)
+            self.wait_until('boot', lambda: self.adb.getprop('sys.boot_completed') == '1', timeout)
+
+    def install(self, apk):
+        with self.phase('install'):
+            self.adb.install(apk)
+
+    def launch(self, app_id, timeout):
+        with self.phase('launch'):
+            self.adb.launch(app_id)
+            self.wait_until(f"inicio de {app_id}",
+                            lambda: self.adb.app_pid(app_id) and app_id in self.adb.focused_window(), timeout)
+
+    def settled_frame(self, timeout, previous=None, stable_count=2):
+        # Capture until `stable_count` consecutive frames are identical (and differ
+        # from `previous`, when given); on timeout the last capture is used
+        started = self.clock()
+        delays = self.frame_backoff.delays()
+        last = None
+        streak = 0
+        while True:
+            frame = self.adb.screencap()
+            streak = streak + 1 if frame == last else 1
+            last = frame
+            settled = streak >= stable_count
+            if settled and frame != previous:
+                return frame, True
+            if self.clock() - started >= timeout:
+                return frame, settled
+            self.sleep(next(delays))
+
+    def capture(self, out_dir, names=DEFAULT_SHOTS, settle_timeout=30, change_timeout=10):
+        previous = None
+        for number, name in enumerate(names, 1):
+            with self.phase(f"screenshot_{name}"):
+                frame, settled = self.settled_frame(settle_timeout if previous is None else change_timeout,
+                                                    previous)
+                path = os.path.join(out_dir, f"screenshot_{number:02d}_{name}.png")
+                with open(path, 'wb') as f:
+                    f.write(frame)
+            self.shots.append({'name': name, 'path': path, 'settled': settled,
+                               'changed': previous is not None and frame != previous,
+                               'seconds': self.timings[f"screenshot_{name}"]})
+            previous = frame
+
+    def run(self, apk, app_id, out_dir, boot_timeout=300, start_timeout=60, names=DEFAULT_SHOTS,
+            settle_timeout=30, change_timeout=10):
+        os.makedirs(out_dir, exist_ok=True)
+        started = self.clock()
+        try:
+            self.wait_for_boot(boot_timeout)
+            try:
+                self.install(apk)
+            except DriverError:
+                with contextlib.suppress(DriverError):
+                    with open(os.path.join(out_dir, 'error.png'), 'wb') as f:
+                        f.write(self.adb.screencap())
+                raise
+            self.launch(app_id, start_timeout)
+            self.capture(out_dir, names, settle_timeout, change_timeout)
+        finally:
+            self.timings['total'] = round(self.clock() - started, 3)
+            self.write_report(os.path.join(out_dir, REPORT_NAME))
+
+    def write_report(self, path):
+        config_core.atomic_write(path, json.dumps({'phases': self.timings, 'shots': self.shots},
+                                                  indent=2).encode('utf-8'))
+
+    def summary(self):
+        lines = [f"{name:<24} {seconds:8.1f} s" for name, seconds in self.timings.items()]
+        for shot in self.shots:
+            state = 'estable' if shot['settled'] else 'aun cambiando'
+            if shot['name'] != self.shots[0]['name'] and not shot['changed']:
+                state += ', igual a la anterior'
+            lines.append(f"{os.path.basename(shot['path'])}: {state}")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="emulator_driver.py",
+        description="Espera al emulador, instala y abre el APK, y toma capturas cuando la pantalla se estabiliza."
+    )
+    parser.add_argument('--apk', required=True, help="APK a instalar")
+    parser.add_argument('--app-id', help="Id de la aplicacion (por defecto: appId de la config)")
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH, help="Config de la app")
+    parser.add_argument('--out', default='screenshots', help="Directorio de capturas (por defecto: screenshots)")
+    parser.add_argument('--adb', default='adb', help="Ejecutable de adb")
+    parser.add_argument('--serial', help="Serie del dispositivo (adb -s)")
+    parser.add_argument('--shots', nargs='+', default=list(DEFAULT_SHOTS), help="Nombres de las capturas, en orden")
+    parser.add_argument('--boot-timeout', type=float, default=300, help="Segundos maximos para el arranque")
+    parser.add_argument('--start-timeout', type=float, default=60, help="Segundos maximos para abrir la app")
+    parser.add_argument('--settle-timeout', type=float, default=30,
+                        help="Segundos maximos hasta que la primera pantalla deje de cambiar")
+    parser.add_argument('--change-timeout', type=float, default=10,
+                        help="Segundos maximos hasta que cada captura siguiente sea distinta de la anterior")
+    parser.add_argument('--fake', metavar='DIR',
+                        help="Usa un dispositivo simulado que sirve los .png de DIR (sin emulador)")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    app_id = opts.app_id or config_core.load_config(opts.config).get('appId')
+    if not app_id:
+        parser.error("--app-id es obligatorio si la config no tiene appId")
+
+    if opts.fake:
+        try:
+            adb = FakeAdb.from_dir(opts.fake)
+        except DriverError as e:
+            print(f"ERROR {e}", file=sys.stderr)
+            return 1
+        driver = EmulatorDriver(adb, clock=adb.clock, sleep=adb.sleep)
+    else:
+        driver = EmulatorDriver(Adb(opts.adb, opts.serial))
+
+    try:
+        driver.run(opts.apk, app_id, opts.out, opts.boot_timeout, opts.start_timeout, opts.shots,
+                   opts.settle_timeout, opts.change_timeout)
+    except DriverError as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        print(driver.summary(), file=sys.stderr)
+        return 1
+    print(driver.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
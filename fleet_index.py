@@ -0,0 +1,438 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import config_core
+import tracing
+from config_core import expand_files, SERIAL_THRESHOLD
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.path.join(".appforge", "fleet-index.json")
+
+# Columns hold one value per row; string columns store ids into the interned string table
+STRING_COLUMNS = ('appId', 'appName', 'version', 'scheme', 'host')
+INT_COLUMNS = ('versionCode', 'minSdk', 'targetSdk', 'compileSdk', 'paths')
+FLAGS = ('deepLinks', 'compile', 'emulator')
+ROW_FIELDS = STRING_COLUMNS + INT_COLUMNS + FLAGS + ('permissions',)
+
+_WHERE = re.compile(r'^\s*(\w+)\s*(<=|>=|==|!=|<|>|=)\s*(.*?)\s*$')
+_COMPARE = {
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b,
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+
+def config_row(config):
+    config = config_core.normalize_config(config)
+    android = config['android']
+    deeplinks = config['deepLinks']
+    build = config['build']
+    return (
+        config['appId'], config['appName'], config['version'], deeplinks['scheme'], deeplinks['host'],
+        config['versionCode'], android['minSdkVersion'], android['targetSdkVersion'],
+        android['compileSdkVersion'], len(deeplinks['paths']),
+        deeplinks['enabled'], build['compile'], build['emulator'],
+        tuple(dict.fromkeys(android['permissions'])),
+    )
+
+
+def scan_file(path):
+    try:
+        st = os.stat(path)
+        return path, [st.st_mtime_ns, st.st_size], config_row(config_core.load_config(path)), None
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+def scan_files(files, jobs=None):
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(files) < SERIAL_THRESHOLD:
+        return [scan_file(path) for path in files]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(scan_file, files, chunksize=chunksize))
+
+
+def bit_positions(mask):
+    bits = bin(mask)[:1:-1]
+    i = bits.find('1')
+    while i != -1:
+        yield i
+        i = bits.find('1', i + 1)
+
+
+def permission_name(name):
+    return name if '.' in name else config_core.PERMISSION_PREFIX + name
+
+
+class FleetIndex:
+    def __init__(self, data=None):
+        data = data or {}
+        self.sources = data.get('sources', [])
+        self.files = data.get('files', [])
+        self.stats = data.get('stats', [])
+        self.strings = data.get('strings', [])
+        self.columns = data.get('columns', {name: [] for name in STRING_COLUMNS + INT_COLUMNS})
+        self.perms = {sid: int(bits, 16) for sid, bits in data.get('perms', [])}
+        self.flags = {flag: int(data.get('flags', {}).get(flag, '0'), 16) for flag in FLAGS}
+        self.errors = data.get('errors', {})
+        self._ids = None
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        return cls(data) if data.get('version') == INDEX_VERSION else cls()
+
+    @classmethod
+    def from_rows(cls, sources, entries, errors):
+        # entries: (path, stat, row) in row order; strings are re-interned so
+        # values no longer referenced by any row drop out of the table
+        index = cls({'sources': sources, 'errors': errors})
+        for path, stat, row in entries:
+            record = dict(zip(ROW_FIELDS, row))
+            bit = 1 << len(index.files)
+            index.files.append(path)
+            index.stats.append(stat)
+            for name in STRING_COLUMNS:
+                index.columns[name].append(index.intern(record[name]))
+            for name in INT_COLUMNS:
+                index.columns[name].append(record[name])
+            for flag in FLAGS:
+                if record[flag]:
+                    index.flags[flag] |= bit
+            for perm in record['permissions']:
+                sid = index.intern(perm)
+                index.perms[sid] = index.perms.get(sid, 0) | bit
+        return index
+
+    def to_json(self):
+        return {
+            'version': INDEX_VERSION,
+            'sources': self.sources,
+            'files': self.files,
+            'stats': self.stats,
+            'strings': self.strings,
+            'columns': self.columns,
+            'perms': [[sid, format(bits, 'x')] for sid, bits in sorted(self.perms.items())],
+            'flags': {flag: format(bits, 'x') for flag, bits in self.flags.items()},
+            'errors': self.errors,
+        }
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = json.dumps(self.to_json(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        config_core.atomic_write(path, data)
+
+    def intern(self, value):
+        if self._ids is None:
+            self._ids = {s: i for i, s in enumerate(self.strings)}
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def string_id(self, value):
+        if self._ids is None:
+            self._ids = {s: i for i, s in enumerate(self.strings)}
+        return self._ids.get(value)
+
+    def __len__(self):
+        return len(self.files)
+
+    def rows(self):
+        perms_by_row = [[] for _ in self.files]
+        for sid, bits in self.perms.items():
+            for row in bit_positions(bits):
+                perms_by_row[row].append(self.strings[sid])
+        for row, path in enumerate(self.files):
+            bit = 1 << row
+            values = [self.strings[self.columns[name][row]] for name in STRING_COLUMNS]
+            values += [self.columns[name][row] for name in INT_COLUMNS]
+            values += [bool(self.flags[flag] & bit) for flag in FLAGS]
+            yield path, self.stats[row], tuple(values) + (tuple(sorted(perms_by_row[row])),)
+
+    def record(self, row):
+        bit = 1 << row
+        record = {'file': self.files[row]}
+        record.update({name: self.strings[self.columns[name][row]] for name in STRING_COLUMNS})
+        record.update({name: self.columns[name][row] for name in INT_COLUMNS})
+        record.update({flag: bool(self.flags[flag] & bit) for flag in FLAGS})
+        return record
+
+    def all_rows(self):
+        return (1 << len(self.files)) - 1
+
+    def where(self, mask, field, op, raw):
+        if field in FLAGS:
+            if op not in ('=', '==', '!='):
+                raise ValueError(f"'{field}' solo admite = y !=")
+            value = raw.lower() in ('true', '1', 'si', 'yes')
+            bits = self.flags[field] if value == (op in ('=', '==')) else ~self.flags[field]
+            return mask & bits
+        column = self.columns.get(field)
+        if column is None:
+            raise ValueError(f"campo desconocido '{field}'")
+        compare = _COMPARE[op]
+        if field in STRING_COLUMNS:
+            if op not in ('=', '==', '!='):
+                raise ValueError(f"'{field}' solo admite = y !=")
+            sid = self.string_id(raw)
+            target = -1 if sid is None else sid
+        else:
+            target = int(raw)
+        result = 0
+        for row in bit_positions(mask):
+            if compare(column[row], target):
+                result |= 1 << row
+        return result
+
+    def query(self, with_perms=(), without_perms=(), conditions=()):
+        # Bitset work first (cheap whole-fleet ANDs), then column scans only over surviving rows
+        mask = self.all_rows()
+        for perm in with_perms:
+            sid = self.string_id(permission_name(perm))
+            mask &= self.perms.get(sid, 0) if sid is not None else 0
+        for perm in without_perms:
+            sid = self.string_id(permission_name(perm))
+            if sid is not None:
+                mask &= ~self.perms.get(sid, 0)
+        for condition in conditions:
+            match = _WHERE.match(condition)
+            if not match:
+                raise ValueError(f"condicion invalida '{condition}' (ej: targetSdk<34)")
+            mask = self.where(mask, *match.groups())
+        return list(bit_positions(mask))
+
+    def value_counts(self, field):
+        counts = {}
+        for sid in self.columns[field]:
+            counts[self.strings[sid]] = counts.get(self.strings[sid], 0) + 1
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def permission_counts(self):
+        counts = [(self.strings[sid], bin(bits).count('1')) for sid, bits in self.perms.items()]
+        return sorted(counts, key=lambda item: (-item[1], item[0]))
+
+
+@tracing.traced('fleet.update')
+def update_index(path, patterns=None, jobs=None):
+    old = FleetIndex.load(path)
+    patterns = patterns or old.sources
+    known = dict(zip(old.files, old.stats))
+
+    current = {}
+    stale = []
+    for file in expand_files(patterns):
+        try:
+            st = os.stat(file)
+        except OSError:
+            continue
+        current[file] = [st.st_mtime_ns, st.st_size]
+        if known.get(file) != current[file]:
+            stale.append(file)
+
+    errors = {}
+    scanned = {}
+    for file, stat, row, error in scan_files(stale, jobs):
+        if error:
+            errors[file] = error
+        else:
+            scanned[file] = (stat, row)
+
+    removed = len(set(known) - set(current))
+    stats = {'scanned': len(stale), 'reused': len(current) - len(stale), 'removed': removed, 'errors': len(errors)}
+    if not scanned and not removed and patterns == old.sources and errors == old.errors:
+        return old, stats
+
+    # Only decode the old index once something actually changed
+    stale = set(stale)
+    entries = {file: (stat, row) for file, stat, row in old.rows() if file in current and file not in stale}
+    entries.update(scanned)
+    index = FleetIndex.from_rows(patterns, [(f, s, r) for f, (s, r) in sorted(entries.items())], errors)
+    index.save(path)
+    return index, stats
+
+
+def cold_scan(files, with_perms, target_below):
+    # What answering a query costs without the index: parse every file
+    wanted = [permission_name(p) for p in with_perms]
+    hits = []
+    for path in files:
+        config = config_core.normalize_config(config_core.load_config(path))
+        perms = config['android']['permissions']
+        if all(p in perms for p in wanted) and config['android']['targetSdkVersion'] < target_below:
+            hits.append(path)
+    return hits
+
+
+def synthetic_fleet(directory, count, seed=1):
+    rng = random.Random(seed)
+    base = config_core.normalize_config(config_core.load_config(config_core.DEFAULT_CONFIG_PATH)
+                                        if os.path.exists(config_core.DEFAULT_CONFIG_PATH) else {})
+    pool = [config_core.PERMISSION_PREFIX + name for name in (
+        "INTERNET", "ACCESS_NETWORK_STATE", "CAMERA", "RECORD_AUDIO", "ACCESS_FINE_LOCATION",
+        "ACCESS_COARSE_LOCATION", "READ_CONTACTS", "POST_NOTIFICATIONS", "VIBRATE", "BLUETOOTH_CONNECT",
+        "READ_MEDIA_IMAGES", "NFC", "USE_BIOMETRIC", "WAKE_LOCK", "FOREGROUND_SERVICE")]
+    hosts = [f"cliente{i}.ejemplo.com" for i in range(40)] + ['']
+    files = []
+    for i in range(count):
+        config = json.loads(json.dumps(base))
+        config['appId'] = f"com.flota.cliente{i}"
+        config['appName'] = f"Cliente {i}"
+        config['versionCode'] = rng.randint(1, 400)
+        config['android']['minSdkVersion'] = rng.choice([21, 23, 24, 26, 28])
+        config['android']['targetSdkVersion'] = rng.choice([31, 32, 33, 34, 35])
+        config['android']['permissions'] = pool[:2] + rng.sample(pool[2:], rng.randint(0, 6))
+        config['deepLinks']['host'] = rng.choice(hosts)
+        config['deepLinks']['enabled'] = bool(config['deepLinks']['host'])
+        config['build']['emulator'] = rng.random() < 0.1
+        path = os.path.join(directory, f"cliente{i:05d}", "app.config.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(config_core.dump_config(config))
+        files.append(path)
+    return files
+
+
+def benchmark(count, jobs=None):
+    with tempfile.TemporaryDirectory(prefix="appforge-fleet-") as directory:
+        files = synthetic_fleet(directory, count)
+        pattern = os.path.join(directory, "*", "app.config.json")
+        index_path = os.path.join(directory, "fleet-index.json")
+
+        started = time.perf_counter()
+        cold = cold_scan(files, ["CAMERA"], 34)
+        cold_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        update_index(index_path, [pattern], jobs)
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, stats = update_index(index_path, [pattern], jobs)
+        refresh_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = FleetIndex.load(index_path)
+        load_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        hits = index.query(["CAMERA"], conditions=["targetSdk<34"])
+        query_s = time.perf_counter() - started
+
+        size_kb = os.path.getsize(index_path) / 1024
+        assert sorted(index.files[row] for row in hits) == sorted(cold)
+        print(f"{count} configs, consulta: CAMERA y targetSdk<34 -> {len(hits)} apps")
+        print(f"escaneo en frio:          {cold_s * 1000:9.1f} ms")
+        print(f"crear indice:             {build_s * 1000:9.1f} ms  ({size_kb:.0f} KB)")
+        print(f"actualizar (sin cambios): {refresh_s * 1000:9.1f} ms  ({stats['reused']} sin reparsear)")
+        print(f"cargar indice:            {load_s * 1000:9.1f} ms")
+        print(f"consulta con indice:      {query_s * 1000:9.3f} ms  "
+              f"({cold_s / (load_s + query_s):.0f}x mas rapido que el escaneo, incluyendo la carga)")
+        return {'count': count, 'cold_s': cold_s, 'build_s': build_s, 'refresh_s': refresh_s,
+                'load_s': load_s, 'query_s': query_s}
+
+
+def print_rows(index, rows, as_json):
+    if as_json:
+        print(json.dumps([index.record(row) for row in rows], ensure_ascii=False, indent=2))
+        return
+    for row in rows:
+        record = index.record(row)
+        print(f"{record['appId']:<36} sdk {record['minSdk']}-{record['targetSdk']}  {record['file']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fleet_index.py",
+        description="Indice de muchos app.config.json para consultas rapidas (permisos, SDK, deep links)."
+    )
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help=f"Archivo de indice (por defecto: {DEFAULT_INDEX_PATH})")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    tracing.add_argument(parser)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('build', help="Crea o actualiza el indice (solo reparsea archivos modificados)")
+    p.add_argument('files', nargs='*', help="Globs de archivos (por defecto: los del indice existente)")
+
+    for name, text in (('query', "Lista apps que cumplen todos los filtros"),
+                       ('hosts', "Hosts de deep links en uso"),
+                       ('perms', "Permisos mas usados")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('--refresh', action='store_true',
+                       help="Revisa cambios en disco antes de consultar (hace stat de cada archivo indexado)")
+        if name == 'query':
+            p.add_argument('--perm', action='append', default=[], help="Requiere el permiso (ej: CAMERA)")
+            p.add_argument('--without', action='append', default=[], help="Excluye apps con el permiso")
+            p.add_argument('--where', action='append', default=[],
+                           help="Condicion campo<op>valor, ej: targetSdk<34, host=miapp.com, emulator=true")
+            p.add_argument('--count', action='store_true', help="Solo muestra el total")
+            p.add_argument('--json', action='store_true')
+
+    p = sub.add_parser('bench', help="Compara escaneo en frio contra consulta con indice")
+    p.add_argument('--count', type=int, default=10000)
+
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    if opts.command == 'bench':
+        benchmark(opts.count, opts.jobs)
+        return 0
+
+    if opts.command == 'build':
+        started = time.perf_counter()
+        index, stats = update_index(opts.index, opts.files or None, opts.jobs)
+        for file, error in sorted(index.errors.items()):
+            print(f"{file}: ERROR {error}", file=sys.stderr)
+        print(f"{len(index)} configs en {opts.index}: {stats['scanned']} leidos, {stats['reused']} sin cambios, "
+              f"{stats['removed']} eliminados, {stats['errors']} con errores "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return 1 if index.errors else 0
+
+    if opts.refresh:
+        index, _ = update_index(opts.index, None, opts.jobs)
+    else:
+        index = FleetIndex.load(opts.index)
+    if not len(index):
+        print(f"Indice vacio: crea uno con 'fleet_index.py build \"clientes/**/app.config.json\"'", file=sys.stderr)
+        return 1
+
+    if opts.command == 'hosts':
+        for host, count in index.value_counts('host'):
+            print(f"{count:>7}  {host or '(sin host)'}")
+    elif opts.command == 'perms':
+        for perm, count in index.permission_counts():
+            print(f"{count:>7}  {perm}")
+    else:
+        try:
+            rows = index.query(opts.perm, opts.without, opts.where)
+        except ValueError as e:
+            print(f"ERROR {e}", file=sys.stderr)
+            return 2
+        if opts.count:
+            print(len(rows))
+        else:
+            print_rows(index, rows, opts.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
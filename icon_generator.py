@@ -0,0 +1,341 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+from build_planner import hash_file
+import tracing
+
+GENERATOR_VERSION = 1
+DEFAULT_RES_DIR = os.path.join("android", "app", "src", "main", "res")
+DEFAULT_CACHE_DIR = os.path.join(".appforge", "res-cache")
+
+DENSITIES = ['ldpi', 'mdpi', 'hdpi', 'xhdpi', 'xxhdpi', 'xxxhdpi']
+
+ICON_SIZES = {'ldpi': 36, 'mdpi': 48, 'hdpi': 72, 'xhdpi': 96, 'xxhdpi': 144, 'xxxhdpi': 192}
+ADAPTIVE_SIZES = {'ldpi': 81, 'mdpi': 108, 'hdpi': 162, 'xhdpi': 216, 'xxhdpi': 324, 'xxxhdpi': 432}
+SPLASH_LAND_SIZES = {
+    'ldpi': (320, 200), 'mdpi': (480, 320), 'hdpi': (800, 480),
+    'xhdpi': (1280, 720), 'xxhdpi': (1600, 960), 'xxxhdpi': (1920, 1280),
+}
+
+# The adaptive icon safe zone is the inner 66dp of the 108dp canvas
+FOREGROUND_SCALE = 66 / 108
+
+ADAPTIVE_ICON_XML = """<?xml version="1.0" encoding="utf-8"?>
+<adaptive-icon xmlns:android="http://schemas.android.com/apk/res/android">
+    <background android:drawable="@mipmap/ic_launcher_background"/>
+    <foreground android:drawable="@mipmap/ic_launcher_foreground"/>
+</adaptive-icon>
+"""
+
+
+def parse_color(value):
+    value = value.lstrip('#')
+    if len(value) == 3:
+        value = ''.join(c * 2 for c in value)
+    if len(value) == 6:
+        value += 'ff'
+    return tuple(int(value[i:i + 2], 16) for i in range(0, 8, 2))
+
+
+def find_sources(assets_dir):
+    def pick(*names):
+        for name in names:
+            path = os.path.join(assets_dir, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    icon = pick('icon-only.png', 'icon.png', 'logo.png')
+    background = pick('icon-background.png')
+    return {
+        'icon': icon,
+        'foreground': pick('icon-foreground.png') or icon,
+        'background': background,
+        'background_dark': pick('icon-background-dark.png') or background,
+        'splash': pick('splash.png'),
+        'splash_dark': pick('splash-dark.png'),
+        'logo': pick('logo.png') or icon,
+        'logo_dark': pick('logo-dark.png') or pick('logo.png') or icon,
+    }
+
+
+def plan_jobs(sources, opts):
+    jobs = []
+
+    def add(kind, source, size, out_rel, **params):
+        jobs.append({'kind': kind, 'source': source, 'size': size, 'out': out_rel, 'params': params})
+
+    if sources['icon']:
+        for d in DENSITIES:
+            s = ICON_SIZES[d]
+            add('icon', sources['icon'], (s, s), f"mipmap-{d}/ic_launcher.png")
+            add('icon_round', sources['icon'], (s, s), f"mipmap-{d}/ic_launcher_round.png")
+            a = ADAPTIVE_SIZES[d]
+            add('foreground', sources['foreground'], (a, a), f"mipmap-{d}/ic_launcher_foreground.png")
+            if sources['background']:
+                add('cover', sources['background'], (a, a), f"mipmap-{d}/ic_launcher_background.png")
+                add('cover', sources['background_dark'], (a, a), f"mipmap-night-{d}/ic_launcher_background.png")
+            else:
+                add('fill', None, (a, a), f"mipmap-{d}/ic_launcher_background.png",
+                    color=opts.iconBackgroundColor)
+                add('fill', None, (a, a), f"mipmap-night-{d}/ic_launcher_background.png",
+                    color=opts.iconBackgroundColorDark)
+
+    for d in DENSITIES:
+        land = SPLASH_LAND_SIZES[d]
+        port = (land[1], land[0])
+        for orientation, size in (('land', land), ('port', port)):
+            targets = [(f"drawable-{orientation}-{d}/splash.png", False),
+                       (f"drawable-{orientation}-night-{d}/splash.png", True)]
+            if d == 'mdpi' and orientation == 'land':
+                targets += [("drawable/splash.png", False), ("drawable-night/splash.png", True)]
+            for out_rel, dark in targets:
+                if sources['splash']:
+                    source = sources['splash_dark'] if dark and sources['splash_dark'] else sources['splash']
+                    add('cover', source, size, out_rel)
+                elif sources['logo']:
+                    add('logo_splash', sources['logo_dark'] if dark else sources['logo'], size, out_rel,
+                        color=opts.splashBackgroundColorDark if dark else opts.splashBackgroundColor,
+                        scale=opts.logoSplashScale)
+    return jobs
+
+
+def job_key(job, digests):
+    payload = [GENERATOR_VERSION, job['kind'], digests.get(job['source']), list(job['size']),
+               sorted(job['params'].items())]
+    return hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+_SOURCE_CACHE = {}
+
+
+def open_source(path):
+    image = _SOURCE_CACHE.get(path)
+    if image is None:
+        image = Image.open(path)
+        image.load()
+        image = image.convert('RGBA')
+        _SOURCE_CACHE[path] = image
+    return image
+
+
+def fit(image, size):
+    return image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+
+def cover(image, size):
+    w, h = size
+    scale = max(w / image.width, h / image.height)
+    crop_w, crop_h = w / scale, h / scale
+    left = (image.width - crop_w) / 2
+    top = (image.height - crop_h) / 2
+    return image.resize(size, Image.LANCZOS, box=(left, top, left + crop_w, top + crop_h), reducing_gap=3.0)
+
+
+def centered(image, size, box_size, color):
+    canvas = Image.new('RGBA', size, color)
+    ratio = min(box_size / image.width, box_size / image.height)
+    inner = fit(image, (max(1, round(image.width * ratio)), max(1, round(image.height * ratio))))
+    canvas.alpha_composite(inner, ((size[0] - inner.width) // 2, (size[1] - inner.height) // 2))
+    return canvas
+
+
+def render(job):
+    kind = job['kind']
+    size = tuple(job['size'])
+    params = job['params']
+    if kind == 'fill':
+        return Image.new('RGBA', size, parse_color(params['color']))
+    source = open_source(job['source'])
+    if kind == 'icon':
+        return fit(source, size)
+    if kind == 'icon_round':
+        icon = fit(source, size)
+        mask = Image.new('L', (size[0] * 4, size[1] * 4), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, mask.width - 1, mask.height - 1), fill=255)
+        alpha = Image.new('L', size, 0)
+        alpha.paste(icon.getchannel('A'), (0, 0), mask.resize(size, Image.LANCZOS))
+        icon.putalpha(alpha)
+        return icon
+    if kind == 'foreground':
+        return centered(source, size, round(size[0] * FOREGROUND_SCALE), (0, 0, 0, 0))
+    if kind == 'cover':
+        return cover(source, size)
+    if kind == 'logo_splash':
+        return centered(source, size, round(min(size) * params['scale']), parse_color(params['color']))
+    raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+
+
+def run_job(job, key, cache_dir):
+    cached = os.path.join(cache_dir, key + '.png')
+    if not os.path.isfile(cached):
+        image = render(job)
+        if job['kind'] in ('cover', 'logo_splash', 'fill') and image.getextrema()[3][0] == 255:
+            image = image.convert('RGB')
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        image.save(tmp, 'PNG')
+        os.replace(tmp, cached)
+        return key, True
+    return key, False
+
+
+def _run_job_star(args):
+    return run_job(*args)
+
+
+@tracing.traced('icons.generate')
+def generate(assets_dir, res_dir, cache_dir, opts, jobs=None):
+    sources = find_sources(assets_dir)
+    planned = plan_jobs(sources, opts)
+    digests = {path: hash_file(path) for path in set(j['source'] for j in planned) if path}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'index.json')
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    stats = {'total': len(planned), 'unchanged': 0, 'copied': 0, 'rendered': 0, 'pruned': 0}
+    pending = []
+    keys = {}
+    for job in planned:
+        key = job_key(job, digests)
+        keys[job['out']] = key
+        out_path = os.path.join(res_dir, job['out'])
+        entry = index.get(job['out'])
+        if entry and entry[0] == key and os.path.isfile(out_path):
+            st = os.stat(out_path)
+            if [st.st_size, st.st_mtime_ns] == entry[1:]:
+                stats['unchanged'] += 1
+                continue
+        pending.append((job, key, cache_dir))
+
+    workers = jobs or os.cpu_count() or 1
+    to_render = []
+    seen = set()
+    for p in pending:
+        if p[1] not in seen and not os.path.isfile(os.path.join(cache_dir, p[1] + '.png')):
+            seen.add(p[1])
+            to_render.append(p)
+    if workers > 1 and len(to_render) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Heaviest (largest) outputs first so the pool drains evenly
+        to_render.sort(key=lambda p: -p[0]['size'][0] * p[0]['size'][1])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_job_star, to_render))
+    else:
+        results = [_run_job_star(p) for p in to_render]
+    stats['rendered'] = sum(1 for _, rendered in results if rendered)
+
+    for job, key, _ in pending:
+        out_path = os.path.join(res_dir, job['out'])
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        shutil.copyfile(os.path.join(cache_dir, key + '.png'), out_path)
+        st = os.stat(out_path)
+        index[job['out']] = [key, st.st_size, st.st_mtime_ns]
+    stats['copied'] = len(pending) - len(results)
+
+    if sources['icon']:
+        for name in ('ic_launcher.xml', 'ic_launcher_round.xml'):
+            xml_path = os.path.join(res_dir, 'mipmap-anydpi-v26', name)
+            os.makedirs(os.path.dirname(xml_path), exist_ok=True)
+            try:
+                with open(xml_path, 'r', encoding='utf-8') as f:
+                    current = f.read()
+            except OSError:
+                current = None
+            if current != ADAPTIVE_ICON_XML:
+                with open(xml_path, 'w', encoding='utf-8') as f:
+                    f.write(ADAPTIVE_ICON_XML)
+
+    index = {out: entry for out, entry in index.items() if out in keys}
+    tmp = index_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, index_path)
+
+    # Renders no output refers to any more (old source icons, changed colors)
+    live = set(keys.values())
+    for name in os.listdir(cache_dir):
+        if name.endswith('.png') and name[:-4] not in live:
+            os.remove(os.path.join(cache_dir, name))
+            stats['pruned'] += 1
+    return stats
+
+
+def benchmark(assets_dir, opts):
+    import tempfile
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, jobs, fresh_cache, fresh_res in (
+            ("en frio, en serie", 1, True, True),
+            (f"en frio, en paralelo ({os.cpu_count() or 1} procesos)", None, True, True),
+            ("con cache, res/ vacio", None, False, True),
+            ("res/ sin cambios", None, False, False),
+        ):
+            cache_dir = os.path.join(tmp, 'cache')
+            res_dir = os.path.join(tmp, 'res')
+            if fresh_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            if fresh_res:
+                shutil.rmtree(res_dir, ignore_errors=True)
+            _SOURCE_CACHE.clear()
+            started = time.perf_counter()
+            stats = generate(assets_dir, res_dir, cache_dir, opts, jobs=jobs)
+            rows.append((label, time.perf_counter() - started, stats))
+    for label, elapsed, stats in rows:
+        print(f"{label:<28} {elapsed * 1000:9.1f} ms  "
+              f"generados={stats['rendered']} copiados={stats['copied']} sin cambios={stats['unchanged']}")
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="icon_generator.py",
+        description="Genera los iconos y splash screens de Android para todas las densidades."
+    )
+    parser.add_argument('--assets', default='assets', help="Directorio de imagenes fuente")
+    parser.add_argument('--res', default=DEFAULT_RES_DIR, help="Directorio res/ de Android a escribir")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Directorio de cache de imagenes generadas")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('--iconBackgroundColor', default='#ffffff')
+    parser.add_argument('--iconBackgroundColorDark', default='#111111')
+    parser.add_argument('--splashBackgroundColor', default='#ffffff')
+    parser.add_argument('--splashBackgroundColorDark', default='#111111')
+    parser.add_argument('--logoSplashScale', type=float, default=0.3)
+    parser.add_argument('--benchmark', action='store_true', help="Mide ejecuciones en frio, en paralelo y con cache en un directorio temporal")
+    tracing.add_argument(parser)
+    return parser
+
+
+def main(argv=None):
+    opts = build_parser().parse_args(argv)
+    tracing.configure(opts)
+    if opts.benchmark:
+        benchmark(opts.assets, opts)
+        return 0
+
+    started = time.perf_counter()
+    stats = generate(opts.assets, opts.res, opts.cache, opts, jobs=opts.jobs)
+    if not stats['total']:
+        print(f"ERROR no hay imagenes de icono ni splash en {opts.assets}/", file=sys.stderr)
+        return 1
+    print(f"{stats['total']} recursos: {stats['rendered']} generados, {stats['copied']} desde cache, "
+          f"{stats['unchanged']} sin cambios, {stats['pruned']} eliminados de cache "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
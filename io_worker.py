@@ -0,0 +1,129 @@
+import collections
+import itertools
+import queue
+import threading
+import time
+
+POLL_INTERVAL_MS = 15
+
+
+class IOWorker:
+    # Runs file I/O and parsing on one background thread. Results come back
+    # through a queue polled with root.after, so callbacks always run on the Tk
+    # thread. Each job belongs to a channel ('load', 'save', ...); submitting
+    # again on a channel supersedes the older job: it is skipped if it has not
+    # started yet and its result is dropped if it has.
+    def __init__(self, root, poll_ms=POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.current = {}
+        self.inflight = collections.Counter()
+        self.polling = False
+        self._tickets = itertools.count(1)
+        self.thread = threading.Thread(target=self._run, name="appforge-io", daemon=True)
+        self.thread.start()
+
+    def submit(self, channel, fn, on_done, on_error=None):
+        ticket = next(self._tickets)
+        self.current[channel] = ticket
+        self.inflight[channel] += 1
+        self.jobs.put((channel, ticket, fn, on_done, on_error))
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return ticket
+
+    def cancel(self, channel):
+        self.current[channel] = next(self._tickets)
+
+    @property
+    def pending(self):
+        return sum(self.inflight.values())
+
+    def busy(self, *channels):
+        return any(self.inflight[channel] for channel in channels or list(self.inflight))
+
+    def close(self):
+        self.jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            channel, ticket, fn, on_done, on_error = job
+            if self.current.get(channel) != ticket:
+                self.results.put((channel, ticket, None, None, None, None))
+                continue
+            try:
+                result, error = fn(), None
+            except Exception as e:
+                result, error = None, e
+            self.results.put((channel, ticket, result, error, on_done, on_error))
+
+    def _dispatch(self, item):
+        channel, ticket, result, error, on_done, on_error = item
+        self.inflight[channel] -= 1
+        if self.current.get(channel) != ticket:
+            return
+        if error is not None:
+            if on_error is None:
+                raise error
+            on_error(error)
+        else:
+            on_done(result)
+
+    def _poll(self):
+        try:
+            while True:
+                self._dispatch(self.results.get_nowait())
+        except queue.Empty:
+            pass
+        finally:
+            if self.pending:
+                self.root.after(self.poll_ms, self._poll)
+            else:
+                self.polling = False
+
+    def wait(self, timeout=None):
+        # Blocks the caller until every submitted job has been dispatched; for
+        # scripts and benchmarks, never for UI code
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            self._dispatch(self.results.get(timeout=remaining))
+
+
+class StallMeter:
+    # Schedules a tick every `interval_ms` and records how late each one runs;
+    # the worst lateness is the longest the main loop went without servicing events
+    def __init__(self, root, interval_ms=5):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_stall_ms = 0.0
+        self.ticks = 0
+        self.running = False
+        self._expected = 0.0
+
+    def start(self):
+        self.running = True
+        self.max_stall_ms = 0.0
+        self.ticks = 0
+        self._schedule()
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        if not self.running:
+            return
+        self.ticks += 1
+        self.max_stall_ms = max(self.max_stall_ms, (time.perf_counter() - self._expected) * 1000)
+        self._schedule()
+
+    def stop(self):
+        self.running = False
+        return self.max_stall_ms
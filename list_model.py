@@ -0,0 +1,68 @@
+import re
+
+_BULK_SPLIT = re.compile(r'[\s,;]+')
+
+
+def parse_bulk(text):
+    return [item for item in _BULK_SPLIT.split(text) if item]
+
+
+class ListModel:
+    # Observers get (event, index, count) with event in 'insert', 'remove', 'reset'
+    def __init__(self, items=()):
+        self.items = []
+        self._members = set()
+        self._observers = []
+        self.extend(items)
+
+    def subscribe(self, callback):
+        self._observers.append(callback)
+
+    def _notify(self, event, index, count):
+        for callback in self._observers:
+            callback(event, index, count)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def append(self, item):
+        return bool(self.extend([item]))
+
+    def extend(self, items):
+        added = []
+        for item in items:
+            if item not in self._members:
+                self._members.add(item)
+                added.append(item)
+        if added:
+            index = len(self.items)
+            self.items.extend(added)
+            self._notify('insert', index, len(added))
+        return added
+
+    def remove(self, item):
+        if item not in self._members:
+            return False
+        index = self.items.index(item)
+        del self.items[index]
+        self._members.discard(item)
+        self._notify('remove', index, 1)
+        return True
+
+    def replace(self, items):
+        self.items = []
+        self._members = set()
+        for item in items:
+            if item not in self._members:
+                self._members.add(item)
+                self.items.append(item)
+        self._notify('reset', 0, len(self.items))
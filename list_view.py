@@ -0,0 +1,179 @@
+import argparse
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from list_model import ListModel
+
+ROW_HEIGHT = 22
+
+
+class VirtualList:
+    # Keeps only enough row widgets to fill the viewport and re-targets them
+    # on scroll or model changes, so cost does not grow with the list length.
+    def __init__(self, parent, model, make_row, fill_row, height=140, row_height=ROW_HEIGHT):
+        self.model = model
+        self.make_row = make_row
+        self.fill_row = fill_row
+        self.row_height = row_height
+        self.rows = []
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, bg='#f5f5f5', highlightthickness=0, height=height,
+                                yscrollincrement=row_height)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.bind_wheel(self.canvas)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        model.subscribe(self.on_change)
+        self.on_change('reset', 0, len(model))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        widget.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def on_change(self, event, index, count):
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.model) * self.row_height))
+        if event == 'reset':
+            self.canvas.yview_moveto(0)
+            self.render(force=True)
+        elif index < self.first_visible() + len(self.rows):
+            self.render()
+
+    def first_visible(self):
+        return int(self.canvas.canvasy(0)) // self.row_height
+
+    def _new_row(self):
+        row = self.make_row(self.canvas)
+        row['value'] = None
+        row['item'] = self.canvas.create_window((0, -self.row_height), window=row['frame'], anchor="nw",
+                                                height=self.row_height)
+        self.bind_wheel(row['frame'])
+        for child in row['frame'].winfo_children():
+            self.bind_wheel(child)
+        return row
+
+    def render(self, force=False):
+        canvas = self.canvas
+        visible = max(canvas.winfo_height(), int(canvas.cget('height'))) // self.row_height + 2
+        while len(self.rows) < visible:
+            self.rows.append(self._new_row())
+
+        first = self.first_visible()
+        width = max(canvas.winfo_width(), 1)
+        total = len(self.model)
+        for offset, row in enumerate(self.rows):
+            index = first + offset
+            if index >= total:
+                if row['value'] is not None:
+                    row['value'] = None
+                    canvas.coords(row['item'], 0, -self.row_height)
+                continue
+            value = self.model[index]
+            if force or row['value'] != value:
+                row['value'] = value
+                self.fill_row(row, value)
+            canvas.coords(row['item'], 0, index * self.row_height)
+            canvas.itemconfigure(row['item'], width=width)
+
+
+def _rebuild_list(frame, items):
+    for widget in frame.winfo_children():
+        widget.destroy()
+    for item in items:
+        row = ttk.Frame(frame)
+        row.pack(fill=tk.X, pady=2)
+        ttk.Label(row, text=item).pack(side=tk.LEFT)
+        ttk.Button(row, text="x", width=3).pack(side=tk.RIGHT)
+
+
+def _text_row(parent):
+    row = {'frame': ttk.Frame(parent)}
+    row['label'] = ttk.Label(row['frame'])
+    row['label'].pack(side=tk.LEFT)
+    ttk.Button(row['frame'], text="x", width=3).pack(side=tk.RIGHT)
+    return row
+
+
+def _fill_text_row(row, value):
+    row['label'].configure(text=value)
+
+
+def _timed(root, fn):
+    started = time.perf_counter()
+    fn()
+    root.update_idletasks()
+    return (time.perf_counter() - started) * 1000
+
+
+def benchmark(sizes, legacy_limit, legacy_ops=20):
+    root = tk.Tk()
+    root.withdraw()
+    results = []
+    for size in sizes:
+        items = [f"/campania/{i}/:id" for i in range(size)]
+        frame = ttk.Frame(root)
+        frame.pack()
+        model = ListModel()
+        view = VirtualList(frame, model, _text_row, _fill_text_row)
+        view.pack(fill=tk.BOTH)
+
+        load = _timed(root, lambda: model.replace(items))
+        model.replace([])
+        add = _timed(root, lambda: [model.append(item) for item in items]) / size
+        remove = _timed(root, lambda: [model.remove(item) for item in reversed(items)]) / size
+        bulk = _timed(root, lambda: model.extend(items))
+        result = {'size': size, 'load_ms': load, 'add_ms': add, 'remove_ms': remove, 'bulk_ms': bulk}
+        line = (f"{size:>6} paths | carga {load:8.1f} ms | agregar {add:6.3f} ms/op | "
+                f"quitar {remove:6.3f} ms/op | pegado masivo {bulk:6.1f} ms")
+
+        if size <= legacy_limit:
+            # The old editor rebuilt every row on each change: time a load and
+            # the last few single adds at this size
+            legacy = ttk.Frame(root)
+            legacy.pack()
+            ops = min(legacy_ops, size)
+            result['legacy_load_ms'] = _timed(root, lambda: _rebuild_list(legacy, items))
+            result['legacy_add_ms'] = _timed(
+                root, lambda: [_rebuild_list(legacy, items[:n]) for n in range(size - ops + 1, size + 1)]) / ops
+            legacy.destroy()
+            line += f" | reconstruir: carga {result['legacy_load_ms']:8.1f} ms, agregar {result['legacy_add_ms']:8.1f} ms/op"
+        frame.destroy()
+        results.append(result)
+        print(line)
+    root.destroy()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="list_view.py",
+        description="Compara las listas virtualizadas del editor con una lista que se destruye y reconstruye."
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000],
+                        help="Tamanos de lista a medir (por defecto: 10 1000 10000)")
+    parser.add_argument('--legacy-limit', type=int, default=1000,
+                        help="Tamano maximo al que tambien se mide la reconstruccion completa anterior (es O(n^2))")
+    opts = parser.parse_args(argv)
+    try:
+        benchmark(opts.sizes, opts.legacy_limit)
+    except tk.TclError as e:
+        print(f"ERROR Tk no disponible ({e}); ejecuta con pantalla o con xvfb-run", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import config_core
+import tracing
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+A = f"{{{ANDROID_NS}}}"
+
+DEFAULT_MANIFEST = os.path.join("android", "app", "src", "main", "AndroidManifest.xml")
+DEFAULT_STYLES = os.path.join("android", "app", "src", "main", "res", "values", "styles.xml")
+
+ACTION_VIEW = "android.intent.action.VIEW"
+CATEGORY_BROWSABLE = "android.intent.category.BROWSABLE"
+
+SPLASH_STYLE_NAME = "AppTheme.NoActionBarLaunch"
+SPLASH_STYLE_PARENT = "Theme.SplashScreen"
+SPLASH_STYLE_ITEMS = [
+    ("windowSplashScreenBackground", "@drawable/splash"),
+    ("windowSplashScreenAnimatedIcon", "@drawable/splash"),
+    ("windowSplashScreenAnimationDuration", "200"),
+    ("postSplashScreenTheme", "@style/AppTheme"),
+]
+
+# Comment placed right before every <uses-permission> and deep link <intent-filter>
+# the patcher adds, so it can remove them again once dropped from app.config.json.
+# Elements without the marker (template or hand-written) are never touched
+PATCH_MARKER = "appforge"
+
+_XMLNS = re.compile(rb'xmlns:([\w.-]+)\s*=\s*["\']([^"\']+)["\']')
+
+
+def parse_xml(data):
+    for prefix, uri in _XMLNS.findall(data):
+        ET.register_namespace(prefix.decode(), uri.decode())
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    return ET.fromstring(data, parser=parser)
+
+
+def serialize_xml(root):
+    ET.indent(root, space="    ")
+    body = ET.tostring(root, encoding='unicode')
+    return ('<?xml version="1.0" encoding="utf-8"?>\n' + body + '\n').encode('utf-8')
+
+
+def _is_marker(el):
+    return el is not None and el.tag is ET.Comment and (el.text or '').strip() == PATCH_MARKER
+
+
+def _marked(parent, tag):
+    children = list(parent)
+    return [(prev, el) for prev, el in zip([None] + children, children) if el.tag == tag and _is_marker(prev)]
+
+
+def apply_permissions(root, permissions):
+    wanted = [perm for perm in dict.fromkeys(permissions) if perm]
+    children = list(root)
+    existing = set()
+    managed = {}
+    for prev, el in zip([None] + children, children):
+        if el.tag == 'uses-permission':
+            if _is_marker(prev):
+                managed[el.get(A + 'name')] = (prev, el)
+            else:
+                existing.add(el.get(A + 'name'))
+
+    removed = []
+    for perm, elements in managed.items():
+        if perm not in wanted or perm in existing:
+            for el in elements:
+                root.remove(el)
+            removed.append(perm)
+            existing.discard(perm)
+    existing.update(perm for perm in managed if perm not in removed)
+
+    added = []
+    for perm in wanted:
+        if perm not in existing:
+            existing.add(perm)
+            root.append(ET.Comment(f" {PATCH_MARKER} "))
+            ET.SubElement(root, 'uses-permission', {A + 'name': perm})
+            added.append(perm)
+    return added, removed
+
+
+def main_activity(root):
+    application = root.find('application')
+    if application is None:
+        return None
+    activities = application.findall('activity')
+    for activity in activities:
+        for intent in activity.findall('intent-filter'):
+            actions = {a.get(A + 'name') for a in intent.findall('action')}
+            if "android.intent.action.MAIN" in actions:
+                return activity
+    return activities[0] if activities else None
+
+
+def _is_deep_link_filter(intent):
+    actions = {a.get(A + 'name') for a in intent.findall('action')}
+    categories = {c.get(A + 'name') for c in intent.findall('category')}
+    return ACTION_VIEW in actions and CATEGORY_BROWSABLE in categories
+
+
+def _filter_signature(intent):
+    return (intent.get(A + 'autoVerify'),
+            tuple(tuple(sorted(d.attrib.items())) for d in intent.findall('data')))
+
+
+def deep_link_filters(deeplinks):
+    if not deeplinks.get('enabled'):
+        return []
+    scheme = deeplinks.get('scheme') or 'miapp'
+    host = deeplinks.get('host') or ''
+    filters = [(None, [{A + 'scheme': scheme}])]
+    if host:
+        filters.append(("true", [{A + 'scheme': 'https', A + 'host': host},
+                                 {A + 'scheme': 'http', A + 'host': host}]))
+    return filters
+
+
+def _build_filter(auto_verify, data_items):
+    intent = ET.Element('intent-filter', {A + 'autoVerify': auto_verify} if auto_verify else {})
+    ET.SubElement(intent, 'action', {A + 'name': ACTION_VIEW})
+    ET.SubElement(intent, 'category', {A + 'name': "android.intent.category.DEFAULT"})
+    ET.SubElement(intent, 'category', {A + 'name': CATEGORY_BROWSABLE})
+    for attrs in data_items:
+        ET.SubElement(intent, 'data', attrs)
+    return intent
+
+
+def apply_deep_links(root, deeplinks):
+    activity = main_activity(root)
+    if activity is None:
+        return False
+    managed = _marked(activity, 'intent-filter')
+    marked = {id(el) for _, el in managed}
+    others = {_filter_signature(el) for el in activity.findall('intent-filter')
+              if id(el) not in marked and _is_deep_link_filter(el)}
+    wanted = [intent for intent in (_build_filter(*spec) for spec in deep_link_filters(deeplinks))
+              if _filter_signature(intent) not in others]
+    if [_filter_signature(el) for _, el in managed] == [_filter_signature(el) for el in wanted]:
+        return False
+    for pair in managed:
+        for el in pair:
+            activity.remove(el)
+    for intent in wanted:
+        activity.append(ET.Comment(f" {PATCH_MARKER} "))
+        activity.append(intent)
+    return True
+
+
+def apply_splash_style(root):
+    wanted = ET.Element('style', {'name': SPLASH_STYLE_NAME, 'parent': SPLASH_STYLE_PARENT})
+    for name, value in SPLASH_STYLE_ITEMS:
+        ET.SubElement(wanted, 'item', {'name': name}).text = value
+
+    for index, style in enumerate(list(root)):
+        if style.tag == 'style' and style.get('name') == SPLASH_STYLE_NAME:
+            items = [(i.get('name'), (i.text or '').strip()) for i in style.findall('item')]
+            if style.get('parent') == SPLASH_STYLE_PARENT and items == SPLASH_STYLE_ITEMS:
+                return False
+            root.remove(style)
+            root.insert(index, wanted)
+            return True
+    root.append(wanted)
+    return True
+
+
+@tracing.traced('manifest.patch')
+def patch_manifest(data, config):
+    root = parse_xml(data)
+    android = config.get('android', {})
+    added, removed = apply_permissions(root, android.get('permissions', []))
+    links_changed = apply_deep_links(root, config.get('deepLinks', {}))
+    changes = [f"Permiso agregado: {perm}" for perm in added]
+    changes += [f"Permiso eliminado: {perm}" for perm in removed]
+    if links_changed:
+        changes.append("Intent-filters de deep links actualizados")
+    return (serialize_xml(root) if changes else data), changes
+
+
+@tracing.traced('manifest.styles')
+def patch_styles(data):
+    root = parse_xml(data)
+    if not apply_splash_style(root):
+        return data, []
+    return serialize_xml(root), [f"Estilo {SPLASH_STYLE_NAME} actualizado"]
+
+
+def run(config_path, manifest_path, styles_path, check=False):
+    config = config_core.load_config(config_path)
+    results = []
+    for path, patch in ((manifest_path, lambda d: patch_manifest(d, config)),
+                        (styles_path, patch_styles)):
+        if not path or not os.path.isfile(path):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        new_data, changes = patch(data)
+        if changes and not check:
+            config_core.atomic_write(path, new_data)
+        results.append((path, changes))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="manifest_patcher.py",
+        description="Aplica en una sola pasada los permisos, deep links y el estilo de splash de app.config.json."
+    )
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH, help="Config de la app")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help="AndroidManifest.xml a parchear")
+    parser.add_argument('--styles', default=DEFAULT_STYLES, help="styles.xml a parchear")
+    parser.add_argument('--check', action='store_true', help="Solo indica si hace falta reescribir (exit 1 si es asi)")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    results = run(opts.config, opts.manifest, opts.styles, check=opts.check)
+    if not results:
+        print("ERROR no se encontro AndroidManifest.xml ni styles.xml", file=sys.stderr)
+        return 1
+
+    pending = False
+    for path, changes in results:
+        if not changes:
+            print(f"{path}: al dia")
+            continue
+        pending = True
+        print(f"{path}: {'hay que reescribir' if opts.check else 'reescrito'}")
+        for change in changes:
+            print(f"  {change}")
+    return 1 if opts.check and pending else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+
+import config_core
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "android_permissions.json")
+
+PROTECTION_LABELS = {
+    'normal': "normal",
+    'dangerous': "peligroso",
+    'signature': "firma",
+    'privileged': "sistema",
+    'appop': "especial",
+    'role': "rol",
+}
+
+Permission = namedtuple('Permission', 'name short protection min_sdk max_sdk')
+
+
+def short_name(name):
+    return name.rsplit('.', 1)[-1]
+
+
+def normalize_query(query):
+    query = query.strip().lower().replace(' ', '_')
+    if query.startswith(config_core.PERMISSION_PREFIX.lower()):
+        query = query[len(config_core.PERMISSION_PREFIX):]
+    return query
+
+
+def describe(perm):
+    label = PROTECTION_LABELS.get(perm.protection, perm.protection)
+    if perm.min_sdk and perm.max_sdk:
+        return f"{label} · API {perm.min_sdk}-{perm.max_sdk}"
+    if perm.max_sdk:
+        return f"{label} · hasta API {perm.max_sdk}"
+    if perm.min_sdk and perm.min_sdk > 1:
+        return f"{label} · API {perm.min_sdk}+"
+    return label
+
+
+class PermissionCatalog:
+    def __init__(self, entries):
+        self.entries = [Permission(name, short_name(name), protection, min_sdk, max_sdk)
+                        for name, protection, min_sdk, max_sdk in entries]
+        self.by_name = {perm.name: perm for perm in self.entries}
+        self._keys = [perm.short.lower() for perm in self.entries]
+        self._everything = list(range(len(self.entries)))
+        self._last_query = ''
+        self._last_hits = self._everything
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['permissions'])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def search(self, query):
+        query = normalize_query(query)
+        if not query:
+            self._last_query, self._last_hits = '', self._everything
+            return self._everything
+        # Typing narrows the previous result, so only rescan those hits
+        candidates = self._last_hits if self._last_query in query else self._everything
+        keys = self._keys
+        hits = [i for i in candidates if query in keys[i]]
+        self._last_query, self._last_hits = query, hits
+        prefix = [i for i in hits if keys[i].startswith(query)]
+        if len(prefix) == len(hits):
+            return hits
+        rest = [i for i in hits if not keys[i].startswith(query)]
+        return prefix + rest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="permission_catalog.py",
+        description="Busca en el catalogo de permisos Android incluido."
+    )
+    parser.add_argument('query', nargs='?', default='', help="Parte del nombre del permiso (ej: camera)")
+    parser.add_argument('--catalog', default=CATALOG_PATH, help=f"Catalogo JSON (por defecto: {CATALOG_PATH})")
+    parser.add_argument('--sdk', type=int, help="Solo permisos disponibles en este nivel de API")
+    opts = parser.parse_args(argv)
+
+    catalog = PermissionCatalog.load(opts.catalog)
+    for index in catalog.search(opts.query):
+        perm = catalog.entries[index]
+        if opts.sdk and ((perm.min_sdk or 1) > opts.sdk or (perm.max_sdk and perm.max_sdk < opts.sdk)):
+            continue
+        print(f"{perm.name:<72} {describe(perm)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from PIL import Image, ImageChops
+
+import config_core
+import tracing
+
+OPTIMIZER_VERSION = 2
+DEFAULT_PATHS = ('assets', 'www')
+DEFAULT_CACHE_DIR = os.path.join(".appforge", "png-cache")
+DEFAULT_REPORT_PATH = os.path.join(".appforge", "png-report.json")
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+COLOR_TYPES = {'L': 0, 'RGB': 2, 'LA': 4, 'RGBA': 6}
+SUPPORTED_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+FILTER_NAMES = {0: 'none', 1: 'sub', 2: 'up'}
+STRATEGY_NAMES = {zlib.Z_DEFAULT_STRATEGY: 'default', zlib.Z_FILTERED: 'filtered', zlib.Z_RLE: 'rle'}
+
+# (encoder, png filter, zlib strategy) tried at zlib level 9. 'pillow' uses
+# Pillow's per-row adaptive filter choice; 'raw' applies one filter to every row
+EFFORTS = {
+    1: [('pillow', None, zlib.Z_DEFAULT_STRATEGY)],
+    2: [('pillow', None, zlib.Z_DEFAULT_STRATEGY), ('pillow', None, zlib.Z_FILTERED),
+        ('raw', 0, zlib.Z_DEFAULT_STRATEGY), ('raw', 2, zlib.Z_FILTERED)],
+    3: [('pillow', None, zlib.Z_DEFAULT_STRATEGY), ('pillow', None, zlib.Z_FILTERED),
+        ('pillow', None, zlib.Z_RLE)]
+       + [('raw', f, s) for f in (0, 1, 2) for s in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)],
+}
+DEFAULT_EFFORT = 2
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+def _chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def _sub_bytes(a, b):
+    # Bytewise (a - b) mod 256 over whole buffers at once: the high bit of each
+    # byte absorbs the borrow so it never crosses into the neighbouring byte
+    n = len(a)
+    high = int.from_bytes(b'\x80' * n, 'big')
+    x = int.from_bytes(a, 'big')
+    y = int.from_bytes(b, 'big')
+    result = ((x | high) - (y & (high >> 7) * 0x7f)) ^ ((x ^ ~y) & high)
+    return (result & ((1 << (8 * n)) - 1)).to_bytes(n, 'big')
+
+
+def filter_scanlines(raw, stride, bpp, filter_type):
+    if filter_type == 1:
+        left = b''.join(bytes(bpp) + raw[i:i + stride - bpp] for i in range(0, len(raw), stride))
+        raw = _sub_bytes(raw, left)
+    elif filter_type == 2:
+        raw = _sub_bytes(raw, bytes(stride) + raw[:-stride])
+    tag = bytes([filter_type])
+    return b''.join(tag + raw[i:i + stride] for i in range(0, len(raw), stride))
+
+
+def encode_raw(image, filter_type, strategy, icc_profile=None):
+    color_type = COLOR_TYPES[image.mode]
+    bpp = len(image.mode)
+    width, height = image.size
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    scanlines = filter_scanlines(image.tobytes(), width * bpp, bpp, filter_type)
+    chunks = [_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))]
+    if icc_profile:
+        chunks.append(_chunk(b'iCCP', b'ICC Profile\x00\x00' + zlib.compress(icc_profile, 9)))
+    transparency = image.info.get('transparency')
+    if transparency is not None and image.mode == 'L':
+        chunks.append(_chunk(b'tRNS', struct.pack('>H', transparency)))
+    elif transparency is not None and image.mode == 'RGB':
+        chunks.append(_chunk(b'tRNS', struct.pack('>HHH', *transparency)))
+    chunks.append(_chunk(b'IDAT', compressor.compress(scanlines) + compressor.flush()))
+    chunks.append(_chunk(b'IEND', b''))
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def encode_pillow(image, strategy, icc_profile=None, bits=None):
+    # Only what changes pixels is passed on; text, EXIF, XMP, time, dpi, gamma
+    # and chromaticity chunks are dropped
+    params = {'compress_level': 9, 'compress_type': strategy}
+    if icc_profile:
+        params['icc_profile'] = icc_profile
+    if image.info.get('transparency') is not None:
+        params['transparency'] = image.info['transparency']
+    if bits:
+        params['bits'] = bits
+    stripped = image.copy()
+    stripped.info = {}
+    buf = io.BytesIO()
+    stripped.save(buf, 'PNG', **params)
+    return buf.getvalue()
+
+
+def decoded_pixels(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size, image.convert('RGBA').tobytes()
+
+
+def _is_opaque(image):
+    return image.getchannel('A').getextrema()[0] == 255
+
+
+def _is_grey(image):
+    r, g, b = image.convert('RGB').split()
+    return ImageChops.difference(r, g).getbbox() is None and ImageChops.difference(g, b).getbbox() is None
+
+
+def reductions(image):
+    # Exact colour-type reductions; every candidate is still checked against
+    # the original pixels before it can win
+    variants = [('', image)]
+    if image.mode in ('RGBA', 'LA') and _is_opaque(image):
+        image = image.convert(image.mode[:-1])
+        variants.append(('drop alpha', image))
+    if image.mode in ('RGB', 'RGBA') and _is_grey(image):
+        image = image.convert('LA' if image.mode == 'RGBA' else 'L')
+        variants.append(('grey', image))
+    if image.mode in ('RGB', 'RGBA', 'LA'):
+        colors = image.getcolors(256)
+        if colors:
+            source = image.convert('RGBA') if image.mode == 'LA' else image
+            method = Image.Quantize.FASTOCTREE if source.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+            palette = source.quantize(colors=len(colors), method=method, dither=Image.Dither.NONE)
+            variants.append((f"palette {len(colors)}", palette))
+    return variants
+
+
+def optimize_png(data, effort=DEFAULT_EFFORT):
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Image.UnidentifiedImageError:
+        raise UnsupportedImage("no es una imagen") from None
+    with image:
+        if image.format != 'PNG':
+            raise UnsupportedImage(f"no es PNG ({image.format})")
+        if getattr(image, 'is_animated', False):
+            raise UnsupportedImage("PNG animado")
+        # Pillow decodes 16-bit RGB(A) to 8 bits, so neither the pixel check nor the output would be lossless
+        # (IHDR is always the first chunk; byte 24 is its bit depth)
+        if data[24] > 8:
+            raise UnsupportedImage(f"profundidad de {data[24]} bits")
+        if image.mode not in SUPPORTED_MODES:
+            raise UnsupportedImage(f"modo {image.mode}")
+        image.load()
+        icc_profile = image.info.get('icc_profile')
+        reference = (image.size, image.convert('RGBA').tobytes())
+
+        best, best_label = data, 'original'
+        for variant_label, variant in reductions(image):
+            bits = None
+            if variant.mode == 'P':
+                count = len(variant.getcolors(256))
+                bits = next(b for b in (1, 2, 4, 8) if count <= 1 << b)
+            for encoder, filter_type, strategy in EFFORTS[effort]:
+                if encoder == 'raw' and variant.mode not in COLOR_TYPES:
+                    continue
+                if encoder == 'raw':
+                    candidate = encode_raw(variant, filter_type, strategy, icc_profile)
+                    label = f"filter {FILTER_NAMES[filter_type]}"
+                else:
+                    candidate = encode_pillow(variant, strategy, icc_profile, bits)
+                    label = "adaptive filter"
+                if len(candidate) >= len(best):
+                    continue
+                if decoded_pixels(candidate) != reference:
+                    continue
+                best = candidate
+                best_label = ", ".join(filter(None, (variant_label, label, f"zlib {STRATEGY_NAMES[strategy]}")))
+    return best, best_label
+
+
+def _optimize_star(args):
+    path, data, effort = args
+    try:
+        out, label = optimize_png(data, effort)
+        return path, out, label, None
+    except (OSError, ValueError, SyntaxError) as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+def find_pngs(paths):
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            files.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                         if name.lower().endswith('.png'))
+    return files
+
+
+class PngCache:
+    # Content-addressed: blobs are stored by output sha256 and index.json maps
+    # cache keys (input sha + settings) to them. Outputs are recorded under
+    # their own key too, so an already optimized file is a cache hit
+    def __init__(self, cache_dir, effort):
+        self.cache_dir = cache_dir
+        self.effort = effort
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.dirty = False
+
+    def key(self, digest):
+        return f"{OPTIMIZER_VERSION}.{self.effort}.{digest}"
+
+    def get(self, digest, data):
+        entry = self.index.get(self.key(digest))
+        if not entry:
+            return None
+        out_sha, label = entry
+        if out_sha == digest:
+            return data, label
+        try:
+            with open(os.path.join(self.cache_dir, out_sha + '.png'), 'rb') as f:
+                out = f.read()
+        except OSError:
+            return None
+        if hashlib.sha256(out).hexdigest() != out_sha:
+            return None
+        return out, label
+
+    def put(self, digest, out, label):
+        out_sha = hashlib.sha256(out).hexdigest()
+        if out_sha != digest:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            config_core.atomic_write(os.path.join(self.cache_dir, out_sha + '.png'), out)
+        self.index[self.key(digest)] = [out_sha, label]
+        self.index[self.key(out_sha)] = [out_sha, label]
+        self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            config_core.atomic_write(self.index_path, json.dumps(self.index, indent=1, sort_keys=True).encode('utf-8'))
+
+
+@tracing.traced('png.optimize')
+def optimize(paths, cache_dir=DEFAULT_CACHE_DIR, effort=DEFAULT_EFFORT, jobs=None, dry_run=False, use_cache=True):
+    cache = PngCache(cache_dir, effort)
+    rows = []
+    pending = []
+    sources = {}
+    for path in find_pngs(paths):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        sources[path] = (data, digest)
+        hit = cache.get(digest, data) if use_cache else None
+        if hit:
+            rows.append({'file': path, 'out': hit[0], 'method': hit[1], 'cached': True})
+        else:
+            pending.append((path, data, effort))
+
+    workers = jobs or os.cpu_count() or 1
+    # Largest files first so the pool drains evenly
+    pending.sort(key=lambda p: -len(p[1]))
+    if workers > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_optimize_star, pending))
+    else:
+        results = [_optimize_star(p) for p in pending]
+
+    for path, out, label, error in results:
+        if error:
+            rows.append({'file': path, 'error': error})
+            continue
+        cache.put(sources[path][1], out, label)
+        rows.append({'file': path, 'out': out, 'method': label, 'cached': False})
+    cache.save()
+
+    report = []
+    for row in sorted(rows, key=lambda r: r['file']):
+        data, digest = sources[row['file']]
+        entry = {'file': row['file'].replace(os.sep, '/'), 'before': len(data)}
+        if 'error' in row:
+            entry.update(after=len(data), saved=0, error=row['error'])
+        else:
+            out = row.pop('out')
+            entry.update(after=len(out), saved=len(data) - len(out), method=row['method'], cached=row['cached'])
+            if out != data and not dry_run:
+                config_core.atomic_write(row['file'], out)
+        report.append(entry)
+    return report
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    before = sum(r['before'] for r in report)
+    after = sum(r['after'] for r in report)
+    data = {'files': report, 'before': before, 'after': after, 'saved': before - after}
+    config_core.atomic_write(path, json.dumps(data, indent=2).encode('utf-8'))
+
+
+def format_report(report):
+    lines = []
+    for r in report:
+        if 'error' in r:
+            lines.append(f"{r['file']:<40} omitido: {r['error']}")
+            continue
+        pct = r['saved'] * 100 / r['before'] if r['before'] else 0
+        source = 'cache' if r['cached'] else r['method']
+        lines.append(f"{r['file']:<40} {r['before'] / 1024:9.1f} KB -> {r['after'] / 1024:9.1f} KB  "
+                     f"{pct:5.1f}%  ({source})")
+    before = sum(r['before'] for r in report)
+    saved = sum(r['saved'] for r in report)
+    pct = saved * 100 / before if before else 0
+    lines.append(f"{len(report)} archivos PNG, {saved / 1024:.1f} KB ahorrados ({pct:.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="png_optimizer.py",
+        description="Recomprime los PNG sin perdidas en su sitio (verifica que los pixeles decodificados no cambien)."
+    )
+    parser.add_argument('paths', nargs='*', default=list(DEFAULT_PATHS),
+                        help="Archivos o directorios (por defecto: assets www)")
+    parser.add_argument('--effort', type=int, choices=sorted(EFFORTS), default=DEFAULT_EFFORT,
+                        help="1: una codificacion, 3: todas las combinaciones filtro/zlib (por defecto: %(default)s)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Directorio de cache de resultados optimizados")
+    parser.add_argument('--no-cache', action='store_true', help="Ignora los resultados en cache")
+    parser.add_argument('--report', default=DEFAULT_REPORT_PATH, help="Informe de ahorro por archivo (JSON)")
+    parser.add_argument('--dry-run', action='store_true', help="Informa del ahorro sin reescribir archivos")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    paths = [p for p in opts.paths if os.path.exists(p)]
+    started = time.perf_counter()
+    report = optimize(paths, opts.cache, opts.effort, opts.jobs, opts.dry_run, not opts.no_cache)
+    write_report(report, opts.report)
+    print(format_report(report))
+    print(f"{'Simulado' if opts.dry_run else 'Listo'} en {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
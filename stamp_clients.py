@@ -0,0 +1,393 @@
+import argparse
+import copy
+import csv
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import config_core
+import config_export
+import config_schema
+import tracing
+
+TEMPLATE_PATHS = ('www', 'assets', config_core.DEFAULT_CONFIG_PATH,
+                  config_export.CAPACITOR_CONFIG, config_export.PACKAGE_JSON)
+DEFAULT_OUT = "clientes"
+STATE_NAME = ".stamp.json"
+STATE_VERSION = 1
+MODES = ('auto', 'reflink', 'hardlink', 'copy')
+POOL_THRESHOLD = 32
+
+# Manifest columns that are not config keys
+SHORTCUTS = {'host': 'deepLinks.host', 'scheme': 'deepLinks.scheme'}
+FILE_COLUMNS = {'icon': 'assets/icon.png', 'splash': 'assets/splash.png', 'splashDark': 'assets/splash-dark.png'}
+
+FICLONE = 0x40049409
+# Link kinds this process already found unsupported between template and output
+_unsupported = set()
+_ID = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class StampError(ValueError):
+    pass
+
+
+def load_manifest(path):
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            return [{k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}
+                    for row in csv.DictReader(f)]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rows = data.get('clients', []) if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise StampError(f"{path}: se esperaba una lista de clientes")
+    return rows
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def template_files(root):
+    generated = {config_core.DEFAULT_CONFIG_PATH, config_export.CAPACITOR_CONFIG, config_export.PACKAGE_JSON}
+    files = {}
+    for name in TEMPLATE_PATHS:
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    full = os.path.join(dirpath, filename)
+                    files[os.path.relpath(full, root).replace(os.sep, '/')] = full
+        elif os.path.isfile(path) and name not in generated:
+            files[name] = path
+    return files
+
+
+def client_config(base, row):
+    config = copy.deepcopy(base)
+    for column, value in row.items():
+        if column == 'id' or column in FILE_COLUMNS:
+            continue
+        key = SHORTCUTS.get(column, column)
+        if isinstance(value, str):
+            try:
+                current = config_core.get_value(config, key)
+            except (KeyError, IndexError, TypeError):
+                current = None
+            value = config_core.coerce_value(current, value)
+        config_core.set_value(config, key, value)
+    return config
+
+
+def plan_client(row, base, template_root, sources, manifest_dir):
+    # rel path -> ('link', source path, token) or ('data', bytes, token); the
+    # token changes whenever the target has to be rewritten
+    config = client_config(base, row)
+    errors = config_schema.errors_only(config_schema.validate(config))
+    if errors:
+        raise StampError("; ".join(config_schema.format_issue(issue) for issue in errors))
+    client_id = _ID.sub('-', str(row.get('id') or config_export.package_name(config))).strip('-.')
+    if not client_id:
+        raise StampError("sin id")
+
+    entries = {}
+    for rel, (path, sig) in sources.items():
+        entries[rel] = ('link', path, f"{path}:{':'.join(map(str, sig))}")
+    for column, rel in FILE_COLUMNS.items():
+        if row.get(column):
+            path = os.path.join(manifest_dir, row[column])
+            try:
+                sig = file_signature(path)
+            except OSError as e:
+                raise StampError(f"{column}: {e.strerror}: {path}") from None
+            entries[rel] = ('link', path, f"{path}:{':'.join(map(str, sig))}")
+
+    data = {config_core.DEFAULT_CONFIG_PATH: config_core.dump_config(config).encode('utf-8')}
+    for name, (_, synced) in config_export.project_files(config, template_root).items():
+        data[name] = synced
+    for rel, content in data.items():
+        entries[rel] = ('data', content, hashlib.sha256(content).hexdigest())
+    return client_id, entries
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def place_file(src, dst, mode):
+    # Link into a temp name and rename over the target, so a linked file is
+    # never modified in place (which would change the template too)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    kinds = [mode] if mode != 'auto' else [k for k in ('reflink', 'hardlink') if k not in _unsupported]
+    for kind in kinds:
+        if kind == 'copy':
+            break
+        try:
+            if kind == 'reflink':
+                _reflink(src, tmp)
+            else:
+                os.link(src, tmp)
+            os.replace(tmp, dst)
+            return kind
+        except (OSError, ImportError) as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            if mode != 'auto':
+                raise
+            if isinstance(e, ImportError) or e.errno in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL,
+                                                         errno.ENOTTY, errno.EPERM, errno.EMLINK):
+                _unsupported.add(kind)
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return 'copy'
+
+
+def _prune_dirs(path, stop):
+    path = os.path.dirname(path)
+    while os.path.abspath(path) != os.path.abspath(stop):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def stamp_client(args):
+    out_dir, client_id, entries, previous, mode = args
+    root = os.path.join(out_dir, client_id)
+    stats = {'reflink': 0, 'hardlink': 0, 'copy': 0, 'written': 0, 'unchanged': 0, 'removed': 0,
+             'bytes_written': 0, 'bytes_total': 0}
+    state = {}
+    for rel, (kind, source, token) in sorted(entries.items()):
+        target = os.path.join(root, rel)
+        old = previous.get(rel)
+        size = len(source) if kind == 'data' else int(token.rsplit(':', 1)[1])
+        stats['bytes_total'] += size
+        try:
+            current = file_signature(target)
+        except OSError:
+            current = None
+        if old and old[0] == token and old[1] == current:
+            state[rel] = old
+            stats['unchanged'] += 1
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if kind == 'data':
+            config_core.atomic_write(target, source)
+            stats['written'] += 1
+            stats['bytes_written'] += size
+        else:
+            how = place_file(source, target, mode)
+            stats[how] += 1
+            if how == 'copy':
+                stats['bytes_written'] += size
+        state[rel] = [token, file_signature(target)]
+    for rel in previous:
+        if rel not in entries:
+            target = os.path.join(root, rel)
+            try:
+                os.remove(target)
+                stats['removed'] += 1
+            except FileNotFoundError:
+                pass
+            _prune_dirs(target, root)
+    return client_id, state, stats
+
+
+def disk_usage(out_dir, template_root):
+    # Blocks allocated to files under out_dir that are not shared with the
+    # template by hardlink (reflinked files report their full size here)
+    template_inodes = set()
+    for path in TEMPLATE_PATHS:
+        for dirpath, _, filenames in os.walk(os.path.join(template_root, path)):
+            for name in filenames:
+                template_inodes.add(os.stat(os.path.join(dirpath, name)).st_ino)
+    seen = set()
+    total = 0
+    for dirpath, _, filenames in os.walk(out_dir):
+        for name in filenames:
+            st = os.lstat(os.path.join(dirpath, name))
+            if st.st_ino in seen or st.st_ino in template_inodes:
+                continue
+            seen.add(st.st_ino)
+            total += st.st_blocks * 512 if hasattr(st, 'st_blocks') else st.st_size
+    return total
+
+
+@tracing.traced('stamp.run')
+def stamp(rows, template_root='.', out_dir=DEFAULT_OUT, mode='auto', jobs=None, manifest_dir='.'):
+    state_path = os.path.join(out_dir, STATE_NAME)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    previous = saved.get('clients', {}) if saved.get('version') == STATE_VERSION else {}
+
+    base = config_core.load_config(os.path.join(template_root, config_core.DEFAULT_CONFIG_PATH))
+    sources = {rel: (path, file_signature(path)) for rel, path in template_files(template_root).items()}
+
+    work = []
+    errors = {}
+    for number, row in enumerate(rows, 1):
+        try:
+            client_id, entries = plan_client(row, base, template_root, sources, manifest_dir)
+        except (StampError, ValueError, KeyError, TypeError) as e:
+            errors[str(row.get('id') or f"#{number}")] = str(e)
+            continue
+        if any(w[1] == client_id for w in work):
+            errors[client_id] = "id duplicado"
+            continue
+        work.append((out_dir, client_id, entries, previous.get(client_id, {}), mode))
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(work) < POOL_THRESHOLD:
+        results = [stamp_client(w) for w in work]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(work) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(stamp_client, work, chunksize=chunksize))
+
+    # Clients dropped from the manifest keep their directories; only their
+    # state is forgotten so a later re-add starts clean
+    totals = dict.fromkeys(('reflink', 'hardlink', 'copy', 'written', 'unchanged', 'removed',
+                            'bytes_written', 'bytes_total'), 0)
+    clients = {}
+    for client_id, state, stats in results:
+        clients[client_id] = state
+        for key, value in stats.items():
+            totals[key] += value
+    data = {'version': STATE_VERSION, 'template': os.path.abspath(template_root), 'clients': clients}
+    config_core.atomic_write(state_path, json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    totals['clients'] = len(results)
+    return totals, errors
+
+
+def format_totals(totals, elapsed, usage=None):
+    mb = 1024 * 1024
+    lines = [
+        f"{totals['clients']} clientes en {elapsed * 1000:.0f} ms: "
+        f"{totals['reflink']} reflinks, {totals['hardlink']} hardlinks, {totals['copy']} copias, "
+        f"{totals['written']} escritos, {totals['unchanged']} sin cambios, {totals['removed']} eliminados",
+        f"tamano logico (cp -r): {totals['bytes_total'] / mb:.1f} MB, escrito: {totals['bytes_written'] / mb:.1f} MB",
+    ]
+    if usage is not None:
+        lines.append(f"disco ocupado (sin contar hardlinks a la plantilla): {usage / mb:.1f} MB")
+    return "\n".join(lines)
+
+
+def synthetic_manifest(directory, count, icon_source, icon_every=10):
+    os.makedirs(os.path.join(directory, 'iconos'), exist_ok=True)
+    rows = []
+    for i in range(count):
+        row = {'id': f"cliente{i:04d}", 'appId': f"com.flota.cliente{i}", 'appName': f"Cliente {i}",
+               'host': f"cliente{i}.ejemplo.com", 'versionCode': str(i + 1)}
+        if icon_source and i % icon_every == 0:
+            row['icon'] = os.path.join('iconos', f"cliente{i:04d}.png")
+            shutil.copyfile(icon_source, os.path.join(directory, row['icon']))
+        rows.append(row)
+    return rows
+
+
+def benchmark(count, mode, jobs, template_root='.'):
+    # Runs under .appforge/ so template copy and output share a filesystem
+    os.makedirs('.appforge', exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="stamp-bench-", dir='.appforge') as tmp:
+        template = os.path.join(tmp, 'plantilla')
+        for name in TEMPLATE_PATHS:
+            src = os.path.join(template_root, name)
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(template, name))
+            elif os.path.isfile(src):
+                os.makedirs(template, exist_ok=True)
+                shutil.copyfile(src, os.path.join(template, name))
+        icon = os.path.join(template, 'assets', 'icon.png')
+        rows = synthetic_manifest(tmp, count, icon if os.path.isfile(icon) else None)
+        out = os.path.join(tmp, 'clientes')
+
+        def run(label):
+            started = time.perf_counter()
+            totals, errors = stamp(rows, template, out, mode, jobs, tmp)
+            elapsed = time.perf_counter() - started
+            print(f"-- {label}")
+            print(format_totals(totals, elapsed, disk_usage(out, template)))
+            for client_id, error in errors.items():
+                print(f"{client_id}: ERROR {error}", file=sys.stderr)
+
+        run("estampado inicial")
+        run("re-estampado sin cambios")
+        touched = [os.path.join(template, 'www', 'index.html'), os.path.join(template, config_core.DEFAULT_CONFIG_PATH)]
+        for path in touched:
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if path.endswith('.json'):
+                    config = json.loads(data)
+                    config['version'] = '9.9.9'
+                    data = config_core.dump_config(config).encode('utf-8')
+                else:
+                    data += b"\n<!-- plantilla actualizada -->\n"
+                config_core.atomic_write(path, data)
+        run("re-estampado tras actualizar la plantilla (index.html y version)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="stamp_clients.py",
+        description="Genera un proyecto por cliente desde la plantilla, enlazando los archivos que no cambian."
+    )
+    parser.add_argument('manifest', nargs='?', help="CSV o JSON de clientes (columnas: id, appId, appName, host, "
+                                                    "icon, splash o cualquier clave como android.targetSdkVersion)")
+    parser.add_argument('--out', default=DEFAULT_OUT, help=f"Directorio de salida (por defecto: {DEFAULT_OUT})")
+    parser.add_argument('--template', default='.', help="Raiz de la plantilla (por defecto: .)")
+    parser.add_argument('--mode', choices=MODES, default='auto',
+                        help="Como reutilizar archivos sin cambios (auto: reflink, luego hardlink, luego copia)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('--du', action='store_true', help="Calcula el disco ocupado por la salida")
+    parser.add_argument('--bench', type=int, metavar='N', help="Estampa N clientes sinteticos en un directorio temporal")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    if opts.bench:
+        benchmark(opts.bench, opts.mode, opts.jobs, opts.template)
+        return 0
+    if not opts.manifest:
+        parser.error("falta el manifiesto de clientes")
+
+    try:
+        rows = load_manifest(opts.manifest)
+    except (OSError, ValueError) as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    try:
+        totals, errors = stamp(rows, opts.template, opts.out, opts.mode, opts.jobs,
+                               os.path.dirname(opts.manifest) or '.')
+    except OSError as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 1
+    for client_id, error in errors.items():
+        print(f"{client_id}: ERROR {error}", file=sys.stderr)
+    print(format_totals(totals, time.perf_counter() - started,
+                        disk_usage(opts.out, opts.template) if opts.du else None))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
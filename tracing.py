@@ -0,0 +1,177 @@
+import argparse
+import atexit
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+import config_core
+
+TRACE_ENV = "APPFORGE_TRACE"
+DEFAULT_TRACE_PATH = os.path.join(".appforge", "trace.json")
+
+_events = None
+_path = None
+# Wall-clock anchor so traces from several processes line up when merged
+_origin_perf = time.perf_counter()
+_origin_wall = time.time()
+
+
+class Span:
+    # Always times itself (the editor shows the duration in the status bar);
+    # the trace event is only recorded when tracing is enabled
+    __slots__ = ('name', 'cat', 'args', 'started', 'ms')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.ms = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        self.ms = (ended - self.started) * 1000
+        if _events is not None:
+            event = {
+                'name': self.name,
+                'cat': self.cat,
+                'ph': 'X',
+                'ts': round((self.started - _origin_perf + _origin_wall) * 1e6, 1),
+                'dur': round((ended - self.started) * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            }
+            if self.args or exc_type:
+                event['args'] = dict(self.args, error=exc_type.__name__) if exc_type else self.args
+            _events.append(event)
+        return False
+
+
+def span(name, cat='app', **args):
+    return Span(name, cat, args)
+
+
+def traced(name=None, cat='app'):
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return fn(*args, **kwargs)
+            with Span(label, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def is_enabled():
+    return _events is not None
+
+
+def _program():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+
+def trace_path(value):
+    if value in ('1', 'true', ''):
+        return DEFAULT_TRACE_PATH
+    if value.endswith(('/', os.sep)) or os.path.isdir(value):
+        return os.path.join(value, f"{_program()}-{os.getpid()}.json")
+    return value
+
+
+def enable(path=DEFAULT_TRACE_PATH):
+    global _events, _path
+    if _events is None:
+        _events = []
+        atexit.register(flush)
+    _path = trace_path(path)
+
+
+def enable_from_env():
+    value = os.environ.get(TRACE_ENV)
+    if value:
+        enable(value)
+
+
+def add_argument(parser):
+    parser.add_argument('--trace', nargs='?', const=DEFAULT_TRACE_PATH, metavar='PATH',
+                        help=f"Escribe una traza de Chrome (chrome://tracing, Perfetto); tambien ${TRACE_ENV}=PATH")
+
+
+def configure(opts):
+    if getattr(opts, 'trace', None):
+        enable(opts.trace)
+
+
+def flush():
+    if not _events or not _path:
+        return None
+    os.makedirs(os.path.dirname(_path) or '.', exist_ok=True)
+    meta = {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': _program()}}
+    data = {'traceEvents': [meta] + _events, 'displayTimeUnit': 'ms'}
+    config_core.atomic_write(_path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+    return _path
+
+
+def load_events(paths):
+    events = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+        for name in files:
+            with open(name, 'r', encoding='utf-8') as f:
+                events.extend(json.load(f).get('traceEvents', []))
+    return events
+
+
+def summarize(events):
+    stats = {}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        entry = stats.setdefault(event['name'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        ms = event['dur'] / 1000
+        entry['count'] += 1
+        entry['total_ms'] += ms
+        entry['max_ms'] = max(entry['max_ms'], ms)
+    return sorted(stats.items(), key=lambda item: -item[1]['total_ms'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="tracing.py",
+        description=f"Une y resume las trazas escritas con --trace o ${TRACE_ENV}."
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('merge', help="Une archivos de traza (o directorios con ellos) en una traza de Chrome")
+    p.add_argument('inputs', nargs='+', help="Archivos o directorios de trazas")
+    p.add_argument('-o', '--out', required=True, help="Traza resultante")
+    p = sub.add_parser('summary', help="Muestra el tiempo total/maximo por tramo")
+    p.add_argument('inputs', nargs='+', help="Archivos o directorios de trazas")
+    opts = parser.parse_args(argv)
+
+    events = load_events(opts.inputs)
+    if opts.command == 'merge':
+        os.makedirs(os.path.dirname(opts.out) or '.', exist_ok=True)
+        data = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        config_core.atomic_write(opts.out, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        print(f"{opts.out}: {len(events)} eventos")
+        return 0
+
+    for name, entry in summarize(events):
+        print(f"{name:<40} {entry['count']:>6}x  total {entry['total_ms']:10.1f} ms  max {entry['max_ms']:9.1f} ms")
+    return 0
+
+
+enable_from_env()
+
+if __name__ == "__main__":
+    sys.exit(main())
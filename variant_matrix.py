@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import config_core
+import config_export
+import tracing
+
+ENGINE_VERSION = 1
+DEFAULT_OUT_DIR = "variants"
+STATE_NAME = ".expand.json"
+MATRIX_NAME = "matrix.json"
+ENV_NAME = "variant.env"
+POOL_THRESHOLD = 64
+
+
+def render_variant(args):
+    name, config, root = args
+    files = {config_core.DEFAULT_CONFIG_PATH: config_core.dump_config(config).encode('utf-8')}
+    for filename, (_, data) in config_export.project_files(config, root).items():
+        files[filename] = data
+    values = config_export.derived_values(config)
+    files[ENV_NAME] = config_export.format_values(values, 'env').encode('utf-8')
+    return name, files
+
+
+def template_digest(root):
+    # Variant outputs also depend on the project files they are derived from
+    h = hashlib.sha256(str(ENGINE_VERSION).encode('utf-8'))
+    for name in (config_export.CAPACITOR_CONFIG, config_export.PACKAGE_JSON):
+        try:
+            with open(os.path.join(root, name), 'rb') as f:
+                h.update(name.encode('utf-8') + b'\0' + f.read())
+        except FileNotFoundError:
+            h.update(name.encode('utf-8') + b'\0-')
+    return h.hexdigest()
+
+
+def variant_key(config, digest):
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(digest.encode('utf-8') + payload).hexdigest()
+
+
+def build_matrix(variants):
+    # GitHub Actions strategy.matrix; a config without variants builds once with variant ''
+    if not variants:
+        return {'include': [{'variant': ''}]}
+    include = []
+    for name, config in variants:
+        values = config_export.derived_values(config)
+        include.append({'variant': name, 'appId': values['appId'], 'appName': values['appName'],
+                        'apkName': values['apkName']})
+    return {'include': include}
+
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    config_core.atomic_write(path, data)
+    return True
+
+
+def _signature(path):
+    signature = config_core.file_signature(path)
+    return list(signature) if signature else None
+
+
+@tracing.traced('variants.expand')
+def expand(config_path=config_core.DEFAULT_CONFIG_PATH, out_dir=DEFAULT_OUT_DIR, jobs=None,
+           use_cache=True, threshold=POOL_THRESHOLD):
+    config = config_core.load_config(config_path)
+    root = os.path.dirname(os.path.abspath(config_path))
+    variants = config_core.resolve_variants(config)
+    digest = template_digest(root)
+
+    state_path = os.path.join(out_dir, STATE_NAME)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    stats = {'variants': len(variants), 'rendered': 0, 'cached': 0, 'written': 0, 'removed': 0}
+    state = {}
+    work = []
+    for name, resolved in variants:
+        key = variant_key(resolved, digest)
+        entry = previous.get(name)
+        if use_cache and entry and entry[0] == key and all(
+                _signature(os.path.join(out_dir, name, rel)) == sig for rel, sig in entry[1].items()):
+            state[name] = entry
+            stats['cached'] += 1
+        else:
+            work.append((name, resolved, root))
+            state[name] = [key, {}]
+
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(work) < threshold:
+        results = [render_variant(w) for w in work]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(work) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_variant, work, chunksize=chunksize))
+
+    for name, files in results:
+        stats['rendered'] += 1
+        for rel, data in files.items():
+            path = os.path.join(out_dir, name, rel)
+            stats['written'] += _write_if_changed(path, data)
+            state[name][1][rel] = _signature(path)
+
+    for name, entry in previous.items():
+        if name in state:
+            continue
+        for rel in entry[1]:
+            try:
+                os.remove(os.path.join(out_dir, name, rel))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(os.path.join(out_dir, name))
+        except OSError:
+            pass
+        stats['removed'] += 1
+
+    os.makedirs(out_dir, exist_ok=True)
+    matrix = build_matrix(variants)
+    _write_if_changed(os.path.join(out_dir, MATRIX_NAME), json.dumps(matrix, indent=2).encode('utf-8'))
+    if state != previous:
+        config_core.atomic_write(state_path, json.dumps(state, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    return matrix, stats
+
+
+def select_variant(config_path, name):
+    # Replace the config with one concrete variant (CI checkouts only)
+    config = config_core.load_config(config_path)
+    resolved = config_core.resolve_variant(config, name)
+    return config_core.save_config(config_path, resolved)
+
+
+def synthetic_matrix(count):
+    dimensions = {'env': ['dev', 'qa', 'staging', 'beta', 'prod'], 'edition': []}
+    per_edition = max(1, count // len(dimensions['env']))
+    variants = {'env': {}, 'edition': {}}
+    for env in dimensions['env']:
+        variants['env'][env] = {} if env == 'prod' else {'appIdSuffix': f".{env}", 'appName': f"App {env}",
+                                                         'host': f"{env}.ejemplo.com", 'build': {'emulator': True}}
+    for i in range(per_edition):
+        variants['edition'][f"ed{i}"] = {'appIdSuffix': f".ed{i}",
+                                         'permissions': {'add': [f"android.permission.PERM_{i}"],
+                                                         'remove': ["android.permission.CAMERA"] if i % 2 else []}}
+    return variants
+
+
+def benchmark(count, config_path, jobs):
+    config = config_core.normalize_config(config_core.load_config(config_path))
+    config['variants'] = synthetic_matrix(count)
+    root = os.path.dirname(os.path.abspath(config_path))
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="appforge-variants-") as tmp:
+        for name in (config_export.CAPACITOR_CONFIG, config_export.PACKAGE_JSON):
+            if os.path.isfile(os.path.join(root, name)):
+                shutil.copyfile(os.path.join(root, name), os.path.join(tmp, name))
+        path = os.path.join(tmp, config_core.DEFAULT_CONFIG_PATH)
+        config_core.save_config(path, config)
+        out = os.path.join(tmp, 'variants')
+
+        def run(label, **kwargs):
+            started = time.perf_counter()
+            _, stats = expand(path, out, **kwargs)
+            rows.append((label, time.perf_counter() - started, stats))
+
+        run("en frio, en serie", jobs=1)
+        shutil.rmtree(out)
+        run(f"en frio, en paralelo ({jobs or os.cpu_count() or 1} procesos)", jobs=jobs, threshold=0)
+        run("con cache, sin cambios", jobs=jobs)
+        config['variants']['env']['dev']['appName'] = "App dev 2"
+        config_core.save_config(path, config)
+        run("cambia un valor de una dimension", jobs=jobs)
+        run("sin cache (se genera todo)", jobs=jobs, use_cache=False)
+
+    for label, elapsed, stats in rows:
+        print(f"{label:<36} {elapsed * 1000:8.1f} ms  variantes={stats['variants']} generadas={stats['rendered']} "
+              f"en cache={stats['cached']} escritas={stats['written']}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="variant_matrix.py",
+        description="Expande las variantes de app.config.json en una config concreta por variante."
+    )
+    parser.add_argument('--config', default=config_core.DEFAULT_CONFIG_PATH, help="Config base con 'variants'")
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR, help=f"Directorio de salida (por defecto: {DEFAULT_OUT_DIR})")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('--no-cache', action='store_true', help="Vuelve a generar todas las variantes")
+    parser.add_argument('--list', action='store_true', help="Solo muestra los nombres de las variantes")
+    parser.add_argument('--github-output', action='store_true', help="Agrega matrix=<json> a $GITHUB_OUTPUT")
+    parser.add_argument('--apply', metavar='VARIANT',
+                        help="Reemplaza la config por una variante resuelta (para el CI; '' deja la base)")
+    parser.add_argument('--bench', type=int, metavar='N', help="Mide la expansion de N variantes en un directorio temporal")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    try:
+        if opts.bench:
+            benchmark(opts.bench, opts.config, opts.jobs)
+            return 0
+        if opts.apply is not None:
+            if opts.apply:
+                select_variant(opts.config, opts.apply)
+                print(f"{opts.config}: variante {opts.apply}")
+            return 0
+        if opts.list:
+            for name, _ in config_core.variant_combinations(config_core.load_config(opts.config)):
+                print(name)
+            return 0
+
+        started = time.perf_counter()
+        matrix, stats = expand(opts.config, opts.out, opts.jobs, not opts.no_cache)
+    except KeyError as e:
+        print(f"ERROR variante desconocida {e}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 1
+
+    if opts.github_output:
+        output = os.environ.get('GITHUB_OUTPUT')
+        if not output:
+            print("ERROR GITHUB_OUTPUT no esta definido", file=sys.stderr)
+            return 1
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(f"matrix={json.dumps(matrix, separators=(',', ':'))}\n")
+    print(f"{stats['variants']} variantes en {opts.out}/: {stats['rendered']} generadas, {stats['cached']} en cache, "
+          f"{stats['written']} archivos escritos, {stats['removed']} eliminados "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,593 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+
+import tracing
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = os.path.join(".appforge", "web-cache.json")
+DEFAULT_REPORT_PATH = os.path.join(".appforge", "web-report.json")
+
+HTML_EXTS = ('.html', '.htm')
+POOL_THRESHOLD = 64
+
+_WS = ' \t\r\n\v\f\u00a0\ufeff\u2028\u2029'
+_NEWLINES = '\n\r\u2028\u2029'
+_REGEX_PREV = set('(,=:[!&|?{};+-*%<>~^}')
+_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                   'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+
+def _is_id(c):
+    return c.isalnum() or c in '_$' or ord(c) > 127
+
+
+def _skip_quoted(src, i, quote):
+    n = len(src)
+    i += 1
+    while i < n:
+        c = src[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        i += 1
+    return n
+
+
+def minify_js(src):
+    out = []
+    n = len(src)
+    i = 0
+    last = ''
+    last_word = ''
+    space = False
+    newline = False
+    braces = []
+
+    def emit(token):
+        nonlocal last, space, newline
+        first = token[0]
+        if newline and last and not (last in '{([,;' or first in '}]),;'):
+            out.append('\n')
+        elif (space or newline) and last and (
+                (_is_id(last) and _is_id(first))
+                or (last in '+-' and first in '+-')
+                or (last == '/' and first == '/')
+                or (last.isdigit() and first == '.')):
+            out.append(' ')
+        out.append(token)
+        last = token[-1]
+        space = newline = False
+
+    def scan_template(start):
+        i = start + 1
+        while i < n:
+            c = src[i]
+            if c == '\\':
+                i += 2
+            elif c == '`':
+                return src[start:i + 1], i + 1, False
+            elif c == '$' and i + 1 < n and src[i + 1] == '{':
+                return src[start:i + 2], i + 2, True
+            else:
+                i += 1
+        return src[start:], n, False
+
+    while i < n:
+        c = src[i]
+        if c in _WS:
+            if c in _NEWLINES:
+                newline = True
+            else:
+                space = True
+            i += 1
+        elif c == '/' and src.startswith('//', i):
+            end = src.find('\n', i)
+            i = n if end == -1 else end
+        elif c == '/' and src.startswith('/*', i):
+            end = src.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            comment = src[i:end]
+            if comment.startswith('/*!'):
+                emit(comment)
+            elif any(nl in comment for nl in _NEWLINES):
+                newline = True
+            else:
+                space = True
+            i = end
+        elif c == '/' and (not last or last in _REGEX_PREV or (_is_id(last) and last_word in _REGEX_KEYWORDS)):
+            j = i + 1
+            in_class = False
+            while j < n:
+                d = src[j]
+                if d == '\\':
+                    j += 2
+                    continue
+                if d in _NEWLINES:
+                    break
+                if d == '[':
+                    in_class = True
+                elif d == ']':
+                    in_class = False
+                elif d == '/' and not in_class:
+                    j += 1
+                    break
+                j += 1
+            while j < n and _is_id(src[j]):
+                j += 1
+            emit(src[i:j])
+            last_word = ''
+            i = j
+        elif c in '\'"':
+            j = _skip_quoted(src, i, c)
+            emit(src[i:j])
+            last_word = ''
+            i = j
+        elif c == '`':
+            token, i, opened = scan_template(i)
+            emit(token)
+            if opened:
+                braces.append(True)
+            last_word = ''
+        elif c == '{':
+            braces.append(False)
+            emit(c)
+            last_word = ''
+            i += 1
+        elif c == '}':
+            if braces and braces.pop():
+                token, i, opened = scan_template(i)
+                emit(token)
+                if opened:
+                    braces.append(True)
+            else:
+                emit(c)
+                i += 1
+            last_word = ''
+        elif _is_id(c):
+            j = i + 1
+            while j < n and _is_id(src[j]):
+                j += 1
+            last_word = src[i:j]
+            emit(last_word)
+            i = j
+        else:
+            emit(c)
+            last_word = ''
+            i += 1
+    return ''.join(out)
+
+
+def minify_css(src):
+    out = []
+    n = len(src)
+    i = 0
+    space = False
+    while i < n:
+        c = src[i]
+        if c in _WS:
+            space = True
+            i += 1
+            continue
+        if c == '/' and src.startswith('/*', i):
+            end = src.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if src.startswith('/*!', i):
+                out.append(src[i:end])
+            else:
+                space = True
+            i = end
+            continue
+        if c in '\'"':
+            token = src[i:_skip_quoted(src, i, c)]
+        else:
+            token = c
+        last = out[-1][-1] if out else ''
+        if c == '}' and last == ';':
+            out.pop()
+            last = out[-1][-1] if out else ''
+        if space and last and last not in '{};:,>(' and c not in '{};,>)':
+            out.append(' ')
+        out.append(token)
+        space = False
+        i += len(token)
+    return ''.join(out)
+
+
+_TAG = r'''<[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>'''
+_HTML_TOKEN = re.compile(
+    r'<!--(?!\[if).*?-->'
+    r'|(?P<raw><(?P<name>script|style|pre|textarea)\b(?:"[^"]*"|\'[^\']*\'|[^>"\'])*>)(?P<body>.*?)(?P<close></(?P=name)\s*>)'
+    r'|(?P<tag>' + _TAG + r')'
+    r'|(?P<text>[^<]+|<)',
+    re.S | re.I
+)
+_ATTR = re.compile(r'''([^\s=/>]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?''')
+_QUOTED_SPLIT = re.compile(r'''("[^"]*"|'[^']*')''')
+
+
+def _minify_tag(tag):
+    parts = _QUOTED_SPLIT.split(tag)
+    for k in range(0, len(parts), 2):
+        parts[k] = re.sub(r'\s+', ' ', parts[k])
+        parts[k] = re.sub(r'\s*=\s*', '=', parts[k])
+    tag = ''.join(parts)
+    return re.sub(r'\s+(/?>)$', r'\1', tag)
+
+
+def _tag_attrs(tag):
+    inner = re.sub(r'^<\w+|/?>$', '', tag)
+    attrs = {}
+    for name, value in _ATTR.findall(inner):
+        if value[:1] in '"\'':
+            value = value[1:-1]
+        attrs[name.lower()] = value
+    return attrs
+
+
+def _is_js_script(open_tag):
+    kind = _tag_attrs(open_tag).get('type', '').lower()
+    return kind in ('', 'module', 'text/javascript', 'application/javascript')
+
+
+def minify_html(src):
+    out = []
+    for m in _HTML_TOKEN.finditer(src):
+        if m.group('raw'):
+            name = m.group('name').lower()
+            body = m.group('body')
+            if name == 'script' and _is_js_script(m.group('raw')):
+                body = minify_js(body)
+            elif name == 'style':
+                body = minify_css(body)
+            out.append(_minify_tag(m.group('raw')) + body + m.group('close'))
+        elif m.group('tag'):
+            out.append(_minify_tag(m.group('tag')))
+        elif m.group('text') is not None:
+            out.append(re.sub(r'\s+', ' ', m.group('text')))
+    return ''.join(out).strip()
+
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css, '.html': minify_html, '.htm': minify_html}
+
+_ASSET_TAG = re.compile(
+    r'<link\b' + _TAG[1:] + r'|<script\b(?:"[^"]*"|\'[^\']*\'|[^>"\'])*>\s*</script\s*>',
+    re.I
+)
+_NAME_REF = re.compile(r'[\w.-]+\.(?:css|js)\b')
+
+
+def _resolve(html_rel, url):
+    if not url or re.match(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', url, re.I):
+        return None
+    path = re.split(r'[?#]', url, 1)[0]
+    if path.startswith('/'):
+        return posixpath.normpath(path.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(html_rel), path))
+
+
+def _asset_refs(html_rel, text):
+    refs = []
+    for m in _ASSET_TAG.finditer(text):
+        tag = m.group(0)
+        attrs = _tag_attrs(re.match(_TAG, tag).group(0))
+        if tag[:5].lower() == '<link':
+            if 'stylesheet' not in attrs.get('rel', '').lower().split():
+                continue
+            rel = _resolve(html_rel, attrs.get('href'))
+            kind = 'css'
+        else:
+            rel = _resolve(html_rel, attrs.get('src'))
+            kind = 'module' if attrs.get('type', '').lower() == 'module' else 'js'
+            if 'async' in attrs or 'defer' in attrs:
+                kind = 'deferred'
+        if rel:
+            refs.append((m.start(), m.end(), rel, kind, attrs))
+    return refs
+
+
+def transform_file(rel, data, minify=True):
+    ext = posixpath.splitext(rel)[1].lower()
+    minifier = MINIFIERS.get(ext) if minify else None
+    if minifier and ext not in HTML_EXTS:
+        try:
+            return minifier(data.decode('utf-8')).encode('utf-8')
+        except UnicodeDecodeError:
+            return data
+    return data
+
+
+def _transform_star(args):
+    return transform_file(*args)
+
+
+@tracing.traced('web.transform')
+def transform_all(items, minify=True, jobs=None):
+    work = [(rel, data, minify) for rel, data in items]
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(work) < POOL_THRESHOLD:
+        return [_transform_star(w) for w in work]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_transform_star, work, chunksize=max(1, len(work) // (workers * 4))))
+
+
+def fingerprint_name(rel, digest):
+    root, ext = posixpath.splitext(rel)
+    return f"{root}.{digest[:8]}{ext}"
+
+
+class WebOptimizer:
+    def __init__(self, src, out, state_path, minify=True, inline_limit=0, fingerprint=True, jobs=None):
+        self.src = src
+        self.jobs = jobs
+        self.out = out
+        self.state_path = state_path
+        self.settings = {'minify': minify, 'inline_limit': inline_limit, 'fingerprint': fingerprint,
+                         'out': os.path.abspath(out), 'version': STATE_VERSION}
+        self.state = self._load_state()
+        self.stats = {'files': 0, 'processed': 0, 'written': 0, 'removed': 0}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {'settings': self.settings, 'files': {}}
+        files = state.get('files', {})
+        if state.get('settings') != self.settings:
+            # Keep output names so stale outputs get cleaned up, but reprocess everything
+            files = {rel: {'out': entry['out']} for rel, entry in files.items() if 'out' in entry}
+        return {'settings': self.settings, 'files': files}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.src):
+            dirnames.sort()
+            for name in sorted(filenames):
+                full = os.path.join(dirpath, name)
+                yield os.path.relpath(full, self.src).replace(os.sep, '/'), full
+
+    def _read_output(self, entry):
+        if entry.get('inline') is not None:
+            return entry['inline'].encode('utf-8')
+        with open(os.path.join(self.out, entry['out']), 'rb') as f:
+            return f.read()
+
+    def _write(self, rel, data):
+        path = os.path.join(self.out, rel)
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.stats['written'] += 1
+        return True
+
+    def _has_output(self, entry):
+        return entry.get('inline') is not None or os.path.exists(os.path.join(self.out, entry['out']))
+
+    def _remove_output(self, rel):
+        try:
+            os.remove(os.path.join(self.out, rel))
+            self.stats['removed'] += 1
+        except OSError:
+            pass
+
+    def _entry(self, entry, data, out_data, out_rel, **extra):
+        entry.update({
+            'sha': hashlib.sha256(data).hexdigest(),
+            'src_size': len(data),
+            'out': out_rel,
+            'out_sha': hashlib.sha256(out_data).hexdigest(),
+            'out_size': len(out_data),
+            # Reported only: Capacitor's local asset loader serves plain files without
+            # Content-Encoding, and the APK is already zip-compressed, so .gz/.br copies
+            # would never be served and would only add size
+            'gzip_size': len(gzip.compress(out_data, 9, mtime=0)),
+        })
+        entry.update(extra)
+        return entry
+
+    @tracing.traced('web.build')
+    def build(self):
+        old_files = self.state['files']
+        files = {}
+        changed = {}
+        for rel, full in self._walk():
+            self.stats['files'] += 1
+            st = os.stat(full)
+            entry = dict(old_files.get(rel, {}))
+            if entry.get('stat') == [st.st_size, st.st_mtime_ns] and self._has_output(entry):
+                files[rel] = entry
+                continue
+            with open(full, 'rb') as f:
+                data = f.read()
+            entry['stat'] = [st.st_size, st.st_mtime_ns]
+            if entry.get('sha') == hashlib.sha256(data).hexdigest() and self._has_output(entry):
+                files[rel] = entry
+                continue
+            changed[rel] = data
+            files[rel] = entry
+
+        assets = []
+        for rel, data in changed.items():
+            if posixpath.splitext(rel)[1].lower() in HTML_EXTS:
+                text = data.decode('utf-8', errors='replace')
+                files[rel]['refs'] = [[r[2], r[3]] for r in _asset_refs(rel, text)]
+            else:
+                assets.append((rel, data))
+
+        # Names referenced from CSS/JS cannot be fingerprinted without rewriting those files
+        for (rel, data), out_data in zip(assets, transform_all(assets, self.settings['minify'], self.jobs)):
+            ext = posixpath.splitext(rel)[1].lower()
+            names = sorted(set(_NAME_REF.findall(out_data.decode('utf-8', errors='replace')))) \
+                if ext in ('.css', '.js') else []
+            self._entry(files[rel], data, out_data, rel, names=names)
+            changed[rel] = out_data
+            self.stats['processed'] += 1
+
+        referenced_names = set()
+        html_targets = set()
+        ref_kinds = {}
+        for rel, entry in files.items():
+            referenced_names.update(entry.get('names', []))
+            for target, kind in entry.get('refs', []):
+                ref_kinds.setdefault(target, set()).add(kind)
+                if kind in ('css', 'js', 'deferred'):
+                    html_targets.add(target)
+
+        for rel, entry in files.items():
+            ext = posixpath.splitext(rel)[1].lower()
+            if ext in HTML_EXTS:
+                continue
+            out_rel = rel
+            if (self.settings['fingerprint'] and ext in ('.css', '.js') and rel in html_targets
+                    and posixpath.basename(rel) not in referenced_names):
+                out_rel = fingerprint_name(rel, entry['out_sha'])
+            previous = old_files.get(rel, {}).get('out')
+            kinds = ref_kinds.get(rel)
+            if (kinds and kinds <= {'css', 'js'} and entry['out_size'] <= self.settings['inline_limit']
+                    and posixpath.basename(rel) not in referenced_names):
+                # Every page that uses it inlines it: keep the body in the state, not in dist/
+                entry['inline'] = (changed[rel] if rel in changed else self._read_output(entry)).decode('utf-8')
+                entry['out'] = None
+                if previous:
+                    self._remove_output(previous)
+                continue
+            if rel in changed:
+                self._write(out_rel, changed[rel])
+            elif out_rel != entry['out']:
+                self._write(out_rel, self._read_output(entry))
+            if previous and previous != out_rel:
+                self._remove_output(previous)
+            entry.pop('inline', None)
+            entry['out'] = out_rel
+
+        for rel, entry in files.items():
+            if posixpath.splitext(rel)[1].lower() not in HTML_EXTS:
+                continue
+            deps = {target: [files[target]['out'], files[target]['out_sha']]
+                    for target, _ in entry.get('refs', []) if target in files}
+            if rel not in changed and entry.get('deps') == deps:
+                continue
+            data = changed.get(rel)
+            if data is None:
+                with open(os.path.join(self.src, rel), 'rb') as f:
+                    data = f.read()
+            out_data = self._render_html(rel, data.decode('utf-8'), files).encode('utf-8')
+            self.stats['processed'] += 1
+            self._entry(entry, data, out_data, rel, deps=deps)
+            self._write(rel, out_data)
+
+        for rel, entry in old_files.items():
+            if rel not in files and entry.get('out'):
+                self._remove_output(entry['out'])
+
+        self.state['files'] = files
+        self._save_state()
+        return files
+
+    def _render_html(self, rel, text, files):
+        pieces = []
+        pos = 0
+        limit = self.settings['inline_limit']
+        base = posixpath.dirname(rel)
+        for start, end, target, kind, attrs in _asset_refs(rel, text):
+            entry = files.get(target)
+            if not entry:
+                continue
+            pieces.append(text[pos:start])
+            pos = end
+            tag = text[start:end]
+            if kind in ('css', 'js') and entry['out_size'] <= limit:
+                body = self._read_output(entry).decode('utf-8')
+                if kind == 'css':
+                    media = attrs.get('media')
+                    pieces.append(f'<style media="{media}">{body}</style>' if media else f'<style>{body}</style>')
+                else:
+                    body = re.sub(r'</(script)', r'<\\/\1', body, flags=re.I)
+                    pieces.append(f'<script>{body}</script>')
+                continue
+            attr = 'href' if kind == 'css' else 'src'
+            url = posixpath.relpath(entry['out'], base or '.')
+            pieces.append(re.sub(r'''(\b%s\s*=\s*)(["']?)[^"'\s>]+\2''' % attr,
+                                 lambda m: f'{m.group(1)}{m.group(2)}{url}{m.group(2)}', tag, count=1))
+        pieces.append(text[pos:])
+        html = ''.join(pieces)
+        return minify_html(html) if self.settings['minify'] else html
+
+
+@tracing.traced('web.report')
+def write_report(files, path):
+    rows = []
+    for rel, entry in sorted(files.items()):
+        rows.append({'file': rel, 'out': entry.get('out'), 'src': entry.get('src_size', 0),
+                     'out_size': entry.get('out_size', 0), 'gzip': entry.get('gzip_size', 0)})
+    totals = {k: sum(r[k] for r in rows) for k in ('src', 'out_size', 'gzip')}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'totals': totals, 'files': rows}, f, indent=2)
+    return rows, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="web_optimizer.py",
+        description="Minifica, incrusta y agrega hash a los archivos web antes de cap sync."
+    )
+    parser.add_argument('--src', default='www', help="Fuentes web (por defecto: www)")
+    parser.add_argument('--out', default='dist', help="Directorio de salida (por defecto: dist)")
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help="Archivo de estado incremental")
+    parser.add_argument('--report', default=DEFAULT_REPORT_PATH, help="Informe de tamanos (JSON)")
+    parser.add_argument('--inline-limit', type=int, default=0,
+                        help="Incrusta en el HTML los CSS/JS de hasta estos bytes (por defecto: 0, desactivado)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Procesos en paralelo (por defecto: CPUs)")
+    parser.add_argument('--no-minify', action='store_true', help="Copia los archivos sin minificar")
+    parser.add_argument('--no-fingerprint', action='store_true', help="No agrega hash a los nombres")
+    tracing.add_argument(parser)
+    opts = parser.parse_args(argv)
+    tracing.configure(opts)
+
+    started = time.perf_counter()
+    optimizer = WebOptimizer(opts.src, opts.out, opts.state, minify=not opts.no_minify,
+                             inline_limit=opts.inline_limit, fingerprint=not opts.no_fingerprint,
+                             jobs=opts.jobs)
+    files = optimizer.build()
+    rows, totals = write_report(files, opts.report)
+    elapsed = time.perf_counter() - started
+
+    for row in sorted(rows, key=lambda r: r['src'] - r['out_size'], reverse=True)[:10]:
+        print(f"{row['file']:<40} {row['src']:>9} -> {row['out_size']:>9} bytes (gzip {row['gzip']})")
+    change = (totals['out_size'] - totals['src']) * 100 / totals['src'] if totals['src'] else 0
+    s = optimizer.stats
+    print(f"{s['files']} archivos, {s['processed']} procesados, {s['written']} escritos, {s['removed']} eliminados | "
+          f"{totals['src']} -> {totals['out_size']} bytes ({change:+.1f}%), gzip {totals['gzip']} | "
+          f"{elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,50 @@ const openExternalLink = async (url) => {
     }
 };
 
+const ROUTE_ACTIONS = {
+    '/producto/:id': 'view_product',
+    '/usuario/:username': 'view_user',
+    '/configuracion': 'open_settings',
+    '/promo/:codigo': 'view_promo'
+};
+
+// route.data keys the app has always exposed, whatever the :param is called in deepLinks.paths
+const PARAM_ALIASES = {
+    '/producto/:id': { id: 'productId' }
+};
+
+// Built-in token links, handled for any configured paths
+const TOKEN_ROUTES = {
+    'reset-password': 'reset_password',
+    'verify-email': 'verify_email'
+};
+
+// Same precedence as deeplink_router.py: static, then :param, then trailing *
+const matchRoute = (node, segments, i) => {
+    if (i === segments.length) {
+        return node.r ?? node.w ?? null;
+    }
+    const child = node.s && Object.prototype.hasOwnProperty.call(node.s, segments[i]) ? node.s[segments[i]] : null;
+    if (child) {
+        const found = matchRoute(child, segments, i + 1);
+        if (found !== null) return found;
+    }
+    if (node.p) {
+        const found = matchRoute(node.p, segments, i + 1);
+        if (found !== null) return found;
+    }
+    return node.w ?? null;
+};
+
+const deepLinkPath = (url, urlObj, scheme, table) => {
+    if (scheme === 'http' || scheme === 'https') {
+        return !table.host || urlObj.hostname === table.host ? urlObj.pathname : null;
+    }
+    if (scheme !== table.scheme) return null;
+    // miapp://producto/1: engines disagree on whether "producto" is the host, so read it from the string
+    return '/' + url.slice(scheme.length + 1).split(/[?#]/)[0].replace(/^\/+/, '');
+};
+
 const parseDeepLink = (url) => {
     if (!url) return null;
     
@@ -13,10 +57,11 @@ const parseDeepLink = (url) => {
         const urlObj = new URL(url);
         const scheme = urlObj.protocol.replace(':', '');
         const host = urlObj.hostname;
-        const pathname = urlObj.pathname;
         const params = Object.fromEntries(urlObj.searchParams);
+        const table = window.DEEP_LINK_ROUTES || { scheme: 'miapp', host: '', routes: [], trie: {} };
+        const pathname = deepLinkPath(url, urlObj, scheme, table);
         
-        const segments = pathname.split('/').filter(s => s);
+        const segments = (pathname || '').split('/').filter(s => s).map(decodeURIComponent);
         
         let route = {
             scheme,
@@ -24,31 +69,29 @@ const parseDeepLink = (url) => {
             path: pathname,
             segments,
             params,
+            pattern: null,
             action: null,
             data: {}
         };
         
-        if (scheme === 'miapp' || host === 'miapp.com') {
-            if (segments[0] === 'producto' && segments[1]) {
-                route.action = 'view_product';
-                route.data = { productId: segments[1], ...params };
-            } else if (segments[0] === 'usuario' && segments[1]) {
-                route.action = 'view_user';
-                route.data = { username: segments[1], ...params };
-            } else if (segments[0] === 'configuracion') {
-                route.action = 'open_settings';
-                route.data = { ...params };
-            } else if (segments[0] === 'promo' && segments[1]) {
-                route.action = 'view_promo';
-                route.data = { codigo: segments[1], ...params };
-            } else if (segments[0] === 'reset-password' && params.token) {
-                route.action = 'reset_password';
-                route.data = { token: params.token };
-            } else if (segments[0] === 'verify-email' && params.token) {
-                route.action = 'verify_email';
-                route.data = { token: params.token };
-            } else {
+        if (pathname !== null && TOKEN_ROUTES[segments[0]] && params.token) {
+            route.action = TOKEN_ROUTES[segments[0]];
+            route.data = { token: params.token };
+        } else if (pathname !== null) {
+            const index = matchRoute(table.trie, segments, 0);
+            if (index === null) {
                 route.action = 'home';
+            } else {
+                const entry = table.routes[index];
+                const pathParams = {};
+                const aliases = PARAM_ALIASES[entry.path] || {};
+                entry.params.forEach(([position, name]) => { pathParams[aliases[name] || name] = segments[position]; });
+                if (entry.splat) {
+                    pathParams[entry.splat[1]] = segments.slice(entry.splat[0]).join('/');
+                }
+                route.pattern = entry.path;
+                route.action = ROUTE_ACTIONS[entry.path] || entry.path;
+                route.data = { ...pathParams, ...params };
             }
         }
         
@@ -140,6 +183,9 @@ const handleDeepLinkRoute = (route) => {
             }
             break;
             
+        case 'home':
+            break;
+            
         default:
             console.log('Unknown deep link action:', route.action);
     }
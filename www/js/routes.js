@@ -0,0 +1,2 @@
+// Generado por deeplink_router.py desde app.config.json. No editar a mano.
+window.DEEP_LINK_ROUTES = {"scheme":"miapp","host":"miapp.com","routes":[{"path":"/producto/:id","params":[[1,"id"]],"splat":null},{"path":"/usuario/:username","params":[[1,"username"]],"splat":null},{"path":"/configuracion","params":[],"splat":null},{"path":"/promo/:codigo","params":[[1,"codigo"]],"splat":null}],"trie":{"s":{"producto":{"p":{"r":0}},"usuario":{"p":{"r":1}},"configuracion":{"r":2},"promo":{"p":{"r":3}}}}};